@@ -1,18 +1,17 @@
 # bugtracker/asgi.py
 import os
-import django
+
+from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bugtracker.settings')
-django.setup()
+# Sets Django up; the websocket stack below imports models, so it must come after
+django_asgi_app = get_asgi_application()
 
-from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.security.websocket import AllowedHostsOriginValidator
 from tracker.routing import websocket_urlpatterns
 from tracker.middleware import WebSocketAuthMiddlewareStack
 
-django_asgi_app = get_asgi_application()
-
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
     "websocket": AllowedHostsOriginValidator(
@@ -20,4 +19,4 @@ application = ProtocolTypeRouter({
             URLRouter(websocket_urlpatterns)
         )
     ),
-})
\ No newline at end of file
+})
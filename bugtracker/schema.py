@@ -0,0 +1,136 @@
+"""
+Swagger/ReDoc views, with the OpenAPI schema generated once per process.
+
+Importing drf_yasg's views pulls in its generators, inspectors and
+renderers, so nothing is built until the first request to one of these URLs.
+Generating the schema walks every viewset and serializer. It is done once,
+encoded once per format and served with a content-hash ETag. Deploys can
+write the documents at build time with ``manage.py generate_schema``. When
+``TRACKER_SCHEMA_DIR`` holds them they are read from disk instead.
+"""
+import functools
+import hashlib
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.csrf import csrf_exempt
+
+
+logger = logging.getLogger(__name__)
+
+# Document suffix, as captured by the swagger<format>/ URL -> content type
+SCHEMA_FORMATS = {
+    '.json': 'application/json',
+    '.yaml': 'application/yaml',
+}
+
+
+def api_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="Bug Tracker API",
+        default_version='v1',
+        description="A comprehensive bug tracking system with real-time updates",
+        terms_of_service="https://www.example.com/policies/terms/",
+        contact=openapi.Contact(email="contact@bugtracker.com"),
+        license=openapi.License(name="BSD License"),
+    )
+
+
+@functools.cache
+def api_schema():
+    """
+    The public schema as an ``openapi.Swagger`` object. It is generated
+    without a request, so it is the same for every caller and at build time;
+    the host is left out and clients resolve paths against the docs' origin.
+    """
+    from drf_yasg.app_settings import swagger_settings
+
+    generator = swagger_settings.DEFAULT_GENERATOR_CLASS(api_info())
+    return generator.get_schema(request=None, public=True)
+
+
+def encode_schema(suffix):
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+
+    codec = OpenAPICodecJson if suffix == '.json' else OpenAPICodecYaml
+    return codec(validators=[]).encode(api_schema())
+
+
+@functools.cache
+def schema_document(suffix):
+    """``(body, etag)`` for one format, read from TRACKER_SCHEMA_DIR when built there"""
+    body = None
+    if settings.TRACKER_SCHEMA_DIR:
+        path = Path(settings.TRACKER_SCHEMA_DIR) / f'swagger{suffix}'
+        if path.exists():
+            body = path.read_bytes()
+        else:
+            logger.warning(f"{path} not found; generating the schema in process")
+    if body is None:
+        body = encode_schema(suffix)
+    return body, f'"{hashlib.sha256(body).hexdigest()}"'
+
+
+def clear_schema_cache():
+    schema_document.cache_clear()
+    api_schema.cache_clear()
+
+
+def serve_schema(request, suffix):
+    body, etag = schema_document(suffix)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type=SCHEMA_FORMATS[suffix])
+    response['ETag'] = etag
+    # Clients can keep the document but must revalidate, since a deploy can change it
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def ui_stub():
+    """An empty ``openapi.Swagger`` carrying only what the UI pages render: title and version"""
+    from drf_yasg import openapi
+
+    return openapi.Swagger(info=api_info(), _prefix='/', paths=openapi.Paths(paths={}))
+
+
+@functools.cache
+def _ui_view(renderer):
+    from drf_yasg.app_settings import swagger_settings
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+
+    class CachedSchemaGenerator(swagger_settings.DEFAULT_GENERATOR_CLASS):
+        # The UI page only reads the title and version; the spec itself is
+        # fetched from ?format=openapi. A stub keeps the page from generating
+        # the schema when TRACKER_SCHEMA_DIR already holds it.
+        def get_schema(self, request=None, public=False):
+            return ui_stub()
+
+    view = get_schema_view(
+        api_info(),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+        generator_class=CachedSchemaGenerator,
+    )
+    return view.with_ui(renderer)
+
+
+def lazy_schema_view(renderer=None):
+    """URLconf entry for the raw schema (renderer=None), or the 'swagger' / 'redoc' UI"""
+    @csrf_exempt
+    def view(request, format=None):
+        if renderer is None:
+            if format not in SCHEMA_FORMATS:
+                raise Http404(f"Unknown schema format {format}")
+            return serve_schema(request, format)
+        if request.GET.get('format') == 'openapi':
+            # The UI page loading its spec
+            return serve_schema(request, '.json')
+        return _ui_view(renderer)(request)
+    return view
@@ -0,0 +1,22 @@
+"""
+Settings profiles, selected with DJANGO_ENV (environment or .env file):
+
+- ``dev`` (default): DEBUG on, browsable API, schema regenerated on every hit.
+- ``prod``: DEBUG off, JSON-only API, cached templates and schema, and the
+  browser-only middleware skipped on API routes.
+
+A profile can also be chosen directly, e.g.
+``DJANGO_SETTINGS_MODULE=bugtracker.settings.prod``.
+"""
+from decouple import config
+from django.core.exceptions import ImproperlyConfigured
+
+
+DJANGO_ENV = config('DJANGO_ENV', default='dev')
+
+if DJANGO_ENV == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif DJANGO_ENV == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(f"DJANGO_ENV must be 'dev' or 'prod', not {DJANGO_ENV!r}")
@@ -0,0 +1,436 @@
+"""
+Django settings shared by every profile (see bugtracker/settings/__init__.py).
+
+Generated by 'django-admin startproject' using Django 5.2.4.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.2/ref/settings/
+"""
+
+from pathlib import Path
+from decouple import config, Csv
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = config('SECRET_KEY', default='django-insecure-iby5yv+12j53^u8#i34=c4!ocht^y0$sg#r2$pqeq8itl@r7p*')
+
+# SECURITY WARNING: don't run with debug turned on in production!
+# The dev profile turns it on; DEBUG keeps every SQL query of a request in memory.
+DEBUG = False
+
+ALLOWED_HOSTS = ['*']
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'daphne',  # For ASGI support
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'rest_framework',
+    'corsheaders',
+    'rest_framework_simplejwt',
+    'channels',
+    'channels_redis',
+    'drf_yasg',
+    'django_filters',
+    
+    
+    
+    # Local apps
+    'tracker', 
+]
+
+
+
+# ASGI application for channels
+ASGI_APPLICATION = 'bugtracker.asgi.application'
+
+MIDDLEWARE = [
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Keeps single-flight list calls from hiding a user's own fresh write
+    'tracker.middleware.RecentWriteMiddleware',
+]
+
+# Opt-in per-request query count, DB time and serializer timing
+# (Server-Timing header + /api/metrics/requests/)
+TRACKER_INSTRUMENTATION = config('TRACKER_INSTRUMENTATION', default=False, cast=bool)
+TRACKER_QUERY_BUDGET = config('TRACKER_QUERY_BUDGET', default=20, cast=int)
+if TRACKER_INSTRUMENTATION:
+    MIDDLEWARE.insert(0, 'tracker.middleware.RequestInstrumentationMiddleware')
+
+# WebSocket metrics are always on and exported at /metrics (Prometheus text format).
+# Scrapers send "Authorization: Bearer <TRACKER_METRICS_TOKEN>". With no token the
+# endpoint answers 403 unless DEBUG is on.
+TRACKER_METRICS_TOKEN = config('TRACKER_METRICS_TOKEN', default='')
+TRACKER_WS_SLOW_SEND_SECONDS = config('TRACKER_WS_SLOW_SEND_SECONDS', default=0.25, cast=float)
+# Per-connection outbound queue: clients that fall further behind are sent
+# resync_required and disconnected (close code 4008). Every client gets at most
+# TRACKER_WS_ACK_WINDOW unacknowledged messages at a time (0 disables acks).
+TRACKER_WS_OUTBOX_SIZE = config('TRACKER_WS_OUTBOX_SIZE', default=100, cast=int)
+TRACKER_WS_ACK_WINDOW = config('TRACKER_WS_ACK_WINDOW', default=50, cast=int)
+TRACKER_WS_MAX_LAG_SECONDS = config('TRACKER_WS_MAX_LAG_SECONDS', default=10, cast=float)
+# Server heartbeat interval (0 disables) and idle time before a socket is reaped
+TRACKER_WS_HEARTBEAT_SECONDS = config('TRACKER_WS_HEARTBEAT_SECONDS', default=25, cast=float)
+TRACKER_WS_IDLE_TIMEOUT_SECONDS = config('TRACKER_WS_IDLE_TIMEOUT_SECONDS', default=90, cast=float)
+# Projects one ws/stream/ connection may subscribe to
+TRACKER_WS_MAX_SUBSCRIPTIONS = config('TRACKER_WS_MAX_SUBSCRIPTIONS', default=50, cast=int)
+# Nested user summaries: per-process LRU size, and how long a process trusts its
+# copy before re-reading the shared cache (saves in other processes land within this)
+TRACKER_USER_SUMMARY_CACHE_SIZE = config('TRACKER_USER_SUMMARY_CACHE_SIZE', default=2000, cast=int)
+TRACKER_USER_SUMMARY_LOCAL_SECONDS = config('TRACKER_USER_SUMMARY_LOCAL_SECONDS', default=30, cast=float)
+# Bug updates by one user inside this window are sent as one notification and
+# logged as one activity entry (0 sends every update immediately)
+TRACKER_BUG_COALESCE_SECONDS = config('TRACKER_BUG_COALESCE_SECONDS', default=2, cast=float)
+# Overlapping identical bug/activity list requests by one user share one query
+TRACKER_SINGLE_FLIGHT = config('TRACKER_SINGLE_FLIGHT', default=True, cast=bool)
+# Deleted projects and bugs are hidden at once and removed by DeletionJobs in
+# batches of raw DELETEs, pausing between batches (see tracker/deletion.py).
+# In-process runs them on a thread of the web worker; otherwise run
+# `manage.py process_deletions`. Jobs without progress for STALE_SECONDS are retried.
+TRACKER_DELETION_BATCH_SIZE = config('TRACKER_DELETION_BATCH_SIZE', default=1000, cast=int)
+TRACKER_DELETION_PAUSE_SECONDS = config('TRACKER_DELETION_PAUSE_SECONDS', default=0.05, cast=float)
+TRACKER_DELETION_IN_PROCESS = config('TRACKER_DELETION_IN_PROCESS', default=True, cast=bool)
+TRACKER_DELETION_STALE_SECONDS = config('TRACKER_DELETION_STALE_SECONDS', default=300, cast=int)
+TRACKER_DELETION_MAX_ATTEMPTS = config('TRACKER_DELETION_MAX_ATTEMPTS', default=3, cast=int)
+# Directory with the OpenAPI documents written by `manage.py generate_schema`. When
+# empty, each process generates the schema once, on its first schema request
+TRACKER_SCHEMA_DIR = config('TRACKER_SCHEMA_DIR', default='')
+
+ROOT_URLCONF = 'bugtracker.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug', 
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+
+WSGI_APPLICATION = 'bugtracker.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+
+# Selected with DB_ENGINE=postgres|sqlite (environment or .env file).
+# Persistent connections let database_sync_to_async calls from consumers
+# reuse a connection instead of opening one per call.
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='bugtracker'),
+            'USER': config('DB_USER', default='bugtracker'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='127.0.0.1'),
+            'PORT': config('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    # Pooling uses psycopg-pool (in requirements.txt); Django requires CONN_MAX_AGE=0 with it
+    if config('DB_POOL', default=False, cast=bool):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'OPTIONS': {},
+        }
+    }
+    # WAL lets readers run alongside the single writer, IMMEDIATE takes the
+    # write lock up front so concurrent writers wait on busy_timeout instead
+    # of failing with "database is locked" on lock upgrade.
+    if config('DB_SQLITE_TUNING', default=True, cast=bool):
+        DATABASES['default']['OPTIONS'] = {
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA busy_timeout=5000;'
+            ),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 5,
+        }
+
+
+
+
+# Redis Configuration for Channels
+# CHANNEL_LAYER_BACKEND: redis (sharded across CHANNEL_REDIS_HOSTS), pubsub
+# (pure broadcast, no per-channel buffering) or memory (single process/tests).
+CHANNEL_LAYER_BACKEND = config('CHANNEL_LAYER_BACKEND', default='redis')
+CHANNEL_REDIS_HOSTS = config('CHANNEL_REDIS_HOSTS', default='redis://127.0.0.1:6379', cast=Csv())
+
+if CHANNEL_LAYER_BACKEND == 'pubsub':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+            'CONFIG': {
+                'hosts': CHANNEL_REDIS_HOSTS,
+            },
+        },
+    }
+elif CHANNEL_LAYER_BACKEND == 'memory':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'tracker.channel_layers.MeteredInMemoryChannelLayer',
+            'CONFIG': {
+                'capacity': config('CHANNEL_CAPACITY', default=500, cast=int),
+                'expiry': config('CHANNEL_EXPIRY', default=60, cast=int),
+                'group_expiry': config('CHANNEL_GROUP_EXPIRY', default=86400, cast=int),
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'tracker.channel_layers.MeteredRedisChannelLayer',
+            'CONFIG': {
+                'hosts': CHANNEL_REDIS_HOSTS,
+                'capacity': config('CHANNEL_CAPACITY', default=500, cast=int),
+                'expiry': config('CHANNEL_EXPIRY', default=60, cast=int),
+                'group_expiry': config('CHANNEL_GROUP_EXPIRY', default=86400, cast=int),
+            },
+        },
+    }
+
+# Redis Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+        }
+    }
+}
+
+# REST Framework Configuration
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'rest_framework.authentication.TokenAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'PAGE_SIZE': 20,
+    'DEFAULT_FILTER_BACKENDS': [
+        'django_filters.rest_framework.DjangoFilterBackend',
+    ],
+    # Counted in the default cache, so limits hold across workers (see tracker/throttles.py)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'tracker.throttles.UserRateThrottle',
+        'tracker.throttles.EndpointRateThrottle',
+    ],
+    # An empty value turns a scope off
+    'DEFAULT_THROTTLE_RATES': {
+        'user': config('TRACKER_THROTTLE_USER', default='1200/min', cast=lambda v: v or None),
+        'bug_list': config('TRACKER_THROTTLE_BUG_LIST', default='120/min', cast=lambda v: v or None),
+        'activity_list': config('TRACKER_THROTTLE_ACTIVITY_LIST', default='120/min', cast=lambda v: v or None),
+    },
+}
+
+
+
+
+# Password validation
+# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+
+
+# Static files
+STATIC_URL = '/static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+
+
+# JWT Configuration
+from datetime import timedelta
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'ROTATE_REFRESH_TOKENS': True,
+}
+
+
+# Swagger Settings
+SWAGGER_SETTINGS = {
+    'SECURITY_DEFINITIONS': {
+        'Bearer': {
+            'type': 'apiKey',
+            'name': 'Authorization',
+            'in': 'header',
+            'description': 'JWT Authorization header using the Bearer scheme. Example: "Authorization: Bearer {token}"'
+        }
+    },
+    'USE_SESSION_AUTH': True,
+    'JSON_EDITOR': True,
+    'SUPPORTED_SUBMIT_METHODS': [
+        'get',
+        'post',
+        'put',
+        'delete',
+        'patch'
+    ],
+    'OPERATIONS_SORTER': 'alpha',
+    'TAGS_SORTER': 'alpha',
+    'DOC_EXPANSION': 'none',
+    'DEEP_LINKING': True,
+    'SHOW_EXTENSIONS': True,
+    'DEFAULT_MODEL_RENDERING': 'example'
+}
+
+
+# CORS Configuration
+CORS_ALLOWED_ORIGINS = [
+    "http://localhost:3000",
+    "http://127.0.0.1:3000",
+    "http://localhost:5500",
+    "http://127.0.0.1:5500",
+    "http://localhost:8000",  # Add this
+    "http://127.0.0.1:8000",  # Add this
+]
+
+
+
+# Logging
+# Add this to settings.py
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {
+            'format': '{levelname} {asctime} {module} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'verbose',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': 'INFO',
+    },
+    'loggers': {
+        'tracker': {
+            'handlers': ['console'],
+            'level': 'DEBUG',
+            'propagate': False,
+        },
+        'channels': {
+            'handlers': ['console'],
+            'level': 'DEBUG',
+            'propagate': False,
+        },
+        # Over-capacity records feed the dropped message metric
+        'channels_redis': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'django': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
+# Allow WebSocket connections from same origin
+CORS_ALLOW_CREDENTIALS = True
+
+# Session settings for WebSocket authentication
+SESSION_COOKIE_HTTPONLY = False  # Allow JavaScript access to session cookie
+SESSION_COOKIE_SAMESITE = 'Lax'
+
+
+CORS_ALLOW_ALL_ORIGINS = True  # Remove in production
+
+
+
+
+# Activity log retention (see `manage.py archive_activity_logs`)
+ACTIVITY_LOG_RETENTION_DAYS = config('ACTIVITY_LOG_RETENTION_DAYS', default=180, cast=int)
+ACTIVITY_LOG_ARCHIVE_DIR = config('ACTIVITY_LOG_ARCHIVE_DIR', default=str(BASE_DIR / 'activity_archive'))
+# gzip: monthly JSONL files; sqlite: monthly tables in <ARCHIVE_DIR>/activity_archive.sqlite3
+ACTIVITY_LOG_ARCHIVE_FORMAT = config('ACTIVITY_LOG_ARCHIVE_FORMAT', default='gzip')
@@ -0,0 +1,5 @@
+"""Local development: DEBUG and the browsable API"""
+from .base import *  # noqa: F401,F403
+
+
+DEBUG = True
@@ -0,0 +1,70 @@
+"""
+Production profile (DJANGO_ENV=prod).
+
+SECRET_KEY and ALLOWED_HOSTS must come from the environment or .env file.
+"""
+from decouple import Csv, config
+
+from .base import *  # noqa: F401,F403
+from .base import CORS_ALLOWED_ORIGINS, LOGGING, MIDDLEWARE, REST_FRAMEWORK, TEMPLATES
+
+
+DEBUG = False
+SECRET_KEY = config('SECRET_KEY')
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', cast=Csv())
+
+CORS_ALLOW_ALL_ORIGINS = False
+CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default=','.join(CORS_ALLOWED_ORIGINS), cast=Csv())
+
+# JSON only: the browsable API renderer and its templates are never loaded
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+}
+
+# Admin and Swagger UI templates are compiled once per process
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        'context_processors': [
+            'django.template.context_processors.request',
+            'django.contrib.auth.context_processors.auth',
+            'django.contrib.messages.context_processors.messages',
+        ],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
+
+# Sessions, CSRF, auth, messages and X-Frame-Options only serve the admin and
+# Swagger UI; API routes authenticate with tokens and get plain JSON
+WEB_ONLY_MIDDLEWARE = {
+    'django.contrib.sessions.middleware.SessionMiddleware': 'tracker.middleware.WebSessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware': 'tracker.middleware.WebCsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware': 'tracker.middleware.WebAuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware': 'tracker.middleware.WebMessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware': 'tracker.middleware.WebXFrameOptionsMiddleware',
+}
+MIDDLEWARE = [WEB_ONLY_MIDDLEWARE.get(path, path) for path in MIDDLEWARE]
+# The deploy checks look for the exact CSRF and X-Frame-Options paths, not subclasses
+SILENCED_SYSTEM_CHECKS = ['security.W002', 'security.W003']
+
+TRACKER_SCHEMA_DIR = config('TRACKER_SCHEMA_DIR', default=str(BASE_DIR / 'schema'))
+
+# Per-message consumer logging costs more than the message itself. The dropped
+# message metric does not depend on channels_redis logging at INFO (see
+# tracker.channel_layers.watch_redis_drops).
+LOG_LEVEL = config('LOG_LEVEL', default='WARNING')
+LOGGING = {
+    **LOGGING,
+    'root': {**LOGGING['root'], 'level': LOG_LEVEL},
+    'loggers': {
+        name: {**logger, 'level': LOG_LEVEL}
+        for name, logger in LOGGING['loggers'].items()
+    },
+}
@@ -16,32 +16,16 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 
+from .schema import lazy_schema_view
 
 
-# Swagger/OpenAPI Documentation
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Bug Tracker API",
-      default_version='v1',
-      description="A comprehensive bug tracking system with real-time updates",
-      terms_of_service="https://www.example.com/policies/terms/",
-      contact=openapi.Contact(email="contact@bugtracker.com"),
-      license=openapi.License(name="BSD License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
-
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('tracker.urls')),
     
-    # API Documentation
-    path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    # API Documentation (drf_yasg is imported on the first request to one of these)
+    path('swagger<format>/', lazy_schema_view(), name='schema-json'),
+    path('swagger/', lazy_schema_view('swagger'), name='schema-swagger-ui'),
+    path('redoc/', lazy_schema_view('redoc'), name='schema-redoc'),
 ]
@@ -0,0 +1,125 @@
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Bug, Project
+from .querysets import live_bugs, live_projects
+
+
+ACCESS_CACHE_TIMEOUT = 60 * 10
+
+
+def access_cache_key(user_id, project_id):
+    return f'project_access_{user_id}_{project_id}'
+
+
+def _member_filter(user_id):
+    # Same membership rule as the REST querysets: owner, assignee or reporter of a
+    # project that is not soft-deleted; soft-deleted bugs grant nothing either
+    return live_projects() & (
+        Q(owner_id=user_id) |
+        Q(bugs__assigned_to_id=user_id, bugs__deleted_at__isnull=True) |
+        Q(bugs__created_by_id=user_id, bugs__deleted_at__isnull=True)
+    )
+
+
+def has_project_access(user_id, project_id):
+    """Cached check that a user may watch a project, one query on a miss"""
+    key = access_cache_key(user_id, project_id)
+    allowed = cache.get(key)
+    if allowed is None:
+        allowed = Project.objects.filter(_member_filter(user_id), id=project_id).exists()
+        cache.set(key, allowed, ACCESS_CACHE_TIMEOUT)
+    return allowed
+
+
+def accessible_project_ids(user_id, project_ids):
+    """The subset of project_ids a user may watch; cache misses are resolved in one query"""
+    keys = {access_cache_key(user_id, project_id): project_id for project_id in project_ids}
+    cached = cache.get_many(keys)
+    allowed = {keys[key] for key, value in cached.items() if value}
+
+    missing = [project_id for key, project_id in keys.items() if key not in cached]
+    if missing:
+        found = set(
+            Project.objects.filter(_member_filter(user_id), id__in=missing)
+            .values_list('id', flat=True)
+            .distinct()
+        )
+        cache.set_many(
+            {access_cache_key(user_id, project_id): project_id in found for project_id in missing},
+            ACCESS_CACHE_TIMEOUT,
+        )
+        allowed |= found
+    return allowed
+
+
+def invalidate_project_access(pairs):
+    """Forget cached decisions for ``(user_id, project_id)`` pairs"""
+    cache.delete_many([
+        access_cache_key(user_id, project_id)
+        for user_id, project_id in pairs
+        if user_id and project_id
+    ])
+
+
+def revoke_lost_access(pairs):
+    """Tell open sockets of users who no longer belong to a project to drop it"""
+    from .notifications import group_send
+
+    invalidate_project_access(pairs)
+    for user_id, project_id in pairs:
+        if user_id and project_id and not has_project_access(user_id, project_id):
+            group_send(f'user_{user_id}', {'type': 'access_revoked', 'project_id': project_id})
+
+
+def owned_projects_key(user_id):
+    return f'owned_projects_{user_id}'
+
+
+def owned_project_ids(user_id):
+    """Cached ids of the projects a user owns"""
+    key = owned_projects_key(user_id)
+    project_ids = cache.get(key)
+    if project_ids is None:
+        project_ids = frozenset(Project.objects.filter(live_projects(), owner_id=user_id).values_list('id', flat=True))
+        cache.set(key, project_ids, ACCESS_CACHE_TIMEOUT)
+    return project_ids
+
+
+def invalidate_owned_projects(user_ids):
+    cache.delete_many([owned_projects_key(user_id) for user_id in user_ids if user_id])
+
+
+def visible_projects_key(user_id):
+    return f'visible_projects_{user_id}'
+
+
+def visible_project_ids(user_id):
+    """
+    Cached ids of the projects listed for a user: owned, or holding a bug
+    assigned to them. Replaces the join over ``bugs`` plus DISTINCT in
+    ProjectViewSet with an indexed ``id IN (...)`` lookup.
+    """
+    key = visible_projects_key(user_id)
+    project_ids = cache.get(key)
+    if project_ids is None:
+        assigned = Bug.objects.filter(live_bugs(), assigned_to_id=user_id).values_list('project_id', flat=True).distinct()
+        project_ids = owned_project_ids(user_id) | frozenset(assigned)
+        cache.set(key, project_ids, ACCESS_CACHE_TIMEOUT)
+    return project_ids
+
+
+def invalidate_visible_projects(user_ids):
+    cache.delete_many([visible_projects_key(user_id) for user_id in user_ids if user_id])
+
+
+async def avisible_project_ids(user_id):
+    """visible_project_ids for async views, using the async cache and ORM APIs"""
+    key = visible_projects_key(user_id)
+    project_ids = await cache.aget(key)
+    if project_ids is None:
+        owned = Project.objects.filter(live_projects(), owner_id=user_id).values_list('id', flat=True)
+        assigned = Bug.objects.filter(live_bugs(), assigned_to_id=user_id).values_list('project_id', flat=True).distinct()
+        project_ids = frozenset([project_id async for project_id in owned] + [project_id async for project_id in assigned])
+        await cache.aset(key, project_ids, ACCESS_CACHE_TIMEOUT)
+    return project_ids
@@ -3,4 +3,4 @@ from .models import *
 
 # Register your models here.
 
-admin.site.register([Project, Bug, Comment])
+admin.site.register([Project, Bug, Comment, DeletionJob])
@@ -0,0 +1,167 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AssigneeRollup, Bug, DailyResolutionRollup, PriorityRollup
+from .querysets import live_bugs
+from .users import user_summaries
+
+
+BUG_STATE_FIELDS = ('project_id', 'priority', 'status', 'assigned_to_id', 'created_at', 'resolved_at')
+
+ROLLUP_KEYS = {
+    PriorityRollup: ('project_id', 'priority'),
+    DailyResolutionRollup: ('project_id', 'day'),
+    AssigneeRollup: ('project_id', 'assignee_id'),
+}
+
+
+def bug_state(bug):
+    """The fields of a bug that feed the rollups, captured before or after a change"""
+    return {field: getattr(bug, field) for field in BUG_STATE_FIELDS}
+
+
+def contributions(state):
+    """
+    Yield ``(model, keys, increments)`` for everything one bug adds to the rollups.
+
+    A change is applied as "remove the old contribution, add the new one", so
+    status transitions, reprioritisation, reassignment and deletes all go
+    through the same path as a full rebuild.
+    """
+    project_id = state['project_id']
+    resolved = state['status'] == 'Resolved'
+
+    if not resolved:
+        yield PriorityRollup, (project_id, state['priority']), {'open_count': 1}
+
+    if state['assigned_to_id']:
+        counter = 'resolved_count' if resolved else 'open_count'
+        yield AssigneeRollup, (project_id, state['assigned_to_id']), {counter: 1}
+
+    if resolved and state['resolved_at']:
+        day = timezone.localtime(state['resolved_at']).date()
+        seconds = max((state['resolved_at'] - state['created_at']).total_seconds(), 0)
+        yield DailyResolutionRollup, (project_id, day), {'resolved_count': 1, 'resolve_seconds': seconds}
+
+
+def _accumulate(totals, state, sign):
+    for model, keys, increments in contributions(state):
+        row = totals[model, keys]
+        for field, amount in increments.items():
+            row[field] = row.get(field, 0) + sign * amount
+
+
+def _bump(model, keys, increments):
+    """Add increments to one rollup row, creating it on first use"""
+    lookup = dict(zip(ROLLUP_KEYS[model], keys))
+    updates = {field: F(field) + amount for field, amount in increments.items()}
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **increments)
+    except IntegrityError:
+        # Another request created the row first
+        model.objects.filter(**lookup).update(**updates)
+
+
+def apply_bug_change(old_state, new_state):
+    """Move a bug's contribution from old_state to new_state (either may be None)"""
+    totals = defaultdict(dict)
+    if old_state:
+        _accumulate(totals, old_state, -1)
+    if new_state:
+        _accumulate(totals, new_state, 1)
+    _apply(totals)
+
+
+def add_bugs(bugs):
+    """Count newly inserted bugs (e.g. from bulk_create) with one update per touched rollup row"""
+    totals = defaultdict(dict)
+    for bug in bugs:
+        _accumulate(totals, bug_state(bug), 1)
+    _apply(totals)
+
+
+def _apply(totals):
+    for (model, keys), increments in totals.items():
+        increments = {field: amount for field, amount in increments.items() if amount}
+        if increments:
+            _bump(model, keys, increments)
+
+
+def rebuild(project_ids=None, chunk_size=2000):
+    """Recompute rollups from the bugs table; returns the number of bugs scanned"""
+    bugs = Bug.objects.filter(live_bugs()).order_by()
+    if project_ids:
+        bugs = bugs.filter(project_id__in=project_ids)
+
+    totals = defaultdict(dict)
+    scanned = 0
+    for row in bugs.values(*BUG_STATE_FIELDS).iterator(chunk_size=chunk_size):
+        _accumulate(totals, row, 1)
+        scanned += 1
+
+    with transaction.atomic():
+        for model in ROLLUP_KEYS:
+            rows = model.objects.all()
+            if project_ids:
+                rows = rows.filter(project_id__in=project_ids)
+            rows.delete()
+            model.objects.bulk_create(
+                [
+                    model(**dict(zip(ROLLUP_KEYS[model], keys)), **increments)
+                    for (row_model, keys), increments in totals.items()
+                    if row_model is model
+                ],
+                batch_size=1000,
+            )
+    return scanned
+
+
+def project_analytics(project_id, days=30, top=5):
+    """Dashboard numbers for one project, read from the rollup tables only"""
+    since = timezone.localdate() - timedelta(days=days - 1)
+
+    open_by_priority = {priority: 0 for priority, _ in Bug.PRIORITY_CHOICES}
+    for priority, open_count in PriorityRollup.objects.filter(project_id=project_id).values_list('priority', 'open_count'):
+        open_by_priority[priority] = open_count
+
+    resolved_per_day = []
+    resolved, resolve_seconds = 0, 0.0
+    daily = DailyResolutionRollup.objects.filter(project_id=project_id, day__gte=since, resolved_count__gt=0)
+    for day, count, seconds in daily.values_list('day', 'resolved_count', 'resolve_seconds'):
+        resolved_per_day.append({'day': day.isoformat(), 'resolved': count})
+        resolved += count
+        resolve_seconds += seconds
+
+    assignees = list(
+        AssigneeRollup.objects.filter(project_id=project_id)
+        .exclude(open_count=0, resolved_count=0)
+        .order_by('-open_count', '-resolved_count')[:top]
+    )
+    users = user_summaries(row.assignee_id for row in assignees)
+    top_assignees = [
+        {
+            'user_id': row.assignee_id,
+            # None when the user no longer resolves (e.g. deleted since the row was counted)
+            'username': users.get(row.assignee_id, {}).get('username'),
+            'open': row.open_count,
+            'resolved': row.resolved_count,
+        }
+        for row in assignees
+    ]
+    return {
+        'project': project_id,
+        'open_by_priority': open_by_priority,
+        'open_total': sum(open_by_priority.values()),
+        'days': days,
+        'resolved_per_day': resolved_per_day,
+        'resolved_total': resolved,
+        'mean_time_to_resolve_hours': round(resolve_seconds / resolved / 3600, 2) if resolved else None,
+        'top_assignees': top_assignees,
+    }
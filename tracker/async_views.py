@@ -0,0 +1,252 @@
+"""
+Async-native read endpoints under ``/api/async/``.
+
+The DRF viewsets are sync, so under Daphne every request to them is handed
+to the single thread-sensitive executor. These views run on the event loop:
+the JWT is validated in-process, the user and rows are loaded with Django's
+async ORM, and nested users are loaded with the async summary cache and
+handed to the serializer, so serializers never touch the database. Responses match the DRF endpoints they mirror.
+"""
+import functools
+import math
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .access import avisible_project_ids
+from .models import ActivityLog, Bug, Comment
+from .querysets import (
+    assigned_bugs,
+    comment_thread,
+    comments_after,
+    group_counts,
+    live_projects,
+    parse_group_by,
+    visible_bugs,
+    with_bug_details,
+)
+from .serializers import ActivityLogSerializer, BugSerializer, CommentSerializer, referenced_user_ids
+from .singleflight import flights, request_key
+from .throttles import athrottle
+from .users import auser_summaries
+
+
+BUG_FILTERS = ('status', 'priority', 'project', 'assigned_to')
+BUG_ORDERING = ('created_at', 'updated_at', 'priority')
+ACTIVITY_FILTERS = ('project', 'action', 'entity_type', 'created_at__gte', 'created_at__lt')
+ACTIVITY_ORDERING = ('created_at',)
+INTEGER_FILTERS = {'project', 'assigned_to'}
+DATETIME_FILTERS = {'created_at__gte', 'created_at__lt'}
+CHOICE_FILTERS = {
+    'status': {value for value, _ in Bug.STATUS_CHOICES},
+    'priority': {value for value, _ in Bug.PRIORITY_CHOICES},
+}
+
+
+async def authenticate(request):
+    """Async counterpart of JWTAuthentication: returns the user or None"""
+    header = request.headers.get('Authorization', '').split()
+    if len(header) != 2 or header[0] not in api_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        token = JWTAuthentication().get_validated_token(header[1].encode())
+        user_id = token[api_settings.USER_ID_CLAIM]
+    except (InvalidToken, TokenError, KeyError):
+        return None
+
+    User = get_user_model()
+    try:
+        user = await User.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+    except User.DoesNotExist:
+        return None
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        return None
+    return user
+
+
+def async_api_view(view=None, *, throttle_scope=None):
+    """
+    GET-only async view that requires a valid JWT and applies the default
+    throttles, like the DRF defaults. ``throttle_scope`` is shared with the
+    mirrored viewset action, so both count against one limit.
+    """
+    if view is None:
+        return functools.partial(async_api_view, throttle_scope=throttle_scope)
+
+    @require_GET
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await authenticate(request)
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=401,
+                headers={'WWW-Authenticate': f'{api_settings.AUTH_HEADER_TYPES[0]} realm="api"'},
+            )
+        request.user = user
+        throttled = await athrottle(request, throttle_scope)
+        if throttled is not None:
+            headers = {'Retry-After': str(throttled.wait)} if throttled.wait is not None else None
+            return JsonResponse({'detail': throttled.detail}, status=throttled.status_code, headers=headers)
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def single_flight(request, endpoint, build):
+    """
+    Run ``build()`` once for overlapping identical requests (see
+    tracker/singleflight.py); each caller gets its own response object.
+    """
+    if not settings.TRACKER_SINGLE_FLIGHT:
+        return await build()
+    response = await flights.ado(request_key(request, endpoint), build)
+    return HttpResponse(response.content, status=response.status_code, content_type=response['Content-Type'])
+
+
+def apply_filters(queryset, params, fields):
+    """
+    Exact-match query param filters. Raises ValueError carrying the errors
+    django-filter would report for malformed ids and unknown choices.
+    """
+    errors = {}
+    for field in fields:
+        value = params.get(field)
+        if value in (None, ''):
+            continue
+        if field in INTEGER_FILTERS and not value.isdigit():
+            errors[field] = ['Select a valid choice. That choice is not one of the available choices.']
+            continue
+        if field in CHOICE_FILTERS and value not in CHOICE_FILTERS[field]:
+            errors[field] = [f'Select a valid choice. {value} is not one of the available choices.']
+            continue
+        if field in DATETIME_FILTERS:
+            # The form field django-filter's DateTimeFilter validates with
+            try:
+                value = forms.DateTimeField().clean(value)
+            except ValidationError as e:
+                errors[field] = e.messages
+                continue
+        queryset = queryset.filter(**{field: value})
+    if errors:
+        raise ValueError(errors)
+    return queryset
+
+
+def apply_ordering(queryset, params, fields):
+    """``?ordering=`` as OrderingFilter reads it: comma-separated, unknown terms ignored"""
+    terms = [term.strip() for term in params.get('ordering', '').split(',')]
+    terms = [term for term in terms if term.lstrip('-') in fields]
+    return queryset.order_by(*terms) if terms else queryset
+
+
+def invalid_filter(error):
+    return JsonResponse(error.args[0], status=400)
+
+
+async def paginate(request, queryset, serializer_class, extra=None):
+    """PageNumberPagination-shaped response built with the async ORM; extra keys are appended"""
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    count = await queryset.acount()
+    # As Django's Paginator: 'last', or a number from 1 to the last page (page 1 may be empty)
+    number = request.GET.get('page', '1')
+    last_page = max(math.ceil(count / page_size), 1)
+    try:
+        page = last_page if number == 'last' else int(number)
+    except ValueError:
+        page = 0
+    if not 1 <= page <= last_page:
+        return JsonResponse({'detail': 'Invalid page.'}, status=404)
+    offset = (page - 1) * page_size
+    items = [obj async for obj in queryset[offset:offset + page_size]]
+    # The serializer renders users from this map only, so it never touches the database
+    summaries = await auser_summaries(referenced_user_ids(serializer_class(), items))
+
+    def page_url(number):
+        params = request.GET.copy()
+        params['page'] = number
+        return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+    return JsonResponse({
+        'count': count,
+        'next': page_url(page + 1) if offset + page_size < count else None,
+        'previous': page_url(page - 1) if page > 1 else None,
+        'results': serializer_class(items, many=True, context={'user_summaries': summaries}).data,
+        **(extra or {}),
+    })
+
+
+@async_api_view(throttle_scope='bug_list')
+async def bug_list(request):
+    try:
+        bugs = apply_filters(visible_bugs(request.user), request.GET, BUG_FILTERS)
+    except ValueError as e:
+        return invalid_filter(e)
+
+    search = request.GET.get('search')
+    if search:
+        bugs = bugs.filter(Q(title__icontains=search) | Q(description__icontains=search))
+
+    bugs = apply_ordering(bugs, request.GET, BUG_ORDERING)
+
+    return await single_flight(request, 'bug_list', lambda: paginate(request, bugs, BugSerializer))
+
+
+@async_api_view
+async def bug_detail(request, pk):
+    bug = await visible_bugs(request.user).filter(pk=pk).afirst()
+    if bug is None:
+        return JsonResponse({'detail': 'No Bug matches the given query.'}, status=404)
+    summaries = await auser_summaries(referenced_user_ids(BugSerializer(), [bug]))
+    return JsonResponse(BugSerializer(bug, context={'user_summaries': summaries}).data)
+
+
+@async_api_view
+async def assigned_to_me(request):
+    try:
+        groups = parse_group_by(request.GET.get('group_by'))
+    except ValueError as e:
+        return JsonResponse({'group_by': [f'Unknown group "{e}".']}, status=400)
+    try:
+        bugs = apply_filters(assigned_bugs(request.user), request.GET, BUG_FILTERS)
+    except ValueError as e:
+        return invalid_filter(e)
+
+    extra = {}
+    if groups:
+        extra['groups'] = {group: [row async for row in group_counts(bugs, group)] for group in groups}
+    return await paginate(request, with_bug_details(bugs), BugSerializer, extra)
+
+
+@async_api_view
+async def bug_comments(request, pk):
+    if not await visible_bugs(request.user).filter(pk=pk).aexists():
+        return JsonResponse({'detail': 'No Bug matches the given query.'}, status=404)
+    comments = comment_thread(pk)
+
+    after = request.GET.get('after')
+    if after:
+        if not after.isdigit():
+            return JsonResponse({'after': ['A valid integer is required.']}, status=400)
+        anchor = await Comment.objects.filter(bug_id=pk, id=after).values_list('created_at', flat=True).afirst()
+        comments = comments_after(comments, int(after), anchor)
+    return await paginate(request, comments, CommentSerializer)
+
+
+@async_api_view(throttle_scope='activity_list')
+async def activity_log_list(request):
+    project_ids = await avisible_project_ids(request.user.id)
+    logs = ActivityLog.objects.filter(live_projects('project__'), project_id__in=project_ids)
+    try:
+        logs = apply_filters(logs, request.GET, ACTIVITY_FILTERS)
+    except ValueError as e:
+        return invalid_filter(e)
+    logs = apply_ordering(logs, request.GET, ACTIVITY_ORDERING)
+    return await single_flight(request, 'activity_list', lambda: paginate(request, logs, ActivityLogSerializer))
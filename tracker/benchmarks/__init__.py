@@ -0,0 +1,8 @@
+"""
+Self-contained benchmark suite for the REST and WebSocket paths.
+
+Run it with ``python manage.py run_benchmarks``. The command creates a
+throwaway test database, seeds it with ``seed.generate`` and runs each
+scenario against the in-memory channel layer, so no server or Redis is
+needed. Results are written as JSON and can be compared with a previous run.
+"""
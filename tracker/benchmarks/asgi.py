@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from django.test import AsyncClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .timing import summarize
+
+
+async def _drive(client, path, headers, concurrency, iterations):
+    """Run ``iterations`` GETs split across ``concurrency`` in-flight workers"""
+    latencies = []
+
+    async def worker(count):
+        for _ in range(count):
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            assert response.status_code == 200, f'{path} returned {response.status_code}'
+            latencies.append(time.perf_counter() - started)
+
+    per_worker, extra = divmod(iterations, concurrency)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(per_worker + (i < extra)) for i in range(concurrency)))
+    return latencies, time.perf_counter() - started
+
+
+async def run(data, concurrency=10, iterations=50):
+    """
+    Compare the sync DRF read endpoints with their /api/async/ versions.
+
+    Requests go through the full ASGI handler and middleware in one event
+    loop, like a single Daphne process, with ``concurrency`` requests in
+    flight. Sync views are funnelled through the thread-sensitive executor;
+    async views interleave on the loop.
+    """
+    user = data['users'][0]
+    project = data['projects'][0]
+    bug = next(b for b in data['bugs'] if b.project_id == project.id)
+    headers = {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+    client = AsyncClient()
+
+    scenarios = [
+        ('bugs.list', '/api/bugs/', '/api/async/bugs/'),
+        ('bugs.retrieve', f'/api/bugs/{bug.id}/', f'/api/async/bugs/{bug.id}/'),
+        ('bugs.assigned_to_me', '/api/bugs/assigned_to_me/', '/api/async/bugs/assigned_to_me/'),
+        ('comments.by_bug', f'/api/comments/?bug={bug.id}', f'/api/async/bugs/{bug.id}/comments/'),
+        ('activity_logs.list', '/api/activity_logs/', '/api/async/activity_logs/'),
+    ]
+
+    results = []
+    for name, sync_path, async_path in scenarios:
+        for kind, path in (('sync', sync_path), ('async', async_path)):
+            await client.get(path, headers=headers)  # warm caches and connections
+            latencies, elapsed = await _drive(client, path, headers, concurrency, iterations)
+            results.append(summarize(f'asgi.{kind}.{name}', latencies, elapsed, concurrency=concurrency))
+    return results
@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+
+from .timing import summarize
+
+
+# Project modules are reported one by one, everything else by top-level package
+PROJECT_PACKAGES = ('bugtracker', 'tracker')
+
+# What a Daphne worker does before it can answer: build the ASGI app, then
+# load the URLconf on the first request
+STARTUP = {
+    'setup': 'import django; django.setup()',
+    'asgi': 'import bugtracker.asgi',
+    'first_request': 'import bugtracker.asgi; from django.urls import get_resolver; get_resolver().url_patterns',
+}
+
+
+def parse_importtime(output):
+    """``(module, self_seconds, cumulative_seconds, depth)`` for each ``-X importtime`` line"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # the column header
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6, depth))
+    return rows
+
+
+def module_group(module):
+    top = module.split('.')[0]
+    if top in PROJECT_PACKAGES:
+        return '.'.join(module.split('.')[:2])
+    return top
+
+
+def profile_once(target):
+    """Import ``target`` in a fresh interpreter and return its parsed import times"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP[target]],
+        env=env, cwd=settings.BASE_DIR, capture_output=True, text=True,
+    )
+    rows = parse_importtime(completed.stderr)
+    if completed.returncode:
+        errors = '\n'.join(line for line in completed.stderr.splitlines() if not line.startswith('import time:'))
+        raise RuntimeError(f'{target} import failed:\n{errors[-2000:]}')
+    return rows
+
+
+def run(target='first_request', repeat=5):
+    """
+    Profile startup imports ``repeat`` times.
+
+    Returns result rows (``import.total`` and one per module group, self time
+    summed so nested imports are not counted twice) and the slowest modules
+    by cumulative time from the last run.
+    """
+    samples = defaultdict(list)
+    rows = []
+    for _ in range(repeat):
+        rows = profile_once(target)
+        groups = defaultdict(float)
+        for module, self_seconds, _, _ in rows:
+            groups[module_group(module)] += self_seconds
+        samples['import.total'].append(sum(groups.values()))
+        for group, seconds in groups.items():
+            samples[f'import.{group}'].append(seconds)
+
+    results = [summarize(name, values, target=target) for name, values in samples.items()]
+    results.sort(key=lambda row: row['p50_ms'], reverse=True)
+    slowest = sorted(rows, key=lambda row: row[2], reverse=True)
+    return results, slowest
@@ -0,0 +1,104 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+
+from .timing import summarize
+
+
+# Runs in a fresh interpreter per profile, since settings are fixed per process.
+# Prints one JSON document: startup phases in seconds and per-scenario latencies.
+PROBE = r'''
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+import bugtracker.asgi
+asgi_done = time.perf_counter()
+
+from django.test import Client
+client = Client()
+client.get('/api/bugs/')  # first request resolves the URLconf and imports the views
+first_request = time.perf_counter()
+
+scenarios = {
+    'api.json': ('/api/bugs/', {}),
+    'api.browser': ('/api/bugs/', {'HTTP_ACCEPT': 'text/html,application/xhtml+xml,*/*;q=0.8'}),
+    'web.admin_login': ('/admin/login/', {}),
+}
+iterations, warmup = int(sys.argv[1]), int(sys.argv[2])
+latencies = {}
+for name, (path, headers) in scenarios.items():
+    for _ in range(warmup):
+        client.get(path, **headers)
+    timings = []
+    for _ in range(iterations):
+        t = time.perf_counter()
+        client.get(path, **headers)
+        timings.append(time.perf_counter() - t)
+    latencies[name] = timings
+
+print(json.dumps({
+    'startup': {
+        'setup': setup_done - started,
+        'asgi_app': asgi_done - started,
+        'first_request': first_request - started,
+    },
+    'latencies': latencies,
+}))
+'''
+
+
+def _environment(profile):
+    env = dict(os.environ)
+    env['DJANGO_SETTINGS_MODULE'] = 'bugtracker.settings'
+    env['DJANGO_ENV'] = profile
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+    # The probe only needs values that let the prod profile load, not real secrets
+    env.setdefault('SECRET_KEY', 'benchmark-only-' + 'x' * 40)
+    env.setdefault('ALLOWED_HOSTS', 'testserver')
+    return env
+
+
+def _probe(profile, iterations, warmup):
+    """Run the probe once; returns (wall-clock seconds including interpreter start, probe output)"""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-c', PROBE, str(iterations), str(warmup)],
+        env=_environment(profile), cwd=settings.BASE_DIR, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if completed.returncode:
+        raise RuntimeError(f'{profile} probe failed:\n{completed.stderr[-2000:]}')
+    return elapsed, json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(profiles=('dev', 'prod'), startups=5, iterations=200, warmup=20):
+    """
+    Compare settings profiles: process start to a served first request, and
+    the per-request cost of middleware, renderers and DEBUG for a JSON API
+    call, a browser hitting the API and an admin page.
+
+    Every profile gets ``startups`` cold processes. The last one also times
+    ``iterations`` requests per scenario through the test client.
+    """
+    results = []
+    for profile in profiles:
+        phases = {'process': [], 'setup': [], 'asgi_app': [], 'first_request': []}
+        output = None
+        for index in range(startups):
+            count = iterations if index == startups - 1 else 0
+            elapsed, output = _probe(profile, count, warmup if count else 0)
+            phases['process'].append(elapsed)
+            for phase, seconds in output['startup'].items():
+                phases[phase].append(seconds)
+
+        for phase, samples in phases.items():
+            results.append(summarize(f'profile.{profile}.startup.{phase}', samples))
+        for name, latencies in output['latencies'].items():
+            results.append(summarize(f'profile.{profile}.request.{name}', latencies))
+    return results
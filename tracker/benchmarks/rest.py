@@ -0,0 +1,62 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .timing import measure
+
+
+def _scenarios(data):
+    user = data['users'][0]
+    project = data['projects'][0]
+    bug = next(b for b in data['bugs'] if b.project_id == project.id)
+    counter = {'n': 0}
+
+    def unique(prefix):
+        counter['n'] += 1
+        return f"{prefix} {counter['n']}"
+
+    return [
+        ('projects.list', 'get', '/api/projects/', None),
+        ('projects.retrieve', 'get', f'/api/projects/{project.id}/', None),
+        ('projects.create', 'post', '/api/projects/', lambda: {'name': unique('Project'), 'description': 'bench'}),
+        ('projects.partial_update', 'patch', f'/api/projects/{project.id}/', lambda: {'description': unique('Updated')}),
+        ('bugs.list', 'get', '/api/bugs/', None),
+        ('bugs.list_filtered', 'get', f'/api/bugs/?project={project.id}&status=Open', None),
+        ('bugs.retrieve', 'get', f'/api/bugs/{bug.id}/', None),
+        ('bugs.assigned_to_me', 'get', '/api/bugs/assigned_to_me/', None),
+        ('bugs.create', 'post', '/api/bugs/', lambda: {
+            'title': unique('Bug'), 'description': 'bench', 'project': project.id,
+        }),
+        ('bugs.partial_update', 'patch', f'/api/bugs/{bug.id}/', lambda: {'description': unique('Updated')}),
+        ('comments.list', 'get', f'/api/comments/?bug={bug.id}', None),
+        ('comments.create', 'post', '/api/comments/', lambda: {'bug': bug.id, 'message': unique('Comment')}),
+        ('activity_logs.list', 'get', '/api/activity_logs/', None),
+        ('activity_logs.list_project', 'get', f'/api/activity_logs/?project={project.id}', None),
+        ('notifications.list', 'get', '/api/notifications/', None),
+    ], user
+
+
+def run(data, iterations=50, warmup=5, only=None):
+    """Time each viewset action through the DRF test client as the main seeded user"""
+    scenarios, user = _scenarios(data)
+    client = APIClient()
+    client.force_authenticate(user)
+
+    results = []
+    for name, method, path, body in scenarios:
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+
+        def call():
+            response = getattr(client, method)(path, body() if body else None, format='json')
+            assert response.status_code < 400, f'{name} returned {response.status_code}'
+            return response
+
+        with CaptureQueriesContext(connection) as queries:
+            response = call()
+        results.append(measure(
+            f'rest.{name}', call, iterations, warmup,
+            queries_per_request=len(queries),
+            response_bytes=len(response.content),
+        ))
+    return results
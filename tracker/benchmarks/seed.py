@@ -0,0 +1,71 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from tracker.models import Project, Bug, Comment, ActivityLog
+
+
+DEFAULT_SCALE = {
+    'users': 20,
+    'projects': 10,
+    'bugs_per_project': 50,
+    'comments_per_bug': 3,
+    'activity_per_project': 200,
+}
+
+
+def generate(scale=None, seed=42):
+    """
+    Create a deterministic data set with ``bulk_create``.
+
+    The first user owns every other project and is assigned bugs across all
+    of them, so it sees a realistic mix of owned and assigned work. Returns a
+    dict with the created ``users``, ``projects`` and ``bugs``.
+    """
+    scale = {**DEFAULT_SCALE, **(scale or {})}
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    users = User.objects.bulk_create([
+        User(username=f'bench_user_{i}', email=f'bench_user_{i}@example.com',
+             first_name='Bench', last_name=str(i), password='!')
+        for i in range(scale['users'])
+    ])
+
+    projects = Project.objects.bulk_create([
+        Project(name=f'Benchmark project {i}', description='Seeded benchmark data',
+                owner=users[0] if i % 2 == 0 else rng.choice(users))
+        for i in range(scale['projects'])
+    ])
+
+    statuses = [choice for choice, _ in Bug.STATUS_CHOICES]
+    priorities = [choice for choice, _ in Bug.PRIORITY_CHOICES]
+    bugs = Bug.objects.bulk_create([
+        Bug(title=f'Bug {p}-{i}', description='Seeded benchmark bug',
+            status=rng.choice(statuses), priority=rng.choice(priorities),
+            project=project, created_by=rng.choice(users),
+            assigned_to=rng.choice(users + [None]))
+        for p, project in enumerate(projects)
+        for i in range(scale['bugs_per_project'])
+    ], batch_size=1000)
+
+    Comment.objects.bulk_create([
+        Comment(bug=bug, commenter=rng.choice(users), message=f'Seeded comment {i} on {bug.title}')
+        for bug in bugs
+        for i in range(scale['comments_per_bug'])
+    ], batch_size=1000)
+
+    activities = ActivityLog.objects.bulk_create([
+        ActivityLog(project=project, user=rng.choice(users), action=rng.choice(['created', 'updated', 'commented']),
+                    entity_type='bug', entity_id=rng.randint(1, max(1, len(bugs))), details={'seeded': True})
+        for project in projects
+        for _ in range(scale['activity_per_project'])
+    ], batch_size=1000)
+    # Spread activity over the last year so date-range queries have something to prune
+    for activity in activities:
+        activity.created_at = now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+    ActivityLog.objects.bulk_update(activities, ['created_at'], batch_size=1000)
+
+    return {'scale': scale, 'seed': seed, 'users': users, 'projects': projects, 'bugs': bugs}
@@ -0,0 +1,57 @@
+import statistics
+import time
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(name, latencies, elapsed=None, **extra):
+    """Turn a list of per-operation latencies (seconds) into a result row"""
+    latencies = sorted(latencies)
+    elapsed = elapsed if elapsed is not None else sum(latencies)
+    result = {
+        'name': name,
+        'operations': len(latencies),
+        'ops_per_second': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3) if latencies else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+    }
+    result.update(extra)
+    return result
+
+
+def measure(name, operation, iterations, warmup=0, **extra):
+    """Call ``operation()`` repeatedly and summarize its latency"""
+    for _ in range(warmup):
+        operation()
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - started)
+    return summarize(name, latencies, **extra)
+
+
+def compare(current, baseline, threshold):
+    """
+    Compare two result documents by scenario name.
+
+    Returns ``(name, baseline_p50, current_p50, change)`` for every scenario
+    whose p50 latency grew by more than ``threshold`` (e.g. 0.1 for 10%).
+    """
+    previous = {row['name']: row for row in baseline.get('results', [])}
+    regressions = []
+    for row in current['results']:
+        before = previous.get(row['name'])
+        if not before or not before.get('p50_ms') or row.get('p50_ms') is None:
+            continue
+        change = (row['p50_ms'] - before['p50_ms']) / before['p50_ms']
+        if change > threshold:
+            regressions.append((row['name'], before['p50_ms'], row['p50_ms'], change))
+    return regressions
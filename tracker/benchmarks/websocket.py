@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+
+from tracker.middleware import WebSocketAuthMiddlewareStack
+from tracker.routing import websocket_urlpatterns
+
+from .timing import summarize
+
+
+@database_sync_to_async
+def _session_key(user):
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return session.session_key
+
+
+async def _connect(application, project_id, session_key):
+    communicator = WebsocketCommunicator(application, f'/ws/project/{project_id}/?session_key={session_key}')
+    connected, _ = await communicator.connect()
+    assert connected, f'WebSocket connection to project {project_id} was rejected'
+    await communicator.receive_json_from()  # connection_established
+    return communicator
+
+
+async def run(data, connections=50, messages=50):
+    """
+    Measure connect rate and group fan-out latency through ``ProjectConsumer``.
+
+    Sockets go through the same session middleware and URL router as
+    production. Fan-out latency is the time from ``group_send`` until the
+    last socket in the room has received the message.
+    """
+    application = WebSocketAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+    user = data['users'][0]
+    project = data['projects'][0]
+    session_key = await _session_key(user)
+    results = []
+
+    communicators = []
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(connections):
+        connect_started = time.perf_counter()
+        communicators.append(await _connect(application, project.id, session_key))
+        latencies.append(time.perf_counter() - connect_started)
+    results.append(summarize('ws.connect', latencies, time.perf_counter() - started))
+
+    channel_layer = get_channel_layer()
+    event = {
+        'type': 'bug_notification',
+        'event_type': 'bug_updated',
+        'bug': {'id': data['bugs'][0].id, 'title': data['bugs'][0].title, 'status': 'Open'},
+        'user': user.username,
+    }
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(messages):
+        send_started = time.perf_counter()
+        await channel_layer.group_send(f'project_{project.id}', event)
+        await asyncio.gather(*(c.receive_json_from(timeout=5) for c in communicators))
+        latencies.append(time.perf_counter() - send_started)
+    results.append(summarize('ws.fanout', latencies, time.perf_counter() - started, sockets=connections))
+
+    latencies = []
+    started = time.perf_counter()
+    for communicator in communicators:
+        disconnect_started = time.perf_counter()
+        await communicator.disconnect()
+        latencies.append(time.perf_counter() - disconnect_started)
+    results.append(summarize('ws.disconnect', latencies, time.perf_counter() - started))
+
+    return results
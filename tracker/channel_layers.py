@@ -0,0 +1,106 @@
+import asyncio
+import logging
+
+from channels.exceptions import ChannelFull
+from channels.layers import InMemoryChannelLayer
+from channels_redis.core import RedisChannelLayer
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# The record channels_redis 4.3 (pinned in requirements.txt) logs from
+# RedisChannelLayer.group_send; ChannelLayerDropMetricTests checks it against
+# the installed version.
+OVER_CAPACITY_MESSAGE = '%s of %s channels over capacity in group %s'
+
+
+class _RedisOverCapacityFilter(logging.Filter):
+    """
+    Count group_send drops reported by channels_redis.
+
+    RedisChannelLayer.group_send drops messages for full channels inside a Lua
+    script and only reports the number through an INFO log record, so the
+    overflow metric is read from that record. ``level`` is the level the
+    logger was configured with: records are counted whatever it is, but only
+    passed on to the handlers at or above it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.level = logging.NOTSET
+
+    def filter(self, record):
+        if record.msg == OVER_CAPACITY_MESSAGE and record.name == 'channels_redis.core':
+            dropped, _, group = record.args
+            metrics.channel_messages_dropped.inc(dropped, kind='group_send', group=metrics.group_kind(group))
+        return record.levelno >= self.level
+
+
+_redis_filter = _RedisOverCapacityFilter()
+
+
+def watch_redis_drops():
+    """
+    Hook the filter onto channels_redis's logger. When logging is configured
+    above INFO the logger is lowered to INFO so the records are still created,
+    and the filter keeps the configured level for what reaches the handlers.
+    """
+    core = logging.getLogger('channels_redis.core')
+    if _redis_filter not in core.filters:
+        core.addFilter(_redis_filter)
+    if not core.isEnabledFor(logging.INFO):
+        _redis_filter.level = core.getEffectiveLevel()
+        core.setLevel(logging.INFO)
+
+
+class MeteredRedisChannelLayer(RedisChannelLayer):
+    """Redis channel layer (sharded across all configured hosts) with drop metrics"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Logging is configured by now, so the level seen here is the final one
+        watch_redis_drops()
+
+    async def send(self, channel, message):
+        try:
+            await super().send(channel, message)
+        except ChannelFull:
+            metrics.channel_messages_dropped.inc(kind='send', group='')
+            raise
+
+
+class MeteredInMemoryChannelLayer(InMemoryChannelLayer):
+    """
+    In-process stand-in for the Redis layer with the same drop metrics.
+
+    Used for tests and single-process development; it does not work across
+    worker processes.
+    """
+
+    async def send(self, channel, message):
+        try:
+            await super().send(channel, message)
+        except ChannelFull:
+            metrics.channel_messages_dropped.inc(kind='send', group='')
+            raise
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), 'Message is not a dict'
+        self.require_valid_group_name(group)
+        self._clean_expired()
+
+        channels = list(self.groups.get(group, {}))
+        results = await asyncio.gather(
+            *(InMemoryChannelLayer.send(self, channel, message) for channel in channels),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception) and not isinstance(result, ChannelFull):
+                raise result
+        dropped = sum(isinstance(result, ChannelFull) for result in results)
+        if dropped:
+            metrics.channel_messages_dropped.inc(dropped, kind='group_send', group=metrics.group_kind(group))
+            logger.info(f'{dropped} of {len(channels)} channels over capacity in group {group}')
+
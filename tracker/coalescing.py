@@ -0,0 +1,238 @@
+"""
+Per-bug coalescing of update notifications.
+
+A triage pass can PATCH the same bug several times a second. Instead of one
+``bug_updated``/``bug_status_changed`` broadcast per request, the first update
+opens a window of ``TRACKER_BUG_COALESCE_SECONDS``. Further updates by the same
+user fold into it, and when it closes a single event goes out carrying the
+bug's final state and the fields that changed across the window. The window is
+fixed from the first update, so a stream of edits never delays delivery by
+more than one window.
+
+Windows live in the process that handled the request. Edits of one bug that
+land on different workers are coalesced per worker. One scheduler thread per
+process closes windows as they come due.
+"""
+import asyncio
+import atexit
+import concurrent.futures
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .notifications import agroup_send, group_send
+
+
+logger = logging.getLogger(__name__)
+
+# Fields compared across a window to build ``changed_fields``
+BUG_EDIT_FIELDS = ('title', 'description', 'status', 'priority', 'assigned_to_id', 'project_id')
+
+
+def bug_edit_state(bug):
+    return {field: getattr(bug, field) for field in BUG_EDIT_FIELDS}
+
+
+class BugUpdateWindow:
+    """Updates to one bug by one user, merged until the window closes"""
+
+    __slots__ = (
+        'bug_id', 'user_id', 'username', 'initial', 'final', 'project_id', 'bug_data', 'updates',
+        'activity_id', 'activity_writing', 'activity_stale', 'deadline',
+    )
+
+    def __init__(self, bug_id, user, initial):
+        self.bug_id = bug_id
+        self.user_id = user.id
+        self.username = user.username
+        self.initial = initial
+        self.final = initial
+        self.project_id = None
+        self.bug_data = None
+        self.updates = 0
+        self.activity_id = None  # ActivityLog row later updates in this window are folded into
+        self.activity_writing = False  # a request is writing that row
+        self.activity_stale = False  # the row lags behind the window
+        self.deadline = None  # time.monotonic() at which the window closes; None sends at once
+
+    def changed_fields(self):
+        """API field names whose value differs between the window's first and last state"""
+        return [field.removesuffix('_id') for field in BUG_EDIT_FIELDS if self.initial[field] != self.final[field]]
+
+    def event(self):
+        data = {
+            'type': 'bug_notification',
+            'event_type': 'bug_updated',
+            'bug': self.bug_data,
+            'user': self.username,
+            'changed_fields': self.changed_fields(),
+            'updates': self.updates,
+        }
+        if self.initial['status'] != self.final['status']:
+            data.update({
+                'event_type': 'bug_status_changed',
+                'old_status': self.initial['status'],
+                'new_status': self.final['status'],
+            })
+        return data
+
+
+class BugUpdateCoalescer:
+    """Open windows by bug id, closed by one scheduler thread when they come due"""
+
+    def __init__(self):
+        self._windows = {}
+        self._due = []  # heap of (deadline, sequence, bug_id, window)
+        self._sequence = itertools.count()
+        self._lock = threading.Condition(threading.Lock())
+        self._scheduler = None
+
+    def record(self, bug, user, before, after, bug_data):
+        """Fold one saved update into the bug's open window and return the window"""
+        seconds = settings.TRACKER_BUG_COALESCE_SECONDS
+        interrupted = None
+        with self._lock:
+            window = self._windows.get(bug.id)
+            if window is not None and window.user_id != user.id:
+                # Another user's edits are reported under their own name
+                interrupted = self._windows.pop(bug.id)
+                window = None
+            if window is None:
+                window = BugUpdateWindow(bug.id, user, before)
+                if seconds > 0:
+                    window.deadline = time.monotonic() + seconds
+                    heapq.heappush(self._due, (window.deadline, next(self._sequence), bug.id, window))
+                    self._windows[bug.id] = window
+                    self._start_scheduler()
+                    self._lock.notify()
+            window.final = after
+            window.project_id = bug.project_id
+            window.bug_data = bug_data
+            window.updates += 1
+
+        if interrupted is not None:
+            self._send(interrupted)
+        if window.deadline is None:
+            self._send(window)
+        return window
+
+    def fold_activity(self, window, write):
+        """
+        Bring the window's ActivityLog entry up to date with
+        ``write(activity_id, state, changed_fields, updates)``, which returns
+        the entry's id. Writes run outside the lock and one at a time per
+        window: a request arriving during a write only marks the entry stale,
+        and the writing request writes again with the newest state. Overlapping
+        requests so create a single entry and never leave an older count in it.
+        """
+        with self._lock:
+            window.activity_stale = True
+            if window.activity_writing:
+                return
+            window.activity_writing = True
+        try:
+            while True:
+                with self._lock:
+                    if not window.activity_stale:
+                        window.activity_writing = False
+                        return
+                    window.activity_stale = False
+                    args = (window.activity_id, window.final, window.changed_fields(), window.updates)
+                activity_id = write(*args)
+                with self._lock:
+                    window.activity_id = activity_id
+        except BaseException:
+            with self._lock:
+                window.activity_writing = False
+            raise
+
+    def flush(self, bug_id, window=None):
+        """Send the bug's pending event now; ``window`` guards against flushing a newer one"""
+        with self._lock:
+            current = self._windows.get(bug_id)
+            if current is None or (window is not None and current is not window):
+                return
+            del self._windows[bug_id]
+        self._send(current)
+
+    def take_all(self):
+        """Remove and return every pending window without sending it"""
+        with self._lock:
+            windows = list(self._windows.values())
+            self._windows.clear()
+        return windows
+
+    def flush_all(self):
+        for bug_id in list(self._windows):
+            self.flush(bug_id)
+
+    def discard(self, bug_id):
+        """Drop a pending event without sending it, e.g. when the bug is deleted"""
+        with self._lock:
+            self._windows.pop(bug_id, None)
+
+    def _start_scheduler(self):
+        # Called with the lock held
+        if self._scheduler is None:
+            self._scheduler = threading.Thread(target=self._run, name='tracker-bug-coalescing', daemon=True)
+            self._scheduler.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._due or self._due[0][0] > time.monotonic():
+                    self._lock.wait(self._due[0][0] - time.monotonic() if self._due else None)
+                _, _, bug_id, window = heapq.heappop(self._due)
+            # Windows already flushed, discarded or interrupted are skipped here
+            self.flush(bug_id, window)
+
+    def _send(self, window):
+        try:
+            group_send(f"project_{window.project_id}", window.event())
+        except Exception:
+            logger.exception(f"Failed to send coalesced update for bug {window.bug_id}")
+
+
+bug_updates = BugUpdateCoalescer()
+
+class _InlineExecutor(concurrent.futures.ThreadPoolExecutor):
+    """Runs submitted calls at once in the calling thread; it never starts a worker"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def flush_at_exit():
+    """
+    atexit hook: deliver the windows still pending when the worker shuts down.
+
+    By the time atexit hooks run, concurrent.futures refuses new work, so
+    neither async_to_sync nor an event loop's default executor can be used.
+    The events are sent on a private loop whose blocking calls (DNS lookups
+    when connecting to Redis) run inline.
+    """
+    windows = bug_updates.take_all()
+    if not windows:
+        return
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(_InlineExecutor())
+    try:
+        for window in windows:
+            try:
+                loop.run_until_complete(agroup_send(f"project_{window.project_id}", window.event()))
+            except Exception:
+                logger.exception(f"Failed to send coalesced update for bug {window.bug_id}")
+    finally:
+        loop.close()
+
+
+atexit.register(flush_at_exit)
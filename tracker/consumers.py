@@ -1,8 +1,16 @@
+import asyncio
 import json
 import logging
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from . import metrics
+from .access import accessible_project_ids, has_project_access
+from .notifications import agroup_send
 
 
 
@@ -157,45 +165,37 @@ from django.contrib.auth.models import AnonymousUser
 
 logger = logging.getLogger(__name__)
 
+HEARTBEAT_MESSAGE = json.dumps({'type': 'heartbeat'})
+
+_timestamp = (None, None)
+
+
+def current_timestamp():
+    """Local time in ISO 8601 to the second, formatted at most once a second per process"""
+    global _timestamp
+    second = int(time.time())
+    if _timestamp[0] != second:
+        _timestamp = (second, datetime.fromtimestamp(second).isoformat())
+    return _timestamp[1]
+
 class ProjectConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         logger.info("=== WebSocket connection attempt ===")
         
         self.project_id = self.scope['url_route']['kwargs']['project_id']
         self.project_group_name = f'project_{self.project_id}'
-        self.user = self.scope.get("user")
-        
+
         logger.info(f"Project ID: {self.project_id}")
-        logger.info(f"User: {self.user}")
-        logger.info(f"User type: {type(self.user)}")
-        logger.info(f"User authenticated: {self.user.is_authenticated if hasattr(self.user, 'is_authenticated') else 'No auth method'}")
-        
-        
-        # Check authentication
-        if not self.user or isinstance(self.user, AnonymousUser) or not self.user.is_authenticated:
-            logger.warning(" User not authenticated")
-            
-            
-            # Try to get user from session
-            session = self.scope.get("session", {})
-            user_id = session.get("_auth_user_id")
-            
-            if user_id:
-                logger.info(f"Found user ID in session: {user_id}")
-                try:
-                    from django.contrib.auth.models import User
-                    self.user = await database_sync_to_async(User.objects.get)(id=user_id)
-                    logger.info(f" Retrieved user from session: {self.user.username}")
-                except User.DoesNotExist:
-                    logger.warning(" User from session not found")
-                    await self.close(code=4001)
-                    return
-            else:
-                logger.warning(" No user in session")
-                await self.close(code=4001)
-                return
-            
-        
+
+        if not await self.authenticate():
+            return
+
+        if not await self.user_has_project_access():
+            logger.warning(f" User {self.user.username} has no access to project {self.project_id}")
+            await self.close(code=4003)
+            return
+
+
         # Accept connection
         await self.accept()
         logger.info(f" User {self.user.username} authenticated")
@@ -216,6 +216,9 @@ class ProjectConsumer(AsyncWebsocketConsumer):
         )
         
         logger.info(f" User {self.user.username} joined groups: {self.project_group_name}, {self.user_group_name}")
+        metrics.ws_connections.inc()
+        metrics.ws_room_size.inc(project=self.project_id)
+        self.counted_in_metrics = True
         
         
         # Send welcome message
@@ -224,16 +227,67 @@ class ProjectConsumer(AsyncWebsocketConsumer):
             'message': f'Connected to project {self.project_id}',
             'user': self.user.username,
             'project_id': self.project_id,
-            'timestamp': str(self._get_current_time())
+            'timestamp': current_timestamp()
         }))
         
         logger.info(" Welcome message sent")
-        
-        
-    
+        self.start_outbox()
+        self.start_heartbeat()
+
+
+
+    async def authenticate(self):
+        """Resolve self.user from the scope or the session; closes with 4001 on failure"""
+        self.user = self.scope.get("user")
+
+        logger.info(f"User: {self.user}")
+        logger.info(f"User type: {type(self.user)}")
+        logger.info(f"User authenticated: {self.user.is_authenticated if hasattr(self.user, 'is_authenticated') else 'No auth method'}")
+
+
+        # Check authentication
+        if not self.user or isinstance(self.user, AnonymousUser) or not self.user.is_authenticated:
+            logger.warning(" User not authenticated")
+
+
+            # Try to get user from session
+            session = self.scope.get("session", {})
+            user_id = session.get("_auth_user_id")
+
+            if user_id:
+                logger.info(f"Found user ID in session: {user_id}")
+                try:
+                    from django.contrib.auth.models import User
+                    self.user = await database_sync_to_async(User.objects.get)(id=user_id)
+                    logger.info(f" Retrieved user from session: {self.user.username}")
+                except User.DoesNotExist:
+                    logger.warning(" User from session not found")
+                    await self.close(code=4001)
+                    return False
+            else:
+                logger.warning(" No user in session")
+                await self.close(code=4001)
+                return False
+
+        return True
+
+
+
     async def disconnect(self, close_code):
         logger.info(f"=== WebSocket disconnected: {close_code} ===")
+
+        if getattr(self, 'counted_in_metrics', False):
+            metrics.ws_connections.dec()
+            metrics.ws_room_size.dec(project=self.project_id)
+            self.counted_in_metrics = False
+
+        self.stop_outbox()
+        self.stop_heartbeat()
         
+        await self.leave_groups()
+    
+    
+    async def leave_groups(self):
         # Leave project group
         if hasattr(self, 'project_group_name'):
             await self.channel_layer.group_discard(
@@ -241,6 +295,7 @@ class ProjectConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
             logger.info(f"Left project group: {self.project_group_name}")
+            del self.project_group_name
         
         # Leave user group
         if hasattr(self, 'user_group_name'):
@@ -249,12 +304,16 @@ class ProjectConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
             logger.info(f"Left user group: {self.user_group_name}")
+            del self.user_group_name
             
             
             
     
     async def receive(self, text_data):
-        logger.info(f"Received message: {text_data}")
+        # Any client frame counts as proof of life for the idle reaper
+        self.last_seen = time.monotonic()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received message: %s", text_data)
         
         try:
             text_data_json = json.loads(text_data)
@@ -265,22 +324,34 @@ class ProjectConsumer(AsyncWebsocketConsumer):
                     'type': 'pong',
                     'timestamp': text_data_json.get('timestamp'),
                     'user': self.user.username,
-                    'server_time': str(self._get_current_time())
+                    'server_time': current_timestamp()
                 }))
-                logger.info(" Pong sent")
+            
+            elif message_type == 'pong':
+                # Reply to a server heartbeat, last_seen is already updated
+                pass
+            
+            elif message_type == 'ack':
+                if not self.handle_ack(text_data_json.get('seq')):
+                    await self.send(text_data=json.dumps({
+                        'type': 'error',
+                        'message': 'ack needs the integer seq of a message already received'
+                    }))
             
             elif message_type == 'typing_indicator':
                 # Handle typing indicator
-                await self.channel_layer.group_send(
+                await agroup_send(
                     self.project_group_name,
                     {
                         'type': 'typing_notification',
                         'user': self.user.username,
                         'is_typing': text_data_json.get('is_typing', False),
                         'bug_id': text_data_json.get('bug_id'),
-                    }
+                        'project_id': self.project_id,
+                    },
+                    self.channel_layer
                 )
-                logger.info(f" Typing indicator sent: {text_data_json.get('is_typing')}")
+                logger.info(" Typing indicator sent: %s", text_data_json.get('is_typing'))
             
             else:
                 logger.warning(f"Unknown message type: {message_type}")
@@ -307,76 +378,501 @@ class ProjectConsumer(AsyncWebsocketConsumer):
     
     # Message handlers for notifications
     async def bug_notification(self, event):
-        logger.info(f"Sending bug notification: {event.get('event_type')}")
-        await self.send(text_data=json.dumps({
+        logger.info("Sending bug notification: %s", event.get('event_type'))
+        # Successive updates to one bug only need to deliver its latest state
+        coalesce_key = None
+        if event['event_type'] != 'bug_created':
+            coalesce_key = ('bug', event.get('bug', {}).get('id'))
+        message = {
             'type': 'bug_notification',
             'event_type': event['event_type'],
             'bug': event.get('bug', {}),
             'user': event['user'],
-            'timestamp': str(self._get_current_time())
-        }))
+            'timestamp': current_timestamp()
+        }
+        # Coalesced updates carry what changed across the window
+        for key in ('changed_fields', 'updates', 'old_status', 'new_status'):
+            if key in event:
+                message[key] = event[key]
+        await self.send_event(event, message, coalesce_key)
         
         
     
     async def comment_notification(self, event):
-        logger.info(f"Sending comment notification from {event.get('user')}")
-        await self.send(text_data=json.dumps({
+        logger.info("Sending comment notification from %s", event.get('user'))
+        await self.send_event(event, {
             'type': 'comment_notification',
             'comment': event.get('comment', {}),
             'bug': event.get('bug', {}),
             'user': event['user'],
-            'timestamp': str(self._get_current_time())
-        }))
+            'timestamp': current_timestamp()
+        })
         
         
     
     async def personal_notification(self, event):
-        logger.info(f"Sending personal notification: {event.get('notification_type')}")
-        await self.send(text_data=json.dumps({
+        logger.info("Sending personal notification: %s", event.get('notification_type'))
+        await self.send_event(event, {
             'type': 'personal_notification',
             'notification_type': event['notification_type'],
+            'notification_id': event.get('notification_id'),
             'comment': event.get('comment'),
             'bug': event.get('bug'),
             'commenter': event.get('commenter'),
-            'timestamp': str(self._get_current_time())
-        }))
+            'timestamp': current_timestamp()
+        })
         
         
     
     async def typing_notification(self, event):
         # Don't send typing indicator to the sender
         if event['user'] != self.user.username:
-            await self.send(text_data=json.dumps({
+            await self.send_event(event, {
                 'type': 'typing_indicator',
                 'user': event['user'],
                 'is_typing': event['is_typing'],
                 'bug_id': event.get('bug_id'),
-                'timestamp': str(self._get_current_time())
-            }))
-            logger.info(f"Sent typing indicator for {event['user']}")
+                'project_id': event.get('project_id'),
+                'timestamp': current_timestamp()
+            }, ('typing', event['user'], event.get('bug_id')))
+            logger.info("Queued typing indicator for %s", event['user'])
             
             
     
-    def _get_current_time(self):
-        """Get current timestamp"""
-        from datetime import datetime
-        return datetime.now().isoformat()
+    async def access_revoked(self, event):
+        if str(event['project_id']) != str(self.project_id):
+            return
+        logger.warning(f"Access to project {self.project_id} revoked for {self.user.username}")
+        # Stop receiving and drop anything already queued for this project
+        await self.leave_groups()
+        self.stop_outbox()
+        await self.send(text_data=json.dumps({
+            'type': 'access_revoked',
+            'project_id': event['project_id'],
+            'message': 'You no longer have access to this project',
+            'timestamp': current_timestamp()
+        }))
+        await self.close(code=4003)
+            
+            
+    
+    # Outbound queue
+    #
+    # Group handlers only queue messages; a writer task drains the queue to the
+    # socket, so the consumer keeps pulling from the channel layer while a
+    # client is behind. Under Daphne self.send() never blocks: it hands the
+    # frame to the transport, which buffers whatever the peer has not read.
+    # The server cannot see that buffer, so the client reports progress
+    # instead. Every queued message carries a "seq" and clients acknowledge
+    # with {"type": "ack", "seq": N}. The writer keeps at most
+    # TRACKER_WS_ACK_WINDOW messages unacknowledged and the rest wait here,
+    # bounded, coalesced and subject to the lag limit. A client that never acks
+    # gets one window and is then treated like any other stalled reader;
+    # TRACKER_WS_ACK_WINDOW=0 turns the window off for clients that cannot ack.
+    
+    def start_outbox(self):
+        self.outbox = OrderedDict()
+        self.outbox_seq = 0
+        self.outbox_ready = asyncio.Event()
+        self.sent_seq = 0
+        self.acked_seq = 0
+        self.unacked = deque()  # (seq, monotonic time written)
+        self.ack_received = asyncio.Event()
+        self.writer_task = asyncio.ensure_future(self.drain_outbox())
     
     
+    def stop_outbox(self):
+        writer_task = getattr(self, 'writer_task', None)
+        if writer_task and writer_task is not asyncio.current_task():
+            writer_task.cancel()
+        self.writer_task = None
+        self.outbox = None
+    
+    
+    async def send_event(self, event, payload, coalesce_key=None):
+        """
+        Queue one group event for the writer task.
+
+        Events with the same ``coalesce_key`` replace the queued one in place
+        (latest bug state, last typing state). When the queue is full, queued
+        typing indicators are dropped first; if nothing can be dropped, or the
+        oldest message has waited longer than TRACKER_WS_MAX_LAG_SECONDS, the
+        client is told to resync and disconnected.
+        """
+        if getattr(self, 'outbox', None) is None:
+            return
+        
+        now = time.monotonic()
+        if coalesce_key is not None and coalesce_key in self.outbox:
+            queued_at = self.outbox[coalesce_key][2]
+            self.outbox[coalesce_key] = (event, payload, queued_at)
+            metrics.ws_outbox_coalesced.inc(type=payload['type'])
+            return
+        
+        if self.outbox:
+            oldest = next(iter(self.outbox.values()))[2]
+            if now - oldest > settings.TRACKER_WS_MAX_LAG_SECONDS:
+                await self.disconnect_slow_client(f'{now - oldest:.1f}s behind')
+                return
+        
+        if len(self.outbox) >= settings.TRACKER_WS_OUTBOX_SIZE and not self.drop_queued_typing():
+            await self.disconnect_slow_client(f'{len(self.outbox)} messages queued')
+            return
+        
+        if coalesce_key is None:
+            self.outbox_seq += 1
+            coalesce_key = ('seq', self.outbox_seq)
+        self.outbox[coalesce_key] = (event, payload, now)
+        metrics.ws_outbox_depth.observe(len(self.outbox))
+        self.outbox_ready.set()
+    
+    
+    def drop_queued_typing(self):
+        for key in self.outbox:
+            if key[0] == 'typing':
+                del self.outbox[key]
+                metrics.ws_outbox_dropped.inc(type='typing_indicator')
+                return True
+        return False
+    
+    
+    async def disconnect_slow_client(self, reason):
+        logger.warning(f"Disconnecting slow client {self.user.username} on {self.channel_name}: {reason}")
+        metrics.ws_slow_disconnects.inc()
+        metrics.ws_outbox_dropped.inc(len(self.outbox), type='disconnect')
+        self.stop_outbox()
+        await self.send(text_data=json.dumps({
+            'type': 'resync_required',
+            'message': 'Too many pending updates, reload current state and reconnect',
+            'timestamp': current_timestamp()
+        }))
+        await self.close(code=4008)
+    
+    
+    async def drain_outbox(self):
+        while True:
+            await self.outbox_ready.wait()
+            while self.outbox:
+                if not await self.wait_for_ack_window():
+                    return
+                _, (event, payload, _) = self.outbox.popitem(last=False)
+                await self.write_event(event, payload)
+            self.outbox_ready.clear()
+    
+    
+    async def wait_for_ack_window(self):
+        """
+        Hold the writer while the client has a full window of unacknowledged
+        messages. A client that acks nothing for TRACKER_WS_MAX_LAG_SECONDS
+        after the oldest of them was written is disconnected; returns False then.
+        """
+        window = settings.TRACKER_WS_ACK_WINDOW
+        while window > 0 and len(self.unacked) >= window:
+            waited = time.monotonic() - self.unacked[0][1]
+            remaining = settings.TRACKER_WS_MAX_LAG_SECONDS - waited
+            if remaining <= 0:
+                await self.disconnect_slow_client(
+                    f'{len(self.unacked)} messages unacknowledged for {waited:.1f}s'
+                )
+                return False
+            self.ack_received.clear()
+            try:
+                await asyncio.wait_for(self.ack_received.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        return True
+    
+    
+    def handle_ack(self, seq):
+        """Record the client's cumulative ack of every message up to ``seq``"""
+        if not isinstance(seq, int) or isinstance(seq, bool) or seq > self.sent_seq:
+            return False
+        if getattr(self, 'outbox', None) is None:
+            return True
+        self.acked_seq = max(self.acked_seq, seq)
+        now = time.monotonic()
+        slowest = 0
+        while self.unacked and self.unacked[0][0] <= self.acked_seq:
+            _, written_at = self.unacked.popleft()
+            metrics.ws_ack_latency.observe(now - written_at)
+            if now - written_at > settings.TRACKER_WS_SLOW_SEND_SECONDS:
+                metrics.ws_slow_sends.inc()
+            slowest = max(slowest, now - written_at)
+        if slowest > settings.TRACKER_WS_SLOW_SEND_SECONDS:
+            logger.warning(f"Slow reader: {self.user.username} on {self.channel_name} acked after {slowest * 1000:.1f}ms")
+        self.ack_received.set()
+        return True
+    
+    
+    async def write_event(self, event, payload):
+        """Write one group event to the socket and record delivery metrics"""
+        self.sent_seq += 1
+        payload['seq'] = self.sent_seq
+        if settings.TRACKER_WS_ACK_WINDOW > 0:
+            self.unacked.append((self.sent_seq, time.monotonic()))
+        await self.send(text_data=json.dumps(payload))
+
+        metrics.ws_messages_sent.inc(type=payload['type'])
+        sent_at = event.get('sent_at')
+        if sent_at:
+            metrics.ws_fanout_latency.observe(time.time() - sent_at, type=event['type'])
+    
+    
+    
+    # Heartbeats
+    #
+    # Daphne already sends protocol-level WebSocket pings (--ping-interval /
+    # --ping-timeout) and drops connections whose TCP peer is gone. The
+    # application heartbeat catches the rest: clients that stay connected but
+    # stop responding. Every client frame (including "pong" replies to
+    # "heartbeat") refreshes last_seen; connections idle for longer than
+    # TRACKER_WS_IDLE_TIMEOUT_SECONDS leave their groups and are closed.
+    
+    def start_heartbeat(self):
+        self.last_seen = time.monotonic()
+        self.heartbeat_task = None
+        if settings.TRACKER_WS_HEARTBEAT_SECONDS > 0:
+            self.heartbeat_task = asyncio.ensure_future(self.heartbeat_loop())
+    
+    
+    def stop_heartbeat(self):
+        heartbeat_task = getattr(self, 'heartbeat_task', None)
+        if heartbeat_task and heartbeat_task is not asyncio.current_task():
+            heartbeat_task.cancel()
+        self.heartbeat_task = None
+    
+    
+    async def heartbeat_loop(self):
+        interval = settings.TRACKER_WS_HEARTBEAT_SECONDS
+        idle_timeout = settings.TRACKER_WS_IDLE_TIMEOUT_SECONDS
+        while True:
+            await asyncio.sleep(interval)
+            idle = time.monotonic() - self.last_seen
+            if idle > idle_timeout:
+                await self.reap_idle_connection(idle)
+                return
+            await self.send(text_data=HEARTBEAT_MESSAGE)
+            metrics.ws_heartbeats_sent.inc()
+    
+    
+    async def reap_idle_connection(self, idle):
+        logger.warning(f"Reaping idle connection {self.channel_name} ({self.user.username}, idle {idle:.0f}s)")
+        metrics.ws_reaped.inc()
+        # Leave groups right away: a dead peer may never produce websocket.disconnect
+        await self.leave_groups()
+        self.stop_outbox()
+        await self.close(code=4002)
+    
     
     
     @database_sync_to_async
     def user_has_project_access(self):
-        """Check if user has access to the project"""
+        """Check if user has access to the project (cached, one query on a miss)"""
+        return has_project_access(self.user.id, self.project_id)
+
+
+
+
+
+class StreamConsumer(ProjectConsumer):
+    """
+    One socket for several projects (``ws/stream/``).
+
+    Clients send ``{"type": "subscribe", "project_ids": [...]}`` and
+    ``{"type": "unsubscribe", "project_ids": [...]}``. Access for a whole
+    subscribe request is checked in one query, and the personal user group is
+    joined once per connection, so inbox notifications arrive once however
+    many projects are watched. Group handlers, the outbound queue and
+    heartbeats are shared with ``ProjectConsumer``.
+    """
+
+    async def connect(self):
+        logger.info("=== Stream connection attempt ===")
+
+        if not await self.authenticate():
+            return
+
+        await self.accept()
+        self.project_ids = set()
+
+        # Join personal user group once for the whole connection
+        self.user_group_name = f'user_{self.user.id}'
+        await self.channel_layer.group_add(
+            self.user_group_name,
+            self.channel_name
+        )
+
+        logger.info(f" User {self.user.username} opened a stream")
+        metrics.ws_connections.inc()
+        self.counted_in_metrics = True
+
+        await self.send(text_data=json.dumps({
+            'type': 'connection_established',
+            'message': 'Connected to stream',
+            'user': self.user.username,
+            'project_ids': [],
+            'timestamp': current_timestamp()
+        }))
+
+        self.start_outbox()
+        self.start_heartbeat()
+
+
+
+    async def disconnect(self, close_code):
+        logger.info(f"=== Stream disconnected: {close_code} ===")
+
+        if getattr(self, 'counted_in_metrics', False):
+            metrics.ws_connections.dec()
+            self.counted_in_metrics = False
+
+        self.stop_outbox()
+        self.stop_heartbeat()
+
+        await self.leave_groups()
+
+
+
+    async def leave_groups(self):
+        await self.unsubscribe(set(getattr(self, 'project_ids', ())))
+        await super().leave_groups()
+
+
+
+    async def receive(self, text_data):
         try:
-            from .models import Project
-            project = Project.objects.get(id=self.project_id)
-            return (
-                project.owner == self.user or 
-                project.bugs.filter(assigned_to=self.user).exists() or
-                project.bugs.filter(created_by=self.user).exists()
-            )
-        except:
-            return False
+            text_data_json = json.loads(text_data)
+            message_type = text_data_json.get('type')
+        except (json.JSONDecodeError, AttributeError):
+            message_type = None
+
+        if message_type not in ('subscribe', 'unsubscribe', 'typing_indicator'):
+            # ping, pong and error replies behave as on a project socket
+            await super().receive(text_data)
+            return
 
+        self.last_seen = time.monotonic()
+        try:
+            if message_type == 'typing_indicator':
+                await self.send_typing(text_data_json)
+                return
+
+            project_ids = self.parse_project_ids(text_data_json.get('project_ids'))
+            if project_ids is None:
+                await self.send(text_data=json.dumps({
+                    'type': 'error',
+                    'message': 'project_ids must be a list of project ids'
+                }))
+                return
+
+            if message_type == 'subscribe':
+                await self.subscribe(project_ids)
+            else:
+                await self.unsubscribe(project_ids)
+                await self.send(text_data=json.dumps({
+                    'type': 'unsubscribed',
+                    'project_ids': sorted(project_ids),
+                    'subscriptions': sorted(self.project_ids),
+                }))
 
+        except Exception as e:
+            logger.error(f" Unexpected error: {e}")
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': 'Server error occurred'
+            }))
+
+
+
+    def parse_project_ids(self, value):
+        """Return the requested ids as a set of ints, or None if malformed"""
+        if not isinstance(value, list):
+            return None
+        try:
+            return {int(project_id) for project_id in value}
+        except (TypeError, ValueError):
+            return None
+
+
+
+    async def subscribe(self, project_ids):
+        requested = project_ids - self.project_ids
+        room_left = settings.TRACKER_WS_MAX_SUBSCRIPTIONS - len(self.project_ids)
+        if len(requested) > room_left:
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': f'At most {settings.TRACKER_WS_MAX_SUBSCRIPTIONS} projects per stream'
+            }))
+            return
+
+        allowed = await self.accessible_project_ids(requested) if requested else set()
+        for project_id in allowed:
+            await self.channel_layer.group_add(f'project_{project_id}', self.channel_name)
+            metrics.ws_room_size.inc(project=str(project_id))
+        self.project_ids |= allowed
+
+        logger.info(f" User {self.user.username} subscribed to {sorted(allowed)}")
+        await self.send(text_data=json.dumps({
+            'type': 'subscribed',
+            'project_ids': sorted(allowed),
+            'denied': sorted(requested - allowed),
+            'subscriptions': sorted(self.project_ids),
+        }))
+
+
+
+    async def unsubscribe(self, project_ids):
+        for project_id in project_ids & self.project_ids:
+            await self.channel_layer.group_discard(f'project_{project_id}', self.channel_name)
+            metrics.ws_room_size.dec(project=str(project_id))
+            self.project_ids.discard(project_id)
+
+
+
+    async def send_typing(self, text_data_json):
+        try:
+            project_id = int(text_data_json.get('project_id'))
+        except (TypeError, ValueError):
+            project_id = None
+
+        if project_id not in self.project_ids:
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': 'Subscribe to the project before sending typing indicators'
+            }))
+            return
+
+        await agroup_send(
+            f'project_{project_id}',
+            {
+                'type': 'typing_notification',
+                'user': self.user.username,
+                'is_typing': text_data_json.get('is_typing', False),
+                'bug_id': text_data_json.get('bug_id'),
+                'project_id': project_id,
+            },
+            self.channel_layer
+        )
+
+
+
+    @database_sync_to_async
+    def accessible_project_ids(self, project_ids):
+        """The subset of project_ids this user may watch, cache misses resolved in one query"""
+        return accessible_project_ids(self.user.id, project_ids)
+
+
+
+    async def access_revoked(self, event):
+        project_id = int(event['project_id'])
+        if project_id not in self.project_ids:
+            return
+        logger.warning(f"Access to project {project_id} revoked for {self.user.username} on stream")
+        await self.unsubscribe({project_id})
+        await self.send(text_data=json.dumps({
+            'type': 'access_revoked',
+            'project_id': project_id,
+            'message': 'You no longer have access to this project',
+            'subscriptions': sorted(self.project_ids),
+            'timestamp': current_timestamp()
+        }))
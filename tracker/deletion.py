@@ -0,0 +1,246 @@
+"""
+Soft delete of projects and bugs, with the hard delete run in the background.
+
+A cascading ``delete()`` makes Django collect every related row in Python
+before it deletes anything. For a project with a long history that blocks a
+worker for minutes and holds write locks the whole time. Instead, a DELETE
+request only stamps ``deleted_at``, which every read path filters on (see
+``querysets.live_projects`` / ``live_bugs``). It then drops the cached access
+decisions and queues a DeletionJob.
+
+Jobs are run by ``manage.py process_deletions`` and, when
+TRACKER_DELETION_IN_PROCESS is on, by a thread in the web process. Rows are
+removed child tables first, in batches of raw DELETEs that each commit on
+their own. Progress is saved on the job after every batch. Every step is
+idempotent, so a job that failed or whose worker died is simply run again.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .access import invalidate_owned_projects, invalidate_visible_projects, revoke_lost_access
+from .analytics import apply_bug_change, bug_state
+from .models import (
+    ActivityLog,
+    AssigneeRollup,
+    Bug,
+    Comment,
+    DailyResolutionRollup,
+    DeletionJob,
+    Notification,
+    PriorityRollup,
+    Project,
+)
+
+
+logger = logging.getLogger(__name__)
+
+ROOT_MODELS = {'project': Project, 'bug': Bug}
+
+
+def _forget_members(pairs, owner_id=None):
+    """Cached project lists and access decisions that counted these memberships"""
+    if owner_id:
+        invalidate_owned_projects({owner_id})
+    invalidate_visible_projects({user_id for user_id, _ in pairs})
+    revoke_lost_access(pairs)
+
+
+def _existing_job(entity_type, entity_id):
+    """The job queued by the DELETE that got there first, or None if it is already gone"""
+    return DeletionJob.objects.filter(entity_type=entity_type, entity_id=entity_id).order_by('-created_at', '-id').first()
+
+
+def _queue(entity_type, entity_id, user):
+    job = DeletionJob.objects.create(entity_type=entity_type, entity_id=entity_id, requested_by=user)
+    if settings.TRACKER_DELETION_IN_PROCESS:
+        transaction.on_commit(start_background_deletion)
+    return job
+
+
+@transaction.atomic
+def soft_delete_project(project, user):
+    """
+    Hide a project with its bugs, comments and activity; returns the queued
+    DeletionJob. If a concurrent request already deleted it, returns that
+    request's job (None once it has finished).
+    """
+    # Only one request stamps the row, so only one job is queued
+    if not Project.objects.filter(id=project.id, deleted_at__isnull=True).update(deleted_at=timezone.now()):
+        return _existing_job('project', project.id)
+
+    members = {(project.owner_id, project.id)}
+    for created_by_id, assigned_to_id in Bug.objects.filter(project_id=project.id).values_list(
+        'created_by_id', 'assigned_to_id',
+    ).distinct():
+        members |= {(created_by_id, project.id), (assigned_to_id, project.id)}
+
+    # After commit, so no request can cache the project as visible again in between
+    transaction.on_commit(partial(_forget_members, members, project.owner_id))
+    return _queue('project', project.id, user)
+
+
+@transaction.atomic
+def soft_delete_bug(bug, user):
+    """
+    Hide a bug and its comments, and take it out of the rollups; returns the
+    queued DeletionJob, or as soft_delete_project the one of a concurrent request.
+    """
+    # The rollups are only adjusted by the request that stamps the row
+    if not Bug.objects.filter(id=bug.id, deleted_at__isnull=True).update(deleted_at=timezone.now()):
+        return _existing_job('bug', bug.id)
+    apply_bug_change(bug_state(bug), None)
+    members = {(bug.created_by_id, bug.project_id), (bug.assigned_to_id, bug.project_id)}
+    transaction.on_commit(partial(_forget_members, members))
+    return _queue('bug', bug.id, user)
+
+
+def deletion_plan(job):
+    """``(step, queryset)`` in the order rows must go; the soft-deleted row itself comes last"""
+    if job.entity_type == 'project':
+        project_id = job.entity_id
+        return [
+            ('notification', Notification.objects.filter(project_id=project_id)),
+            ('comment', Comment.objects.filter(bug__project_id=project_id)),
+            ('activity_log', ActivityLog.objects.filter(project_id=project_id)),
+            ('priority_rollup', PriorityRollup.objects.filter(project_id=project_id)),
+            ('resolution_rollup', DailyResolutionRollup.objects.filter(project_id=project_id)),
+            ('assignee_rollup', AssigneeRollup.objects.filter(project_id=project_id)),
+            ('bug', Bug.objects.filter(project_id=project_id)),
+        ]
+    return [
+        ('notification', Notification.objects.filter(bug_id=job.entity_id)),
+        ('comment', Comment.objects.filter(bug_id=job.entity_id)),
+    ]
+
+
+def delete_batch(queryset, batch_size):
+    """Delete up to ``batch_size`` rows of ``queryset`` with one DELETE; returns the number removed"""
+    ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return 0
+    # A plain DELETE: no collecting, no signals, no cascade. The plan has already
+    # emptied every table that points at these rows.
+    connection = connections[queryset.db]
+    opts = queryset.model._meta
+    table, pk = connection.ops.quote_name(opts.db_table), connection.ops.quote_name(opts.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {pk} IN ({', '.join(['%s'] * len(ids))})", ids)
+        return cursor.rowcount
+
+
+def _save_progress(job, *fields):
+    job.save(update_fields=[*fields, 'updated_at'])
+
+
+def run_job(job, batch_size=None, pause=None):
+    """Hard-delete everything a claimed job covers, saving progress after each batch"""
+    batch_size = batch_size or settings.TRACKER_DELETION_BATCH_SIZE
+    pause = settings.TRACKER_DELETION_PAUSE_SECONDS if pause is None else pause
+    root = ROOT_MODELS[job.entity_type]._base_manager.filter(id=job.entity_id)
+    if root.filter(deleted_at__isnull=True).exists():
+        raise ValueError(f"{job.entity_type} {job.entity_id} is not soft-deleted")
+
+    for step, queryset in deletion_plan(job):
+        job.step = step
+        _save_progress(job, 'step')
+        while True:
+            removed = delete_batch(queryset, batch_size)
+            if not removed:
+                break
+            job.deleted_counts[step] = job.deleted_counts.get(step, 0) + removed
+            _save_progress(job, 'deleted_counts')
+            if removed < batch_size:
+                break
+            if pause:
+                time.sleep(pause)  # let other writers take the locks
+
+    # The row itself goes through the ORM, which also sweeps up anything
+    # written by a request that loaded it just before the soft delete
+    job.step = job.entity_type
+    removed, _ = root.filter(deleted_at__isnull=False).delete()
+    job.deleted_counts[job.entity_type] = job.deleted_counts.get(job.entity_type, 0) + removed
+    job.status = 'done'
+    job.step = ''
+    job.finished_at = timezone.now()
+    _save_progress(job, 'step', 'deleted_counts', 'status', 'finished_at')
+
+
+def claim_next_job():
+    """
+    Take the oldest job that is pending, failed with attempts left, or
+    running without progress for TRACKER_DELETION_STALE_SECONDS. The claim
+    compares status and updated_at, so two workers never take the same job.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.TRACKER_DELETION_STALE_SECONDS)
+    candidates = DeletionJob.objects.filter(
+        Q(status='pending') |
+        Q(status='failed', attempts__lt=settings.TRACKER_DELETION_MAX_ATTEMPTS) |
+        Q(status='running', updated_at__lt=stale_before)
+    ).order_by('created_at', 'id')
+    for job in candidates[:10]:
+        claimed = DeletionJob.objects.filter(id=job.id, status=job.status, updated_at=job.updated_at).update(
+            status='running', attempts=F('attempts') + 1, error='', updated_at=timezone.now(),
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run_pending(batch_size=None, pause=None, on_finish=None):
+    """Run claimable jobs until none is left; returns how many were claimed"""
+    count = 0
+    while True:
+        job = claim_next_job()
+        if job is None:
+            return count
+        count += 1
+        try:
+            run_job(job, batch_size, pause)
+        except Exception as e:
+            logger.exception(f"Deletion job {job.id} ({job.entity_type} {job.entity_id}) failed")
+            job.status = 'failed'
+            job.error = str(e)
+            _save_progress(job, 'status', 'error')
+        if on_finish:
+            on_finish(job)
+
+
+# In-process worker: at most one thread per process, woken by new jobs
+_worker = None
+_worker_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def start_background_deletion():
+    global _worker
+    with _worker_lock:
+        _wakeup.set()
+        if _worker is None:
+            _worker = threading.Thread(target=_work, name='tracker-deletions', daemon=True)
+            _worker.start()
+
+
+def _work():
+    global _worker
+    try:
+        while True:
+            _wakeup.clear()
+            try:
+                run_pending()
+            except Exception:
+                logger.exception("Background deletion worker failed")
+            with _worker_lock:
+                if not _wakeup.is_set():
+                    _worker = None
+                    return
+    finally:
+        connections.close_all()
@@ -0,0 +1,51 @@
+import contextvars
+import time
+
+
+# Stats for the request being handled, set by RequestInstrumentationMiddleware.
+# None when instrumentation is off, which keeps the serializer hook to one lookup.
+current_stats = contextvars.ContextVar('tracker_request_stats', default=None)
+
+
+class RequestStats:
+    """Per-request counters filled in by the query wrapper and serializer hook"""
+
+    __slots__ = ('view', 'queries', 'db_time', 'serialize_time', 'serialize_depth')
+
+    def __init__(self):
+        self.view = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.serialize_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook timing every SQL statement"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+class InstrumentedSerializerMixin:
+    """
+    Add serializer time to the current request's stats.
+
+    Only the outermost ``to_representation`` call is timed, so nested and
+    per-item calls inside a list are not counted twice.
+    """
+
+    def to_representation(self, instance):
+        stats = current_stats.get()
+        if stats is None or stats.serialize_depth:
+            return super().to_representation(instance)
+
+        stats.serialize_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serialize_time += time.perf_counter() - started
+            stats.serialize_depth -= 1
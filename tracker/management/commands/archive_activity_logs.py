@@ -0,0 +1,196 @@
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from tracker.models import ActivityLog
+
+
+ARCHIVE_FIELDS = ['id', 'project_id', 'user_id', 'action', 'entity_type', 'entity_id', 'details', 'created_at']
+
+ARCHIVE_DATABASE = 'activity_archive.sqlite3'
+
+
+def month_start(dt):
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(dt):
+    return month_start(dt + timedelta(days=32))
+
+
+def month_rows(month, batch_size):
+    """Yield the month's rows as dicts in id order, one keyset page at a time"""
+    last_id = 0
+    while True:
+        rows = list(month.filter(id__gt=last_id).order_by('id').values(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1]['id']
+
+
+def fsync_directory(path):
+    """Make a rename in ``path`` durable (POSIX only)"""
+    if os.name != 'posix':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class GzipArchive:
+    """One ``activity_YYYY-MM.jsonl.gz`` per month"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+
+    def location(self, start):
+        return os.path.join(self.output_dir, f'activity_{start:%Y-%m}.jsonl.gz')
+
+    def write(self, start, rows):
+        """
+        Write the month to a temp file next to the archive, fsync it and
+        rename it over the archive. The rename is the commit point: until
+        it happens the previous archive is untouched. Returns the ids written.
+        """
+        path = self.location(start)
+        fd, temp_path = tempfile.mkstemp(prefix=f'.activity_{start:%Y-%m}.', suffix='.tmp', dir=self.output_dir)
+        ids = []
+        try:
+            with os.fdopen(fd, 'wb') as raw:
+                if os.path.exists(path):
+                    # A month archived before: keep its members, gzip readers concatenate them
+                    with open(path, 'rb') as existing:
+                        shutil.copyfileobj(existing, raw)
+                with gzip.open(raw, 'wt', encoding='utf-8') as f:
+                    for row in rows:
+                        f.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                        ids.append(row['id'])
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        fsync_directory(self.output_dir)
+        return ids
+
+
+class SQLiteArchive:
+    """
+    One table per month (``activity_YYYY_MM``) in ``activity_archive.sqlite3``,
+    so archived rows stay queryable with plain SQL. Rows are keyed by id, so
+    archiving a month again after an interrupted run does not duplicate them.
+    """
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, ARCHIVE_DATABASE)
+
+    def location(self, start):
+        return f'{self.path}:{self.table(start)}'
+
+    def table(self, start):
+        return f'activity_{start:%Y_%m}'
+
+    def write(self, start, rows):
+        table = self.table(start)
+        ids = []
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.execute('PRAGMA synchronous = FULL')
+            with connection:
+                connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} ('
+                    'id INTEGER PRIMARY KEY, project_id INTEGER, user_id INTEGER, action TEXT, '
+                    'entity_type TEXT, entity_id INTEGER, details TEXT, created_at TEXT)'
+                )
+                for row in rows:
+                    connection.execute(
+                        f'INSERT OR REPLACE INTO {table} ({", ".join(ARCHIVE_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        [
+                            *(row[field] for field in ARCHIVE_FIELDS[:6]),
+                            json.dumps(row['details'], cls=DjangoJSONEncoder),
+                            row['created_at'].isoformat(),
+                        ],
+                    )
+                    ids.append(row['id'])
+            # Leaving the block committed the month
+        finally:
+            connection.close()
+        return ids
+
+
+ARCHIVE_FORMATS = {'gzip': GzipArchive, 'sqlite': SQLiteArchive}
+
+
+class Command(BaseCommand):
+    """
+    Move activity older than the retention window into monthly archives.
+
+    Each month is written in full and made durable before any of its rows
+    are deleted: a gzip JSONL file is fsynced and renamed into place, or
+    a per-month table in an SQLite archive database is committed. A run that
+    dies part way leaves the month in the database, and re-running it is safe.
+    """
+
+    help = 'Archive and delete ActivityLog rows older than the retention window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ACTIVITY_LOG_RETENTION_DAYS,
+                            help='Keep this many days of activity in the database')
+        parser.add_argument('--output-dir', default=settings.ACTIVITY_LOG_ARCHIVE_DIR)
+        parser.add_argument('--format', choices=sorted(ARCHIVE_FORMATS), default=settings.ACTIVITY_LOG_ARCHIVE_FORMAT,
+                            help='gzip: activity_YYYY-MM.jsonl.gz files; sqlite: monthly tables in '
+                                 f'{ARCHIVE_DATABASE}')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many rows each month would archive')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be positive')
+
+        cutoff = month_start(timezone.now() - timedelta(days=options['days']))
+        oldest = ActivityLog.objects.filter(created_at__lt=cutoff).order_by('created_at').first()
+        if oldest is None:
+            self.stdout.write('Nothing to archive')
+            return
+
+        archive = None
+        if not options['dry_run']:
+            os.makedirs(options['output_dir'], exist_ok=True)
+            archive = ARCHIVE_FORMATS[options['format']](options['output_dir'])
+        total = 0
+        start = month_start(oldest.created_at)
+        while start < cutoff:
+            end = next_month(start)
+            month = ActivityLog.objects.filter(created_at__gte=start, created_at__lt=end)
+            if options['dry_run']:
+                self.stdout.write(f"{start:%Y-%m}: {month.count()} rows")
+            elif month.exists():
+                archived = self._archive_month(archive, start, month, options['batch_size'])
+                total += archived
+                self.stdout.write(f'{start:%Y-%m}: archived {archived} rows to {archive.location(start)}')
+            start = end
+
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Archived {total} rows older than {cutoff:%Y-%m-%d}'))
+
+    def _archive_month(self, archive, start, month, batch_size):
+        ids = archive.write(start, month_rows(month, batch_size))
+        # Only rows that made it into the archive are deleted. Nothing
+        # references ActivityLog, so each batch is a single DELETE.
+        for offset in range(0, len(ids), batch_size):
+            ActivityLog.objects.filter(id__in=ids[offset:offset + batch_size]).delete()
+        return len(ids)
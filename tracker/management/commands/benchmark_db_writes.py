@@ -0,0 +1,102 @@
+import json
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction, OperationalError
+
+from tracker.models import Project, Bug, ActivityLog
+
+
+class Command(BaseCommand):
+    """
+    Measure concurrent write throughput of the configured database profile.
+
+    Every worker thread repeats the write pattern of ``BugViewSet.perform_update``:
+    update a bug and insert an ``ActivityLog`` row in one transaction. Run it
+    once per profile (e.g. ``DB_ENGINE=sqlite`` with and without
+    ``DB_SQLITE_TUNING``, then ``DB_ENGINE=postgres``) and compare the output.
+    """
+
+    help = 'Benchmark concurrent bug updates and activity inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--writes', type=int, default=200,
+                            help='Writes per thread')
+        parser.add_argument('--json', action='store_true',
+                            help='Print results as JSON')
+
+    def handle(self, *args, **options):
+        threads, writes = options['threads'], options['writes']
+
+        user = User.objects.create_user(f'benchmark-{time.time_ns()}')
+        project = Project.objects.create(name='DB write benchmark', description='', owner=user)
+        bugs = [
+            Bug.objects.create(title=f'Benchmark bug {i}', description='', project=project, created_by=user)
+            for i in range(threads)
+        ]
+
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(bug):
+            local_latencies, local_errors = [], 0
+            try:
+                for i in range(writes):
+                    started = time.perf_counter()
+                    try:
+                        with transaction.atomic():
+                            Bug.objects.filter(pk=bug.pk).update(
+                                status=Bug.STATUS_CHOICES[i % len(Bug.STATUS_CHOICES)][0]
+                            )
+                            ActivityLog.objects.create(
+                                project=project, user=user, action='updated',
+                                entity_type='bug', entity_id=bug.pk, details={'i': i},
+                            )
+                    except OperationalError:
+                        local_errors += 1
+                        continue
+                    local_latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(local_latencies)
+                errors.append(local_errors)
+
+        workers = [threading.Thread(target=worker, args=(bug,)) for bug in bugs]
+        started = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        project.delete()
+        user.delete()
+
+        db = settings.DATABASES['default']
+        latencies.sort()
+        results = {
+            'engine': db['ENGINE'],
+            'options': {k: v for k, v in db.get('OPTIONS', {}).items() if k != 'pool'},
+            'pooled': 'pool' in db.get('OPTIONS', {}),
+            'conn_max_age': db.get('CONN_MAX_AGE', 0),
+            'threads': threads,
+            'writes': len(latencies),
+            'errors': sum(errors),
+            'seconds': round(elapsed, 3),
+            'writes_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0,
+            'p50_ms': round(statistics.median(latencies) * 1000, 2) if latencies else None,
+            'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2) if latencies else None,
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+            return
+        for key, value in results.items():
+            self.stdout.write(f'{key:>18}: {value}')
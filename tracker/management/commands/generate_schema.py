@@ -0,0 +1,34 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bugtracker.schema import SCHEMA_FORMATS, encode_schema
+
+
+class Command(BaseCommand):
+    """
+    Write the OpenAPI documents served at /swagger.json/ and /swagger.yaml/.
+
+    Run it as a build or deploy step. Workers with ``TRACKER_SCHEMA_DIR``
+    pointing at the output read these files instead of introspecting every
+    viewset on their first schema request.
+    """
+
+    help = 'Generate swagger.json and swagger.yaml for TRACKER_SCHEMA_DIR'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default=settings.TRACKER_SCHEMA_DIR or str(settings.BASE_DIR / 'schema'),
+                            help='Directory to write to (default: TRACKER_SCHEMA_DIR, else ./schema)')
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+        for suffix in SCHEMA_FORMATS:
+            body = encode_schema(suffix)
+            path = os.path.join(output_dir, f'swagger{suffix}')
+            with open(path, 'wb') as f:
+                f.write(body)
+            self.stdout.write(f'{path}: {len(body)} bytes, sha256 {hashlib.sha256(body).hexdigest()[:12]}')
+        self.stdout.write(self.style.SUCCESS(f'Schema written to {output_dir}'))
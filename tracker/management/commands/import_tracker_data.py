@@ -0,0 +1,336 @@
+import json
+import os
+import time
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from tracker.access import invalidate_project_access, invalidate_visible_projects
+from tracker.analytics import add_bugs
+from tracker.models import Project, Bug, Comment, ActivityLog
+from tracker.querysets import live_bugs, live_projects
+
+
+def row_id(value):
+    """An integer key from the file, or None for a missing or malformed one"""
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+class Command(BaseCommand):
+    """
+    Stream bugs and comments from a JSONL export into the tracker.
+
+    Each line is one JSON object with a ``type`` of ``bug`` or ``comment``:
+
+        {"type": "bug", "id": 10, "project": 1, "title": "...", "description": "...",
+         "status": "Open", "priority": "High", "created_by": 2, "assigned_to": 3}
+        {"type": "comment", "bug": 10, "commenter": 3, "message": "..."}
+
+    Resolved bugs may carry ``resolved_at`` (ISO 8601, local time when naive);
+    without it they count as resolved at the time of the import.
+
+    ``id`` is optional and keeps the source tracker's primary keys so comments
+    can reference bugs imported earlier in the same file. After a chunk with
+    explicit ids the table's sequence is moved past them (Postgres), so rows
+    created later through the API do not collide.
+
+    Invalid rows are reported on stderr and skipped: wrong types, unknown
+    foreign keys, ids that already exist, and anything the database rejects.
+
+    Rows are validated and written in chunks with ``bulk_create``, so the
+    per-row work done by ``BugViewSet`` / ``CommentViewSet`` (serializer pass,
+    WebSocket notification, activity insert) is skipped. Each committed chunk
+    writes one summary ``ActivityLog`` per project and advances the checkpoint,
+    so an interrupted import can continue with ``--resume``.
+    """
+
+    help = 'Bulk import bugs and comments from a JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSONL file to import')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Rows validated and inserted per transaction')
+        parser.add_argument('--checkpoint',
+                            help='Checkpoint file (default: <path>.checkpoint)')
+        parser.add_argument('--resume', action='store_true',
+                            help='Continue from the last committed checkpoint')
+        parser.add_argument('--max-errors', type=int, default=100,
+                            help='Abort after this many invalid rows')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        chunk_size = options['chunk_size']
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        offset, line_no = 0, 0
+        if options['resume'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                checkpoint = json.load(f)
+            # The offset is only meaningful in the file it was taken from
+            if os.path.realpath(checkpoint['path']) != os.path.realpath(path):
+                raise CommandError(f"Checkpoint {checkpoint_path} belongs to {checkpoint['path']}, not {path}")
+            offset, line_no = checkpoint['offset'], checkpoint['line']
+            self.stdout.write(f'Resuming at line {line_no} (byte {offset})')
+
+        self.errors = 0
+        self.now = timezone.now()
+        self.max_errors = options['max_errors']
+        totals = {'bugs': 0, 'comments': 0}
+        started = time.monotonic()
+        chunk_no = 0
+
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            while True:
+                chunk = []
+                for raw in iter(f.readline, b''):
+                    line_no += 1
+                    offset += len(raw)
+                    if raw.strip():
+                        chunk.append((line_no, raw))
+                    if len(chunk) >= chunk_size:
+                        break
+                if not chunk:
+                    break
+
+                chunk_no += 1
+                bugs, comments = self._import_chunk(chunk, chunk_no)
+                totals['bugs'] += bugs
+                totals['comments'] += comments
+                self._write_checkpoint(checkpoint_path, path, offset, line_no)
+
+                elapsed = time.monotonic() - started
+                rows = totals['bugs'] + totals['comments']
+                self.stdout.write(
+                    f'Chunk {chunk_no}: line {line_no}, {rows} rows imported '
+                    f'({rows / elapsed:.0f} rows/s)'
+                )
+
+        elapsed = time.monotonic() - started
+        rows = totals['bugs'] + totals['comments']
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {totals['bugs']} bugs and {totals['comments']} comments "
+            f"in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s), "
+            f'{self.errors} rows skipped'
+        ))
+
+    def _import_chunk(self, chunk, chunk_no):
+        """Validate one chunk and insert it in a single transaction"""
+        bug_rows, comment_rows = [], []
+        for line_no, raw in chunk:
+            try:
+                row = json.loads(raw)
+            except json.JSONDecodeError as e:
+                self._reject(line_no, f'invalid JSON: {e}')
+                continue
+            if not isinstance(row, dict):
+                self._reject(line_no, 'row is not an object')
+            elif row.get('type') == 'bug':
+                bug_rows.append((line_no, row))
+            elif row.get('type') == 'comment':
+                comment_rows.append((line_no, row))
+            else:
+                self._reject(line_no, f"unknown type: {row.get('type')!r}")
+
+        # Resolve every foreign key referenced by the chunk up front
+        user_ids = set()
+        project_ids = set()
+        for _, row in bug_rows:
+            user_ids.update(filter(None, [row_id(row.get('created_by')), row_id(row.get('assigned_to'))]))
+            project_ids.add(row_id(row.get('project')))
+        for _, row in comment_rows:
+            user_ids.add(row_id(row.get('commenter')))
+        known_users = set(User.objects.filter(id__in=user_ids - {None}).values_list('id', flat=True))
+        # Projects and bugs queued for deletion take no new rows
+        project_owners = dict(
+            Project.objects.filter(live_projects(), id__in=project_ids - {None}).values_list('id', 'owner_id')
+        )
+
+        new_bugs = self._build_all(bug_rows, Bug, self._build_bug, known_users, project_owners)
+
+        with transaction.atomic():
+            bugs = [bug for _, bug in self._insert(Bug, new_bugs)]
+            add_bugs(bugs)
+
+            bug_ids = {row_id(row.get('bug')) for _, row in comment_rows} - {None}
+            bug_projects = dict(Bug.objects.filter(live_bugs(), id__in=bug_ids).values_list('id', 'project_id'))
+            missing = set(bug_projects.values()) - set(project_owners)
+            project_owners.update(Project.objects.filter(id__in=missing).values_list('id', 'owner_id'))
+
+            new_comments = self._build_all(comment_rows, Comment, self._build_comment, known_users, bug_projects)
+            comments = [comment for _, comment in self._insert(Comment, new_comments)]
+
+            # One summary entry per project instead of one per imported row
+            counts = defaultdict(lambda: {'bugs': 0, 'comments': 0})
+            for bug in bugs:
+                counts[bug.project_id]['bugs'] += 1
+            for comment in comments:
+                counts[bug_projects[comment.bug_id]]['comments'] += 1
+            ActivityLog.objects.bulk_create([
+                ActivityLog(
+                    project_id=project_id,
+                    user_id=project_owners[project_id],
+                    action='imported',
+                    entity_type='project',
+                    entity_id=project_id,
+                    details={'chunk': chunk_no, **count},
+                )
+                for project_id, count in counts.items()
+            ])
+
+        # bulk_create skips the model signals, so drop cached "no access" answers here
+        invalidate_project_access(
+            {(bug.created_by_id, bug.project_id) for bug in bugs}
+            | {(bug.assigned_to_id, bug.project_id) for bug in bugs}
+        )
+        invalidate_visible_projects({bug.assigned_to_id for bug in bugs})
+        return len(bugs), len(comments)
+
+    def _build_all(self, rows, model, build, *lookups):
+        """
+        Build ``(line_no, instance)`` for each valid row. Explicit ids must be
+        integers that are neither in the table nor repeated within the chunk.
+        """
+        explicit = {row_id(row.get('id')) for _, row in rows} - {None}
+        taken = self._taken_ids(model, explicit)
+        built = []
+        for line_no, row in rows:
+            if row.get('id') is not None:
+                pk = row_id(row.get('id'))
+                if pk is None:
+                    self._reject(line_no, f"invalid id {row.get('id')!r}")
+                    continue
+                if pk in taken:
+                    self._reject(line_no, f'{model.__name__.lower()} {pk} already exists')
+                    continue
+            try:
+                instance = build(line_no, row, *lookups)
+            except (TypeError, ValueError) as e:
+                instance = self._reject(line_no, f'invalid value: {e}')
+            if instance:
+                taken.add(instance.pk)
+                built.append((line_no, instance))
+        return built
+
+    def _taken_ids(self, model, ids):
+        return set(model.objects.filter(id__in=ids).values_list('id', flat=True))
+
+    def _insert(self, model, rows):
+        """
+        bulk_create ``(line_no, instance)`` rows. If the database rejects the
+        batch (an id or foreign key taken or removed since validation), insert
+        row by row in savepoints and reject only the rows that fail.
+        """
+        instances = [instance for _, instance in rows]
+        source_ids = [instance.pk for instance in instances]
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(instances, batch_size=500)
+            inserted = rows
+        except IntegrityError:
+            inserted = []
+            for (line_no, instance), pk in zip(rows, source_ids):
+                instance.pk = pk  # undo ids assigned by the rolled back batch
+                try:
+                    with transaction.atomic():
+                        model.objects.bulk_create([instance])
+                except IntegrityError as e:
+                    self._reject(line_no, f'rejected by the database: {e}')
+                else:
+                    inserted.append((line_no, instance))
+        if any(pk is not None for pk in source_ids):
+            self._reset_sequence(model)
+        return inserted
+
+    def _reset_sequence(self, model):
+        """Move the id sequence past explicitly imported ids, as sqlsequencereset does (no-op on SQLite)"""
+        statements = connection.ops.sequence_reset_sql(no_style(), [model])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def _build_bug(self, line_no, row, known_users, project_owners):
+        title = row.get('title')
+        if not isinstance(title, str) or not title or len(title) > Bug._meta.get_field('title').max_length:
+            return self._reject(line_no, 'missing or too long title')
+        description = row.get('description', '')
+        if not isinstance(description, str):
+            return self._reject(line_no, 'description must be a string')
+        project = row_id(row.get('project'))
+        if project not in project_owners:
+            return self._reject(line_no, f"unknown project {row.get('project')!r}")
+        created_by = row_id(row.get('created_by'))
+        if created_by not in known_users:
+            return self._reject(line_no, f"unknown created_by {row.get('created_by')!r}")
+        assigned_to = row.get('assigned_to')
+        if assigned_to is not None and row_id(assigned_to) not in known_users:
+            return self._reject(line_no, f'unknown assigned_to {assigned_to!r}')
+        status = row.get('status', 'Open')
+        if not isinstance(status, str) or status not in dict(Bug.STATUS_CHOICES):
+            return self._reject(line_no, f'invalid status {status!r}')
+        priority = row.get('priority', 'Medium')
+        if not isinstance(priority, str) or priority not in dict(Bug.PRIORITY_CHOICES):
+            return self._reject(line_no, f'invalid priority {priority!r}')
+        resolved_at = None
+        if status == 'Resolved':
+            # As BugViewSet sets it, so the resolution rollups count the bug
+            resolved_at = row.get('resolved_at')
+            if resolved_at is None:
+                resolved_at = self.now
+            else:
+                resolved_at = parse_datetime(resolved_at) if isinstance(resolved_at, str) else None
+                if resolved_at is None:
+                    return self._reject(line_no, f"invalid resolved_at {row.get('resolved_at')!r}")
+                if timezone.is_naive(resolved_at):
+                    resolved_at = timezone.make_aware(resolved_at)
+
+        return Bug(
+            id=row.get('id'),
+            title=title,
+            description=description,
+            status=status,
+            priority=priority,
+            project_id=project,
+            created_by_id=created_by,
+            assigned_to_id=assigned_to,
+            resolved_at=resolved_at,
+        )
+
+    def _build_comment(self, line_no, row, known_users, bug_projects):
+        if not isinstance(row.get('message'), str) or not row['message']:
+            return self._reject(line_no, 'missing message')
+        if row_id(row.get('bug')) not in bug_projects:
+            return self._reject(line_no, f"unknown bug {row.get('bug')!r}")
+        if row_id(row.get('commenter')) not in known_users:
+            return self._reject(line_no, f"unknown commenter {row.get('commenter')!r}")
+
+        return Comment(
+            id=row.get('id'),
+            bug_id=row['bug'],
+            commenter_id=row['commenter'],
+            message=row['message'],
+        )
+
+    def _reject(self, line_no, reason):
+        self.errors += 1
+        self.stderr.write(f'Line {line_no}: {reason}')
+        if self.errors >= self.max_errors:
+            raise CommandError(f'Too many invalid rows ({self.errors}), aborting')
+        return None
+
+    def _write_checkpoint(self, checkpoint_path, path, offset, line_no):
+        tmp_path = f'{checkpoint_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'path': path, 'offset': offset, 'line': line_no}, f)
+        os.replace(tmp_path, checkpoint_path)
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tracker.deletion import run_pending
+
+
+class Command(BaseCommand):
+    """
+    Hard-delete soft-deleted projects and bugs from their DeletionJobs.
+
+    Each job removes its rows in batches of raw DELETEs, child tables first,
+    and records its progress on the job after every batch. Without ``--once``
+    the command keeps polling for new jobs, so it can run as a worker next
+    to Daphne (with TRACKER_DELETION_IN_PROCESS=False there).
+    """
+
+    help = 'Run pending background deletions of projects and bugs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when no job is left')
+        parser.add_argument('--batch-size', type=int, default=settings.TRACKER_DELETION_BATCH_SIZE,
+                            help='Rows per DELETE statement')
+        parser.add_argument('--pause', type=float, default=settings.TRACKER_DELETION_PAUSE_SECONDS,
+                            help='Seconds to sleep between batches')
+        parser.add_argument('--poll', type=float, default=5, help='Seconds between checks for new jobs')
+
+    def handle(self, *args, **options):
+        while True:
+            run_pending(options['batch_size'], options['pause'], on_finish=self.report)
+            if options['once']:
+                return
+            time.sleep(options['poll'])
+
+    def report(self, job):
+        counts = ', '.join(f'{step}={count}' for step, count in job.deleted_counts.items()) or 'nothing left'
+        if job.status == 'done':
+            self.stdout.write(self.style.SUCCESS(f'Deleted {job.entity_type} {job.entity_id}: {counts}'))
+        else:
+            self.stderr.write(f'Job {job.id} ({job.entity_type} {job.entity_id}) failed after {counts}: {job.error}')
@@ -0,0 +1,78 @@
+import json
+import platform
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tracker.benchmarks import imports
+from tracker.benchmarks.timing import compare
+
+
+class Command(BaseCommand):
+    """
+    Report import-time cost of starting a worker, from ``python -X importtime``.
+
+    Each run imports the target in a fresh interpreter with the current
+    settings module. Time is reported per third-party package and per project
+    module. ``--output`` and ``--baseline`` work like ``run_benchmarks``, so
+    startup cost can be tracked from one release to the next.
+    """
+
+    help = 'Profile startup import time per package and project module'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=list(imports.STARTUP), default='first_request',
+                            help='setup: django.setup(); asgi: build the ASGI app; first_request: asgi plus URLconf')
+        parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters to sample')
+        parser.add_argument('--top', type=int, default=15, help='Slowest modules (cumulative) to list')
+        parser.add_argument('--min-ms', type=float, default=1.0,
+                            help='Hide third-party packages cheaper than this (project modules are always shown) '
+                                 'and ignore baseline growth smaller than this')
+        parser.add_argument('--output', help='Write results JSON to this file')
+        parser.add_argument('--baseline', help='Compare with a previous results file')
+        parser.add_argument('--threshold', type=float, default=0.20,
+                            help='Relative p50 increase reported as a regression')
+
+    def handle(self, *args, **options):
+        results, slowest = imports.run(options['target'], options['repeat'])
+
+        self.stdout.write(f"{'package / module':<40}{'p50 ms':>10}{'p95 ms':>10}")
+        for row in results:
+            name = row['name'].removeprefix('import.')
+            project = name.split('.')[0] in imports.PROJECT_PACKAGES
+            if project or name == 'total' or row['p50_ms'] >= options['min_ms']:
+                self.stdout.write(f"{name:<40}{row['p50_ms']:>10}{row['p95_ms']:>10}")
+
+        self.stdout.write("\nSlowest imports (cumulative ms, last run):")
+        for module, self_seconds, cumulative, depth in slowest[:options['top']]:
+            self.stdout.write(f"{cumulative * 1000:>10.1f}  {'  ' * depth}{module}")
+
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'target': options['target'],
+                'repeat': options['repeat'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            # Sub-millisecond groups swing by more than any sensible threshold
+            regressions = [
+                row for row in compare(report, baseline, options['threshold'])
+                if row[2] - row[1] >= options['min_ms']
+            ]
+            for name, before, after, change in regressions:
+                self.stderr.write(f'{name}: {before}ms -> {after}ms (+{change:.0%})')
+            if regressions:
+                raise CommandError(f'{len(regressions)} import group(s) grew by more than {options["threshold"]:.0%}')
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
@@ -0,0 +1,124 @@
+import json
+import logging
+import platform
+import sys
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from tracker.benchmarks import asgi, profiles, rest, seed, websocket
+from tracker.benchmarks.timing import compare
+
+
+class Command(BaseCommand):
+    """
+    Run the REST, WebSocket and ASGI benchmark suites against a throwaway database.
+
+    The suite never touches the configured database: it creates a test
+    database the same way ``manage.py test`` does, seeds it, and swaps in the
+    in-memory channel layer and a local-memory cache for the run.
+
+    ``--suite profiles`` instead compares the settings profiles, each in its
+    own interpreter, and needs no database.
+    """
+
+    help = 'Run the seeded REST and WebSocket benchmark suite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--suite', choices=['all', 'rest', 'ws', 'asgi', 'profiles'], default='all')
+        parser.add_argument('--only', nargs='*', help='Only run REST scenarios with these name prefixes (e.g. bugs. projects.list)')
+        parser.add_argument('--seed', type=int, default=42)
+        for key, value in seed.DEFAULT_SCALE.items():
+            parser.add_argument(f"--{key.replace('_', '-')}", type=int, default=value)
+        parser.add_argument('--iterations', type=int, default=50, help='Requests per REST scenario')
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--connections', type=int, default=50, help='Sockets in the fan-out room')
+        parser.add_argument('--messages', type=int, default=50, help='Fan-out messages to time')
+        parser.add_argument('--concurrency', type=int, default=10,
+                            help='In-flight requests for the ASGI sync-vs-async comparison')
+        parser.add_argument('--profiles', nargs='*', default=['dev', 'prod'],
+                            help='Settings profiles compared by --suite profiles')
+        parser.add_argument('--startups', type=int, default=5,
+                            help='Cold starts per profile for --suite profiles')
+        parser.add_argument('--output', help='Write results JSON to this file')
+        parser.add_argument('--baseline', help='Compare p50 latencies with a previous results file')
+        parser.add_argument('--threshold', type=float, default=0.10,
+                            help='Relative p50 increase reported as a regression')
+
+    def handle(self, *args, **options):
+        scale = {key: options[key] for key in seed.DEFAULT_SCALE}
+        if options['suite'] == 'profiles':
+            results = profiles.run(options['profiles'], options['startups'], options['iterations'], options['warmup'])
+        else:
+            results = self.run_seeded(options, scale)
+        self.report(options, scale, results)
+
+    def run_seeded(self, options, scale):
+        # Per-message logging in the consumers would dominate the timings
+        logging.disable(logging.INFO)
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(
+                CHANNEL_LAYERS={'default': {'BACKEND': 'tracker.channel_layers.MeteredInMemoryChannelLayer'}},
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                # Timing loops are far above any per-user rate limit
+                REST_FRAMEWORK={
+                    **settings.REST_FRAMEWORK,
+                    'DEFAULT_THROTTLE_RATES': dict.fromkeys(settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']),
+                },
+            ):
+                data = seed.generate(scale, seed=options['seed'])
+                results = []
+                if options['suite'] in ('all', 'rest'):
+                    results += rest.run(data, options['iterations'], options['warmup'], options['only'])
+                if options['suite'] in ('all', 'ws'):
+                    results += async_to_sync(websocket.run)(data, options['connections'], options['messages'])
+                if options['suite'] in ('all', 'asgi'):
+                    results += async_to_sync(asgi.run)(data, options['concurrency'], options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            logging.disable(logging.NOTSET)
+        return results
+
+    def report(self, options, scale, results):
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'database': settings.DATABASES['default']['ENGINE'],
+                'seed': options['seed'],
+                'scale': scale,
+                'iterations': options['iterations'],
+                'concurrency': options['concurrency'],
+            },
+            'results': results,
+        }
+
+        self.stdout.write(f"{'scenario':<36}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}")
+        for row in results:
+            self.stdout.write(
+                f"{row['name']:<36}{row['ops_per_second'] or 0:>10}{row['p50_ms']:>10}"
+                f"{row['p95_ms']:>10}{row.get('queries_per_request', ''):>9}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = compare(report, baseline, options['threshold'])
+            for name, before, after, change in regressions:
+                self.stderr.write(f'{name}: p50 {before}ms -> {after}ms (+{change:.0%})')
+            if regressions:
+                raise CommandError(f'{len(regressions)} scenario(s) regressed by more than {options["threshold"]:.0%}')
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
@@ -0,0 +1,214 @@
+import bisect
+import threading
+
+
+class Counter:
+    """Monotonic in-process counter, optionally split by label values"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY[name] = self
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            return [(dict(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+
+class Gauge:
+    """In-process value that can go up and down; label sets at zero are dropped"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY[name] = self
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            value = self._values.get(key, 0) + amount
+            if value or not self.labelnames:
+                self._values[key] = value
+            else:
+                self._values.pop(key, None)
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            return [(dict(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+
+class Histogram:
+    """Cumulative bucket histogram, optionally split by label values"""
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY[name] = self
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def samples(self):
+        """Return ``(labels, cumulative_buckets, sum, count)`` per label set"""
+        with self._lock:
+            items = [(key, list(series['counts']), series['sum'], series['count'])
+                     for key, series in self._values.items()]
+        result = []
+        for key, counts, total, count in items:
+            cumulative, running = [], 0
+            for upper, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                running += bucket_count
+                cumulative.append((upper, running))
+            result.append((dict(zip(self.labelnames, key)), cumulative, total, count))
+        return result
+
+    def quantile(self, q, cumulative, count):
+        """Upper bound of the bucket holding the q-quantile"""
+        rank = q * count
+        for upper, running in cumulative:
+            if running >= rank:
+                return upper
+        return float('inf')
+
+
+REGISTRY = {}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """Render every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for name, metric in sorted(REGISTRY.items()):
+        kind = {Counter: 'counter', Gauge: 'gauge', Histogram: 'histogram'}[type(metric)]
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'histogram':
+            for labels, cumulative, total, count in metric.samples():
+                for upper, running in cumulative:
+                    lines.append(f'{name}_bucket{_format_labels({**labels, "le": _format_value(upper)})} {running}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+                lines.append(f'{name}_count{_format_labels(labels)} {count}')
+        else:
+            for labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def group_kind(group):
+    """Collapse a group name like ``project_12`` to ``project`` to keep label cardinality low"""
+    return group.split('_', 1)[0]
+
+
+# Channel layer
+channel_messages_dropped = Counter(
+    'tracker_channel_messages_dropped_total',
+    'Messages dropped by the channel layer because a channel was over capacity',
+    ['kind', 'group'],
+)
+
+
+# HTTP requests (recorded only when TRACKER_INSTRUMENTATION is on)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+request_duration = Histogram('tracker_request_duration_seconds', 'Total request time', ['view'])
+request_db_time = Histogram('tracker_request_db_seconds', 'Time spent in SQL per request', ['view'])
+request_serialize_time = Histogram('tracker_request_serialize_seconds', 'Time spent in serializers per request', ['view'])
+request_queries = Histogram('tracker_request_queries', 'SQL queries per request', ['view'], buckets=QUERY_BUCKETS)
+response_size = Histogram('tracker_response_size_bytes', 'Response body size', ['view'], buckets=SIZE_BUCKETS)
+query_budget_exceeded = Counter(
+    'tracker_query_budget_exceeded_total',
+    'Requests that ran more SQL queries than TRACKER_QUERY_BUDGET',
+    ['view'],
+)
+
+
+# Rate limits and single-flight list requests
+requests_throttled = Counter('tracker_requests_throttled_total', 'Requests rejected by a rate limit', ['scope'])
+requests_coalesced = Counter(
+    'tracker_requests_coalesced_total',
+    'List requests answered with the result of an identical request already in flight',
+    ['endpoint'],
+)
+
+
+# WebSockets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+ws_connections = Gauge('tracker_ws_connections', 'Open WebSocket connections in this process')
+ws_room_size = Gauge('tracker_ws_room_size', 'Open sockets per project room in this process', ['project'])
+ws_messages_sent = Counter('tracker_ws_messages_sent_total', 'Messages written to WebSockets', ['type'])
+ws_ack_latency = Histogram(
+    'tracker_ws_ack_seconds', 'Time from writing a message until the client acknowledged it',
+    buckets=LATENCY_BUCKETS,
+)
+ws_slow_sends = Counter('tracker_ws_slow_sends_total', 'Messages acknowledged later than TRACKER_WS_SLOW_SEND_SECONDS')
+ws_outbox_depth = Histogram(
+    'tracker_ws_outbox_depth', 'Queued outbound messages per connection at enqueue time',
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250),
+)
+ws_outbox_coalesced = Counter(
+    'tracker_ws_outbox_coalesced_total', 'Queued messages replaced by a newer state for the same key', ['type'],
+)
+ws_outbox_dropped = Counter('tracker_ws_outbox_dropped_total', 'Queued messages dropped before delivery', ['type'])
+ws_slow_disconnects = Counter('tracker_ws_slow_disconnects_total', 'Connections closed because the client fell behind')
+ws_heartbeats_sent = Counter('tracker_ws_heartbeats_sent_total', 'Application heartbeats sent to clients')
+ws_reaped = Counter('tracker_ws_reaped_total', 'Idle connections closed by the heartbeat reaper')
+ws_fanout_latency = Histogram(
+    'tracker_ws_fanout_seconds', 'Time from group_send until a socket received the event',
+    ['type'], buckets=LATENCY_BUCKETS,
+)
+group_send_duration = Histogram(
+    'tracker_group_send_seconds', 'Time spent in channel layer group_send', ['group'], buckets=LATENCY_BUCKETS,
+)
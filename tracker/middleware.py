@@ -1,9 +1,21 @@
 import logging
+import time
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from channels.db import database_sync_to_async
+from django.contrib.auth.middleware import AuthenticationMiddleware
 from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
 from django.contrib.sessions.backends.db import SessionStore
 from django.conf import settings
+from django.db import connections
+from django.middleware.clickjacking import XFrameOptionsMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
 from urllib.parse import parse_qs
+from . import metrics
+from .instrumentation import RequestStats, current_stats
+from .singleflight import anote_write, note_write
 from http.cookies import SimpleCookie
 
 logger = logging.getLogger(__name__)
@@ -146,4 +158,153 @@ class WebSocketAuthMiddleware:
 
 def WebSocketAuthMiddlewareStack(inner):
     """Middleware stack wrapper"""
-    return WebSocketAuthMiddleware(inner)
\ No newline at end of file
+    return WebSocketAuthMiddleware(inner)
+
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Opt-in per-request performance instrumentation (TRACKER_INSTRUMENTATION).
+
+    Records SQL query count, DB time, serializer time and response size per
+    view/action, returns them in a ``Server-Timing`` header, feeds the
+    histograms served at /api/metrics/requests/ and warns when a request
+    runs more queries than TRACKER_QUERY_BUDGET.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.query_budget = getattr(settings, 'TRACKER_QUERY_BUDGET', 20)
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        duration = time.perf_counter() - started
+
+        view = stats.view or 'unresolved'
+        size = len(response.content) if not response.streaming else 0
+        metrics.request_duration.observe(duration, view=view)
+        metrics.request_db_time.observe(stats.db_time, view=view)
+        metrics.request_serialize_time.observe(stats.serialize_time, view=view)
+        metrics.request_queries.observe(stats.queries, view=view)
+        metrics.response_size.observe(size, view=view)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries"',
+            f'serialize;dur={stats.serialize_time * 1000:.2f}',
+            f'total;dur={duration * 1000:.2f}',
+        ])
+
+        if stats.queries > self.query_budget:
+            metrics.query_budget_exceeded.inc(view=view)
+            logger.warning(
+                f"[PERF] {view} ran {stats.queries} queries "
+                f"(budget {self.query_budget}) for {request.method} {request.path}"
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = current_stats.get()
+        if stats is not None:
+            stats.view = view_name(view_func, request.method)
+        return None
+
+
+def view_name(view_func, method):
+    """``BugViewSet.list`` for DRF viewsets, the function name otherwise"""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', 'view')
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{cls.__name__}.{action}'
+
+
+
+class RecentWriteMiddleware:
+    """
+    Stamp each successful write by an authenticated user once the view has
+    returned, and so committed. Single-flight list calls that started before
+    the stamp are not shared with that user (see tracker/singleflight.py).
+    Works in sync and async chains; reads cost one method check.
+    """
+
+    sync_capable = True
+    async_capable = True
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        writer = self.writer(request, response)
+        if writer:
+            note_write(writer)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        writer = self.writer(request, response)
+        if writer:
+            await anote_write(writer)
+        return response
+
+    def writer(self, request, response):
+        """Id of the user whose write this response completed, else None"""
+        if request.method in self.SAFE_METHODS or response.status_code >= 400:
+            return None
+        # DRF copies the user it authenticated (JWT or session) onto the HttpRequest
+        user = getattr(request, 'user', None)
+        return user.id if user is not None and user.is_authenticated else None
+
+
+
+# Token-authenticated JSON routes that need none of the browser middleware
+API_PATH_PREFIXES = ('/api/', '/metrics')
+
+
+class APIBypassMixin:
+    """
+    Skip a MiddlewareMixin-based middleware for API_PATH_PREFIXES.
+
+    Used by the prod settings profile. Works in sync and async chains: in an
+    async chain ``get_response`` returns a coroutine that the caller awaits.
+    """
+
+    def __call__(self, request):
+        if request.path_info.startswith(API_PATH_PREFIXES):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class WebSessionMiddleware(APIBypassMixin, SessionMiddleware):
+    pass
+
+
+class WebCsrfViewMiddleware(APIBypassMixin, CsrfViewMiddleware):
+    pass
+
+
+class WebAuthenticationMiddleware(APIBypassMixin, AuthenticationMiddleware):
+    pass
+
+
+class WebMessageMiddleware(APIBypassMixin, MessageMiddleware):
+    pass
+
+
+class WebXFrameOptionsMiddleware(APIBypassMixin, XFrameOptionsMiddleware):
+    pass
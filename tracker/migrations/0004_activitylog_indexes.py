@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0003_notification'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['project', '-created_at'], name='tracker_act_project_4dcc8f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['created_at'], name='tracker_act_created_6ba022_idx'),
+        ),
+    ]
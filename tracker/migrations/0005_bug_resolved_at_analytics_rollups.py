@@ -0,0 +1,68 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_resolved_at(apps, schema_editor):
+    # Best available estimate for bugs resolved before the field existed
+    Bug = apps.get_model('tracker', 'Bug')
+    Bug.objects.filter(status='Resolved', resolved_at__isnull=True).update(resolved_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0004_activitylog_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bug',
+            name='resolved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_resolved_at, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='AssigneeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_count', models.IntegerField(default=0)),
+                ('resolved_count', models.IntegerField(default=0)),
+                ('assignee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignee_rollups', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignee_rollups', to='tracker.project')),
+            ],
+            options={
+                'unique_together': {('project', 'assignee')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyResolutionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('resolved_count', models.IntegerField(default=0)),
+                ('resolve_seconds', models.FloatField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resolution_rollups', to='tracker.project')),
+            ],
+            options={
+                'ordering': ['day'],
+                'unique_together': {('project', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PriorityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('priority', models.CharField(max_length=20)),
+                ('open_count', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='priority_rollups', to='tracker.project')),
+            ],
+            options={
+                'unique_together': {('project', 'priority')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0005_bug_resolved_at_analytics_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['bug', 'created_at'], name='tracker_com_bug_id_67de27_idx'),
+        ),
+    ]
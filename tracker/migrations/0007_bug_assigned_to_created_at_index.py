@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0006_comment_bug_created_at_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['assigned_to', '-created_at'], name='tracker_bug_assigne_a6a19c_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0008_soft_delete_deletionjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='deletionjob',
+            name='entity_id',
+            field=models.PositiveBigIntegerField(),
+        ),
+    ]
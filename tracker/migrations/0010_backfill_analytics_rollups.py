@@ -0,0 +1,38 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def backfill_rollups(apps, schema_editor):
+    # 0005 created the rollup tables empty, so bugs from before it were never
+    # counted. Recompute every rollup from the live bugs, as rebuild_analytics does.
+    from tracker.analytics import BUG_STATE_FIELDS, ROLLUP_KEYS, _accumulate
+
+    Bug = apps.get_model('tracker', 'Bug')
+    bugs = Bug.objects.filter(deleted_at__isnull=True, project__deleted_at__isnull=True).order_by()
+    totals = defaultdict(dict)
+    for state in bugs.values(*BUG_STATE_FIELDS).iterator(chunk_size=2000):
+        _accumulate(totals, state, 1)
+
+    for model, key_fields in ROLLUP_KEYS.items():
+        rollup = apps.get_model('tracker', model.__name__)
+        rollup.objects.all().delete()
+        rollup.objects.bulk_create(
+            [
+                rollup(**dict(zip(key_fields, keys)), **increments)
+                for (row_model, keys), increments in totals.items()
+                if row_model is model
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0009_deletionjob_entity_id_bigint'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
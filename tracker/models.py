@@ -16,6 +16,7 @@ class Project(TimeStampedModel):
     name = models.CharField(max_length=255)
     description = models.TextField()
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_projects')
+    deleted_at = models.DateTimeField(null=True, blank=True)  # soft-deleted, rows go with its DeletionJob
     
     def __str__(self):
         return self.name
@@ -44,12 +45,18 @@ class Bug(TimeStampedModel):
     assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_bugs')
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='bugs')
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_bugs')
+    resolved_at = models.DateTimeField(null=True, blank=True)  # set while status is Resolved
+    deleted_at = models.DateTimeField(null=True, blank=True)  # soft-deleted, rows go with its DeletionJob
     
     def __str__(self):
         return f"{self.title} - {self.status}"
     
     class Meta:
         ordering = ['-created_at']
+        # The assigned_to_me inbox lists a user's bugs newest first
+        indexes = [
+            models.Index(fields=['assigned_to', '-created_at']),
+        ]
 
 class Comment(TimeStampedModel):
     bug = models.ForeignKey(Bug, on_delete=models.CASCADE, related_name='comments')
@@ -61,6 +68,10 @@ class Comment(TimeStampedModel):
     
     class Meta:
         ordering = ['created_at']
+        # Bug threads are read in created_at order, optionally after a known comment
+        indexes = [
+            models.Index(fields=['bug', 'created_at']),
+        ]
 
 
 
@@ -79,5 +90,95 @@ class ActivityLog(TimeStampedModel):
     
     class Meta:
         ordering = ['-created_at']
+        # Date-range reads and monthly archiving scan by created_at
+        indexes = [
+            models.Index(fields=['project', '-created_at']),
+            models.Index(fields=['created_at']),
+        ]
 
 
+class Notification(TimeStampedModel):
+    """Per-user inbox entry, written alongside each personal WebSocket notification"""
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    notification_type = models.CharField(max_length=50)  # 'new_comment', etc.
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='notifications')
+    bug = models.ForeignKey(Bug, on_delete=models.CASCADE, null=True, blank=True, related_name='notifications')
+    payload = models.JSONField(default=dict)
+    is_read = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.notification_type} for {self.recipient.username}"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', '-created_at']),
+            models.Index(fields=['recipient', 'is_read']),
+        ]
+
+
+
+# Dashboard rollups, kept current by tracker.analytics and rebuilt by
+# ``manage.py rebuild_analytics``
+
+class PriorityRollup(models.Model):
+    """Unresolved bugs per project and priority"""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='priority_rollups')
+    priority = models.CharField(max_length=20)
+    open_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['project', 'priority']
+
+
+class DailyResolutionRollup(models.Model):
+    """Bugs resolved per project and day, with their summed time to resolve"""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='resolution_rollups')
+    day = models.DateField()
+    resolved_count = models.IntegerField(default=0)
+    resolve_seconds = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ['day']
+        unique_together = ['project', 'day']
+
+
+class AssigneeRollup(models.Model):
+    """Open and resolved bugs per project and assignee"""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='assignee_rollups')
+    assignee = models.ForeignKey(User, on_delete=models.CASCADE, related_name='assignee_rollups')
+    open_count = models.IntegerField(default=0)
+    resolved_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['project', 'assignee']
+
+
+class DeletionJob(TimeStampedModel):
+    """Background hard delete of a soft-deleted project or bug (see tracker.deletion)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    entity_type = models.CharField(max_length=20)  # 'project' or 'bug'
+    entity_id = models.PositiveBigIntegerField()  # the BigAutoField key of that row
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='deletion_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    step = models.CharField(max_length=50, blank=True)  # table being emptied right now
+    deleted_counts = models.JSONField(default=dict)  # rows removed so far, by table
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Delete {self.entity_type} {self.entity_id} ({self.status})"
+
+    class Meta:
+        ordering = ['created_at']
+        # Workers look for the oldest claimable job
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
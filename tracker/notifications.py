@@ -0,0 +1,87 @@
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+
+from . import metrics
+from .models import Notification
+
+
+UNREAD_COUNT_TIMEOUT = 60 * 60 * 24
+
+
+async def agroup_send(group, event, channel_layer=None):
+    """
+    group_send that stamps ``sent_at`` for fan-out latency and times the call.
+
+    Consumers use ``sent_at`` to report how long the event took to reach each
+    socket (tracker_ws_fanout_seconds).
+    """
+    channel_layer = channel_layer or get_channel_layer()
+    event['sent_at'] = time.time()
+    started = time.perf_counter()
+    await channel_layer.group_send(group, event)
+    metrics.group_send_duration.observe(time.perf_counter() - started, group=metrics.group_kind(group))
+
+
+def group_send(group, event):
+    """Synchronous wrapper around agroup_send for views"""
+    async_to_sync(agroup_send)(group, event)
+
+
+def unread_count_key(user_id):
+    return f'inbox_unread_{user_id}'
+
+
+def get_unread_count(user_id):
+    """Cached unread inbox counter, recomputed from the index on a miss"""
+    key = unread_count_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        cache.set(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    """Shift the cached counter; a missing key is left for get_unread_count to rebuild"""
+    try:
+        cache.incr(unread_count_key(user_id), delta)
+    except ValueError:
+        pass
+
+
+def reset_unread_count(user_id):
+    cache.set(unread_count_key(user_id), 0, UNREAD_COUNT_TIMEOUT)
+
+
+def send_personal_notifications(recipient_ids, notification_type, project, bug, payload):
+    """
+    Store an inbox entry for each recipient and push it to their live sockets.
+
+    Offline users pick the entry up later from /api/notifications/ instead of
+    rebuilding it from the activity log.
+    """
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            recipient_id=user_id,
+            notification_type=notification_type,
+            project=project,
+            bug=bug,
+            payload=payload,
+        )
+        for user_id in recipient_ids
+    ])
+
+    for notification in notifications:
+        adjust_unread_count(notification.recipient_id, 1)
+        group_send(
+            f"user_{notification.recipient_id}",
+            {
+                'type': 'personal_notification',
+                'notification_type': notification_type,
+                'notification_id': notification.id,
+                **payload,
+            }
+        )
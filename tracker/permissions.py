@@ -1,6 +1,16 @@
 from rest_framework import permissions
 from django.db.models import Q
 
+from .access import owned_project_ids
+
+
+def request_owned_project_ids(request):
+    """Projects owned by the requesting user, looked up at most once per request"""
+    if not hasattr(request, '_owned_project_ids'):
+        request._owned_project_ids = owned_project_ids(request.user.id)
+    return request._owned_project_ids
+
+
 class IsOwnerOrReadOnly(permissions.BasePermission):
  
     def has_object_permission(self, request, view, obj):
@@ -9,18 +19,26 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         # Write permissions only to the owner.
         if request.method in permissions.SAFE_METHODS:
             return True
-        return obj.owner == request.user
+        # Compare ids so the owner row is never loaded
+        return obj.owner_id == request.user.id
 
 class IsProjectMemberOrReadOnly(permissions.BasePermission):
 
+    def has_permission(self, request, view):
+        # Resolve the owned-project set up front for authenticated users so
+        # every object check in this request reuses it
+        if request.user and request.user.is_authenticated:
+            request_owned_project_ids(request)
+        return True
+
     def has_object_permission(self, request, view, obj):
         
-        # For Bug objects, check project access
-        if hasattr(obj, 'project'):
-            project = obj.project
+        # For Bug objects, check project access using FK ids only
+        if hasattr(obj, 'project_id'):
+            user_id = request.user.id
             return (
-                project.owner == request.user or
-                obj.assigned_to == request.user or
-                obj.created_by == request.user
+                obj.assigned_to_id == user_id or
+                obj.created_by_id == user_id or
+                obj.project_id in request_owned_project_ids(request)
             )
-        return False
\ No newline at end of file
+        return False
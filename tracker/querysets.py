@@ -0,0 +1,82 @@
+from django.db.models import Count, F, Q
+
+from .models import Bug, Comment
+
+
+def live_projects(prefix=''):
+    """Q for projects (or the project at ``prefix``, e.g. 'project__') that are not soft-deleted"""
+    return Q(**{f'{prefix}deleted_at__isnull': True})
+
+
+def live_bugs(prefix=''):
+    """Q for bugs (or the bug at ``prefix``) that are not soft-deleted, themselves or through their project"""
+    return Q(**{f'{prefix}deleted_at__isnull': True, f'{prefix}project__deleted_at__isnull': True})
+
+
+def visible_bugs(user):
+    """Bugs a user may read, with everything BugSerializer touches loaded up front"""
+    # Every join here is a forward FK, so rows cannot repeat and no DISTINCT is needed
+    bugs = Bug.objects.filter(
+        Q(project__owner=user) |
+        Q(assigned_to=user) |
+        Q(created_by=user),
+        live_bugs(),
+    )
+    return with_bug_details(bugs).order_by('-created_at')  # Meta.ordering is not applied to aggregate queries
+
+
+def comment_thread(bug_id):
+    """One bug's comments in (bug, created_at) index order"""
+    return Comment.objects.filter(bug_id=bug_id).order_by('created_at', 'id')
+
+
+def comments_after(comments, after_id, anchor_created_at):
+    """
+    Comments newer than ``after_id``, keyed on (created_at, id) like the
+    thread order. Falls back to the id alone when the anchor comment is gone.
+    """
+    if anchor_created_at is None:
+        return comments.filter(id__gt=after_id)
+    return comments.filter(
+        Q(created_at__gt=anchor_created_at) |
+        Q(created_at=anchor_created_at, id__gt=after_id)
+    )
+
+
+
+# ?group_by= values accepted by the assigned_to_me inbox, with the extra columns each group carries
+ASSIGNED_GROUPS = {
+    'project': {'project_name': F('project__name')},
+    'status': {},
+}
+
+
+def with_bug_details(bugs):
+    """Load everything BugSerializer touches for a bug queryset"""
+    # Users are rendered from the user summary cache, so only the project is joined
+    return bugs.select_related('project').annotate(
+        comments_count=Count('comments')
+    )
+
+
+def assigned_bugs(user):
+    """
+    A user's assigned bugs, read straight off the (assigned_to, created_at)
+    index. Every assigned bug is visible to its assignee, so the visibility
+    OR in visible_bugs() is not needed here.
+    """
+    return Bug.objects.filter(live_bugs(), assigned_to=user).order_by('-created_at')
+
+
+def parse_group_by(value):
+    """Split ``?group_by=project,status``; raises ValueError naming an unknown group"""
+    groups = [group for group in (value or '').split(',') if group]
+    for group in groups:
+        if group not in ASSIGNED_GROUPS:
+            raise ValueError(group)
+    return groups
+
+
+def group_counts(bugs, group):
+    """Bug counts per group over an un-annotated bug queryset, as one GROUP BY"""
+    return bugs.values(group, **ASSIGNED_GROUPS[group]).annotate(count=Count('id')).order_by(group)
@@ -3,4 +3,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r'^ws/project/(?P<project_id>\d+)/$', consumers.ProjectConsumer.as_asgi()),
+    re_path(r'^ws/stream/$', consumers.StreamConsumer.as_asgi()),
 ]
\ No newline at end of file
@@ -1,24 +1,79 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Project, Bug, Comment, ActivityLog
+from django.db import models
+from .models import Project, Bug, Comment, ActivityLog, Notification, DeletionJob
+from .instrumentation import InstrumentedSerializerMixin
+from .querysets import live_bugs, live_projects
+from .users import USER_SUMMARY_FIELDS, user_summaries, user_summary
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'first_name', 'last_name']
+        fields = list(USER_SUMMARY_FIELDS)
         
         
 
-class ProjectSerializer(serializers.ModelSerializer):
-    owner = UserSerializer(read_only=True)
+class UserSummaryField(serializers.Field):
+    """
+    Nested user rendered from the user summary cache by FK id, e.g. ``UserSummaryField(source='owner_id')``.
+
+    Async views pass the summaries they loaded as ``context['user_summaries']``;
+    the field then only reads that map, since a cache miss would query the
+    database from the event loop.
+    """
+
+    class Meta:
+        # drf_yasg documents unknown fields as strings; this is a UserSerializer object
+        swagger_schema_fields = {
+            'type': 'object',
+            'properties': {name: {'type': 'integer' if name == 'id' else 'string'} for name in USER_SUMMARY_FIELDS},
+            'x_nullable': True,
+        }
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, user_id):
+        summaries = self.context.get('user_summaries')
+        summary = user_summary(user_id) if summaries is None else summaries.get(user_id)
+        return dict(summary) if summary else None
+
+
+
+def referenced_user_ids(serializer, instances):
+    """Ids of every user the serializer's UserSummaryFields will render for these instances"""
+    sources = [field.source for field in serializer.fields.values() if isinstance(field, UserSummaryField)]
+    return {getattr(instance, source) for instance in instances for source in sources}
+
+
+
+class UserSummaryListSerializer(serializers.ListSerializer):
+    """Loads the users of a whole page in one batch before rendering its rows"""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        if 'user_summaries' not in self.context:
+            user_summaries(referenced_user_ids(self.child, items))
+        return super().to_representation(items)
+
+
+
+
+class ProjectSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    owner = UserSummaryField(source='owner_id')
     bugs_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Project
+        list_serializer_class = UserSummaryListSerializer
         fields = ['id', 'name', 'description', 'owner', 'bugs_count', 'created_at', 'updated_at']
     
     def get_bugs_count(self, obj):
-        return obj.bugs.count()
+        # ProjectViewSet annotates the count; fall back to a query for other callers
+        if hasattr(obj, 'bugs_count'):
+            return obj.bugs_count
+        return obj.bugs.filter(deleted_at__isnull=True).count()
     
     def create(self, validated_data):
         validated_data['owner'] = self.context['request'].user
@@ -27,22 +82,28 @@ class ProjectSerializer(serializers.ModelSerializer):
     
 
 
-class BugSerializer(serializers.ModelSerializer):
-    created_by = UserSerializer(read_only=True)
-    assigned_to = UserSerializer(read_only=True)
+class BugSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    created_by = UserSummaryField(source='created_by_id')
+    assigned_to = UserSummaryField(source='assigned_to_id')
     assigned_to_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
+    project = serializers.PrimaryKeyRelatedField(queryset=Project.objects.filter(live_projects()))
     project_name = serializers.CharField(source='project.name', read_only=True)
     comments_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Bug
+        list_serializer_class = UserSummaryListSerializer
         fields = [
             'id', 'title', 'description', 'status', 'priority', 
             'assigned_to', 'assigned_to_id', 'project', 'project_name',
-            'created_by', 'comments_count', 'created_at', 'updated_at'
+            'created_by', 'comments_count', 'resolved_at', 'created_at', 'updated_at'
         ]
+        read_only_fields = ['resolved_at']
     
     def get_comments_count(self, obj):
+        # BugViewSet annotates the count; fall back to a query for other callers
+        if hasattr(obj, 'comments_count'):
+            return obj.comments_count
         return obj.comments.count()
     
     def create(self, validated_data):
@@ -52,11 +113,13 @@ class BugSerializer(serializers.ModelSerializer):
     
     
     
-class CommentSerializer(serializers.ModelSerializer):
-    commenter = UserSerializer(read_only=True)
+class CommentSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    commenter = UserSummaryField(source='commenter_id')
+    bug = serializers.PrimaryKeyRelatedField(queryset=Bug.objects.filter(live_bugs()))
     
     class Meta:
         model = Comment
+        list_serializer_class = UserSummaryListSerializer
         fields = ['id', 'bug', 'commenter', 'message', 'created_at', 'updated_at']
     
     def create(self, validated_data):
@@ -65,12 +128,28 @@ class CommentSerializer(serializers.ModelSerializer):
     
 
 
-class ActivityLogSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
+class ActivityLogSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    user = UserSummaryField(source='user_id')
     
     class Meta:
         model = ActivityLog
+        list_serializer_class = UserSummaryListSerializer
         fields = ['id', 'project', 'user', 'action', 'entity_type', 'entity_id', 'details', 'created_at']
 
-    
-    
\ No newline at end of file
+
+
+class NotificationSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'notification_type', 'project', 'bug', 'payload', 'is_read', 'created_at']
+
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = DeletionJob
+        fields = [
+            'id', 'entity_type', 'entity_id', 'status', 'step', 'deleted_counts',
+            'attempts', 'error', 'created_at', 'updated_at', 'finished_at',
+        ]
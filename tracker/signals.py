@@ -0,0 +1,106 @@
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .access import (
+    invalidate_owned_projects,
+    invalidate_project_access,
+    invalidate_visible_projects,
+    revoke_lost_access,
+)
+from .models import Bug, Project
+from .users import USER_SUMMARY_FIELDS, invalidate_user_summaries
+
+
+# Fields that decide who may watch a project (see access.has_project_access)
+MEMBERSHIP_FIELDS = {
+    Project: ('owner_id',),
+    Bug: ('project_id', 'created_by_id', 'assigned_to_id'),
+}
+
+
+def membership_pairs(sender, pk, values):
+    """``(user_id, project_id)`` pairs a row grants access for"""
+    if sender is Project:
+        return {(values['owner_id'], pk)}
+    return {
+        (values['created_by_id'], values['project_id']),
+        (values['assigned_to_id'], values['project_id']),
+    }
+
+
+def current_values(sender, instance):
+    return {field: getattr(instance, field) for field in MEMBERSHIP_FIELDS[sender]}
+
+
+@receiver(post_init, sender=Project)
+@receiver(post_init, sender=Bug)
+def snapshot_membership(sender, instance, **kwargs):
+    # Read __dict__ directly so deferred fields are never fetched here
+    instance._loaded_members = {
+        field: instance.__dict__[field]
+        for field in MEMBERSHIP_FIELDS[sender]
+        if field in instance.__dict__
+    }
+
+
+@receiver(pre_save, sender=Project)
+@receiver(pre_save, sender=Bug)
+def remember_membership(sender, instance, update_fields=None, **kwargs):
+    fields = MEMBERSHIP_FIELDS[sender]
+    if instance._state.adding:
+        instance._previous_members = set()
+        return
+    names = set(fields) | {field.removesuffix('_id') for field in fields}
+    if update_fields is not None and not names & set(update_fields):
+        instance._previous_members = None
+        return
+
+    loaded = getattr(instance, '_loaded_members', {})
+    if len(loaded) < len(fields):
+        # Some membership field was deferred when the row was loaded
+        loaded = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._previous_members = membership_pairs(sender, instance.pk, loaded) if loaded else set()
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Bug)
+def update_membership(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_members', None)
+    if previous is None:
+        return
+    values = current_values(sender, instance)
+    instance._loaded_members = values
+    current = membership_pairs(sender, instance.pk, values)
+    if sender is Project:
+        invalidate_owned_projects({user_id for user_id, _ in previous | current})
+    invalidate_project_access(current - previous)
+    invalidate_visible_projects({user_id for user_id, _ in previous ^ current})
+    removed = previous - current
+    if removed:
+        transaction.on_commit(partial(revoke_lost_access, removed))
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Bug)
+def drop_membership(sender, instance, **kwargs):
+    pairs = membership_pairs(sender, instance.pk, current_values(sender, instance))
+    if sender is Project:
+        invalidate_owned_projects({user_id for user_id, _ in pairs})
+    invalidate_visible_projects({user_id for user_id, _ in pairs})
+    transaction.on_commit(partial(revoke_lost_access, pairs))
+
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_user_summary(sender, instance, update_fields=None, **kwargs):
+    # Logins save last_login only, which is not part of the summary
+    if update_fields is not None and not set(USER_SUMMARY_FIELDS) & set(update_fields):
+        return
+    invalidate_user_summaries([instance.pk])
+    # Again after commit, in case another request re-cached the old row meanwhile
+    transaction.on_commit(partial(invalidate_user_summaries, [instance.pk]))
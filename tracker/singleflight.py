@@ -0,0 +1,163 @@
+"""
+Single-flight for the polled list endpoints.
+
+Integrations poll ``/api/bugs/`` and ``/api/activity_logs/`` with identical
+queries. When requests with the same key overlap, the first one counts,
+queries and serializes the page, and the others wait for it and get the same
+result. Nothing is kept after the call finishes, so a request only ever sees
+a result that was still being computed when it arrived.
+
+That result can still predate the request: the shared query may have started
+before a write that committed just before the follower arrived. For other
+users' writes that is the same as having polled a moment earlier. For the
+user's own write it would look like the write was lost. RecentWriteMiddleware
+therefore stamps each user's successful writes in the cache, and a request
+never joins a call that started before its user's last write.
+
+Keys hold the user, so results are never shared across users. Calls are
+shared within one process: thread waiters for the DRF viewsets and one task
+per event loop for the async views.
+"""
+import asyncio
+import copy
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from . import metrics
+
+
+def request_key(request, endpoint):
+    """Endpoint, user, host (for pagination links) and query parameters"""
+    params = tuple(sorted((name, tuple(values)) for name, values in request.GET.lists()))
+    return (endpoint, request.user.id, request.get_host(), params)
+
+
+# Longer than any list call runs, so a stamp outlives every call it must stop
+RECENT_WRITE_SECONDS = 60
+
+
+def recent_write_key(user_id):
+    return f'single_flight_write_{user_id}'
+
+
+def note_write(user_id):
+    """Record that the user's write has committed (see RecentWriteMiddleware)"""
+    cache.set(recent_write_key(user_id), time.time(), RECENT_WRITE_SECONDS)
+
+
+async def anote_write(user_id):
+    await cache.aset(recent_write_key(user_id), time.time(), RECENT_WRITE_SECONDS)
+
+
+def wrote_since(user_id, started):
+    written = cache.get(recent_write_key(user_id))
+    return written is not None and written >= started
+
+
+async def awrote_since(user_id, started):
+    written = await cache.aget(recent_write_key(user_id))
+    return written is not None and written >= started
+
+
+def copy_error(error):
+    """A copy of a shared call's exception, so each waiter raises and annotates its own"""
+    try:
+        duplicate = copy.copy(error)
+    except Exception:
+        return error
+    return duplicate.with_traceback(error.__traceback__)
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'started')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.started = time.time()
+
+
+class SingleFlight:
+    """
+    Calls keyed by ``request_key``; overlapping callers share the first call's
+    outcome, unless their user has written since that call started.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._tasks = weakref.WeakKeyDictionary()  # event loop -> {key: (task, started)}
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if wrote_since(key[1], call.started):
+                return function()
+            metrics.requests_coalesced.inc(endpoint=key[0])
+            call.done.wait()
+            if call.error is not None:
+                raise copy_error(call.error)
+            return call.result
+
+        try:
+            call.result = function()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def ado(self, key, coroutine_function):
+        """``do`` for coroutines. The shared task is shielded, so one caller going away does not cancel it for the rest"""
+        tasks = self._tasks.setdefault(asyncio.get_running_loop(), {})
+        leader = key not in tasks
+        if leader:
+            task = asyncio.ensure_future(coroutine_function())
+            tasks[key] = (task, time.time())
+            task.add_done_callback(lambda done: tasks.pop(key, None) if tasks.get(key, (None,))[0] is done else None)
+        else:
+            task, started = tasks[key]
+            if await awrote_since(key[1], started):
+                return await coroutine_function()
+            metrics.requests_coalesced.inc(endpoint=key[0])
+        try:
+            return await asyncio.shield(task)
+        except Exception as e:
+            if leader:
+                raise
+            raise copy_error(e) from None
+
+
+flights = SingleFlight()
+
+
+class SingleFlightListMixin:
+    """
+    Viewset mixin: overlapping identical ``list`` requests by one user share
+    one query and serialized page. ``single_flight_endpoint`` names the key.
+    """
+
+    single_flight_endpoint = None
+
+    def list(self, request, *args, **kwargs):
+        if not settings.TRACKER_SINGLE_FLIGHT:
+            return super().list(request, *args, **kwargs)
+        data = flights.do(
+            request_key(request, self.single_flight_endpoint),
+            lambda: super(SingleFlightListMixin, self).list(request, *args, **kwargs).data,
+        )
+        return Response(data)
@@ -4,10 +4,59 @@ Quick test to verify middleware is working
 """
 
 import asyncio
+import gzip
+import importlib
 import websockets
 import json
+import logging
+import os
+import tempfile
+import threading
 import requests
 import re
+import sqlite3
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bugtracker import schema
+
+from tracker import metrics
+from tracker.access import accessible_project_ids, has_project_access
+from tracker.analytics import rebuild
+from tracker.channel_layers import OVER_CAPACITY_MESSAGE, MeteredRedisChannelLayer, _redis_filter
+from tracker.coalescing import bug_edit_state, bug_updates, flush_at_exit
+from tracker.deletion import run_pending, soft_delete_bug, soft_delete_project
+from tracker.models import (
+    ActivityLog,
+    AssigneeRollup,
+    Bug,
+    Comment,
+    DailyResolutionRollup,
+    DeletionJob,
+    Notification,
+    PriorityRollup,
+    Project,
+)
+from tracker.routing import websocket_urlpatterns
+from tracker.singleflight import SingleFlight, note_write, recent_write_key
+from tracker.users import clear_local_user_summaries, user_summaries, user_summary
+from tracker.views import ActivityLogViewSet
 
 async def test_middleware():
     print("🧪 Testing WebSocket Middleware...")
@@ -68,6 +117,1272 @@ async def test_middleware():
     
     return False
 
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    TRACKER_WS_HEARTBEAT_SECONDS=0,
+)
+class ProjectAccessTests(TestCase):
+    """Connect-time project access for ws/project/ and ws/stream/"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        clear_local_user_summaries()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.member = User.objects.create_user('member', password='pass')
+        self.outsider = User.objects.create_user('outsider', password='pass')
+        self.project = Project.objects.create(name='Tracker', description='', owner=self.owner)
+        self.other_project = Project.objects.create(name='Other', description='', owner=self.outsider)
+        self.bug = Bug.objects.create(
+            title='Crash', description='', project=self.project,
+            created_by=self.owner, assigned_to=self.member,
+        )
+
+    async def connect(self, user, path):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), path)
+        communicator.scope['user'] = user
+        connected, code = await communicator.connect()
+        return communicator, connected, code
+
+    def reassign_bug(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bug.assigned_to = user
+            self.bug.save()
+
+    async def test_member_can_connect(self):
+        communicator, connected, _ = await self.connect(self.member, f'/ws/project/{self.project.id}/')
+        self.assertTrue(connected)
+        message = await communicator.receive_json_from()
+        self.assertEqual(message['type'], 'connection_established')
+        await communicator.disconnect()
+
+    async def test_outsider_is_rejected(self):
+        _, connected, code = await self.connect(self.outsider, f'/ws/project/{self.project.id}/')
+        self.assertFalse(connected)
+        self.assertEqual(code, 4003)
+
+    def test_access_check_is_cached(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(has_project_access(self.member.id, self.project.id))
+        with self.assertNumQueries(0):
+            self.assertTrue(has_project_access(self.member.id, self.project.id))
+
+    def test_new_assignment_invalidates_cache(self):
+        self.assertFalse(has_project_access(self.outsider.id, self.project.id))
+        self.reassign_bug(self.outsider)
+        self.assertTrue(has_project_access(self.outsider.id, self.project.id))
+        self.assertFalse(has_project_access(self.member.id, self.project.id))
+
+    async def test_revoked_member_is_disconnected(self):
+        communicator, connected, _ = await self.connect(self.member, f'/ws/project/{self.project.id}/')
+        self.assertTrue(connected)
+        await communicator.receive_json_from()
+
+        await database_sync_to_async(self.reassign_bug)(self.outsider)
+
+        message = await communicator.receive_json_from()
+        self.assertEqual(message['type'], 'access_revoked')
+        self.assertEqual(message['project_id'], self.project.id)
+        closed = await communicator.receive_output()
+        self.assertEqual(closed, {'type': 'websocket.close', 'code': 4003})
+
+    async def test_stream_subscribe_is_filtered(self):
+        communicator, connected, _ = await self.connect(self.member, '/ws/stream/')
+        self.assertTrue(connected)
+        await communicator.receive_json_from()
+
+        await communicator.send_json_to({
+            'type': 'subscribe', 'project_ids': [self.project.id, self.other_project.id],
+        })
+        message = await communicator.receive_json_from()
+        self.assertEqual(message['project_ids'], [self.project.id])
+        self.assertEqual(message['denied'], [self.other_project.id])
+
+        await database_sync_to_async(self.reassign_bug)(self.outsider)
+        message = await communicator.receive_json_from()
+        self.assertEqual(message['type'], 'access_revoked')
+        self.assertEqual(message['subscriptions'], [])
+        await communicator.disconnect()
+
+    def test_batched_check_uses_one_query(self):
+        with self.assertNumQueries(1):
+            allowed = accessible_project_ids(self.member.id, [self.project.id, self.other_project.id])
+        self.assertEqual(allowed, {self.project.id})
+
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    TRACKER_WS_HEARTBEAT_SECONDS=0,
+    TRACKER_WS_ACK_WINDOW=2,
+    TRACKER_WS_MAX_LAG_SECONDS=0.2,
+)
+class ConsumerFlowControlTests(TestCase):
+    """Acked delivery window on the outbound queue"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.project = Project.objects.create(name='Tracker', description='', owner=self.owner)
+
+    async def connect(self):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/project/{self.project.id}/')
+        communicator.scope['user'] = self.owner
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()
+        return communicator
+
+    async def publish(self, count):
+        layer = get_channel_layer()
+        for n in range(count):
+            await layer.group_send(f'project_{self.project.id}', {
+                'type': 'comment_notification', 'user': 'other', 'comment': {'id': n}, 'bug': {},
+            })
+
+    async def test_per_message_work_is_skipped(self):
+        communicator = await self.connect()
+        logger = logging.getLogger('tracker.consumers')
+        with mock.patch.object(logger, 'isEnabledFor', return_value=False), \
+                mock.patch.object(logger, 'debug') as debug, \
+                mock.patch('tracker.consumers.datetime', wraps=datetime) as clock:
+            for _ in range(3):
+                await communicator.send_json_to({'type': 'ping'})
+                reply = await communicator.receive_json_from()
+                self.assertEqual(reply['type'], 'pong')
+        debug.assert_not_called()
+        # Formatted once a second at most, not once per ping
+        self.assertLessEqual(clock.fromtimestamp.call_count, 2)
+        self.assertNotIn('.', reply['server_time'])
+        await communicator.disconnect()
+
+    async def test_messages_carry_seq(self):
+        communicator = await self.connect()
+        await self.publish(2)
+        first = await communicator.receive_json_from()
+        second = await communicator.receive_json_from()
+        self.assertEqual((first['seq'], second['seq']), (1, 2))
+        await communicator.disconnect()
+
+    async def test_acking_client_gets_everything(self):
+        communicator = await self.connect()
+        await self.publish(1)
+        await communicator.send_json_to({'type': 'ack', 'seq': (await communicator.receive_json_from())['seq']})
+        await self.publish(5)
+        for expected in range(2, 7):
+            message = await communicator.receive_json_from()
+            self.assertEqual(message['seq'], expected)
+            await communicator.send_json_to({'type': 'ack', 'seq': message['seq']})
+        await communicator.disconnect()
+
+    async def test_stalled_client_is_disconnected(self):
+        communicator = await self.connect()
+        await self.publish(1)
+        await communicator.send_json_to({'type': 'ack', 'seq': (await communicator.receive_json_from())['seq']})
+        # The client stops acking: two messages fill its window, the rest wait
+        await self.publish(4)
+        self.assertEqual((await communicator.receive_json_from())['seq'], 2)
+        self.assertEqual((await communicator.receive_json_from())['seq'], 3)
+        message = await communicator.receive_json_from(timeout=2)
+        self.assertEqual(message['type'], 'resync_required')
+        closed = await communicator.receive_output(timeout=2)
+        self.assertEqual(closed, {'type': 'websocket.close', 'code': 4008})
+
+    async def test_client_that_never_acks_is_disconnected(self):
+        communicator = await self.connect()
+        await self.publish(4)
+        self.assertEqual((await communicator.receive_json_from())['seq'], 1)
+        self.assertEqual((await communicator.receive_json_from())['seq'], 2)
+        message = await communicator.receive_json_from(timeout=2)
+        self.assertEqual(message['type'], 'resync_required')
+        closed = await communicator.receive_output(timeout=2)
+        self.assertEqual(closed, {'type': 'websocket.close', 'code': 4008})
+
+    @override_settings(TRACKER_WS_ACK_WINDOW=0)
+    async def test_window_can_be_turned_off(self):
+        communicator = await self.connect()
+        await self.publish(4)
+        for expected in range(1, 5):
+            self.assertEqual((await communicator.receive_json_from())['seq'], expected)
+        await communicator.disconnect()
+
+    async def test_ack_beyond_sent_is_rejected(self):
+        communicator = await self.connect()
+        await communicator.send_json_to({'type': 'ack', 'seq': 5})
+        message = await communicator.receive_json_from()
+        self.assertEqual(message['type'], 'error')
+        await communicator.disconnect()
+
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    TRACKER_WS_HEARTBEAT_SECONDS=0.05,
+    TRACKER_WS_IDLE_TIMEOUT_SECONDS=0.2,
+)
+class HeartbeatTests(TestCase):
+    """Application heartbeats and the idle reaper"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.project = Project.objects.create(name='Tracker', description='', owner=self.owner)
+
+    async def connect(self):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/project/{self.project.id}/')
+        communicator.scope['user'] = self.owner
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()
+        return communicator
+
+    async def test_silent_client_is_reaped(self):
+        reaped = metrics.ws_reaped.value()
+        communicator = await self.connect()
+        while True:
+            output = await communicator.receive_output(timeout=2)
+            if output['type'] == 'websocket.close':
+                break
+            self.assertEqual(json.loads(output['text']), {'type': 'heartbeat'})
+        self.assertEqual(output['code'], 4002)
+        self.assertEqual(metrics.ws_reaped.value(), reaped + 1)
+        # Reaped sockets no longer receive project events
+        layer = get_channel_layer()
+        self.assertFalse(layer.groups.get(f'project_{self.project.id}'))
+
+    async def test_client_answering_heartbeats_stays(self):
+        reaped = metrics.ws_reaped.value()
+        communicator = await self.connect()
+        loop = asyncio.get_running_loop()
+        until = loop.time() + 0.5
+        while loop.time() < until:
+            message = await communicator.receive_json_from(timeout=1)
+            self.assertEqual(message['type'], 'heartbeat')
+            await communicator.send_json_to({'type': 'pong'})
+        self.assertEqual(metrics.ws_reaped.value(), reaped)
+        await communicator.disconnect()
+
+
+class _FakeRedis:
+    """Just enough of a redis connection for RedisChannelLayer.group_send"""
+
+    def __init__(self, channels, over_capacity):
+        self.channels = channels
+        self.over_capacity = over_capacity
+
+    async def zremrangebyscore(self, *args, **kwargs):
+        return 0
+
+    async def zrange(self, *args):
+        return [channel.encode() for channel in self.channels]
+
+    def pipeline(self):
+        pipe = mock.Mock()
+        pipe.execute = mock.AsyncMock(return_value=[])
+        return pipe
+
+    async def eval(self, *args):
+        return self.over_capacity
+
+
+class ChannelLayerDropMetricTests(TestCase):
+    """group_send drops on the Redis layer are counted from channels_redis's own report"""
+
+    def setUp(self):
+        self.core = logging.getLogger('channels_redis.core')
+        self.addCleanup(self.core.setLevel, self.core.level)
+        self.addCleanup(setattr, _redis_filter, 'level', _redis_filter.level)
+
+    def group_send(self, over_capacity):
+        layer = MeteredRedisChannelLayer(hosts=['redis://localhost:6379'])
+        redis = _FakeRedis(['specific.a!1', 'specific.b!2', 'specific.c!3'], over_capacity)
+        with mock.patch.object(layer, 'connection', return_value=redis):
+            asyncio.run(layer.group_send('project_7', {'type': 'bug.update'}))
+
+    def test_installed_channels_redis_reports_drops(self):
+        dropped = metrics.channel_messages_dropped.value(kind='group_send', group='project')
+        with self.assertLogs('channels_redis.core', 'INFO') as logs:
+            self.group_send(2)
+        self.assertEqual(logs.records[0].msg, OVER_CAPACITY_MESSAGE)
+        self.assertEqual(logs.records[0].args, (2, 3, 'project_7'))
+        self.assertEqual(metrics.channel_messages_dropped.value(kind='group_send', group='project'), dropped + 2)
+
+    def test_drops_are_counted_when_logging_is_above_info(self):
+        self.core.setLevel(logging.WARNING)
+        dropped = metrics.channel_messages_dropped.value(kind='group_send', group='project')
+        handler = mock.Mock(level=logging.NOTSET)
+        self.core.addHandler(handler)
+        self.addCleanup(self.core.removeHandler, handler)
+        self.group_send(1)
+        self.assertEqual(metrics.channel_messages_dropped.value(kind='group_send', group='project'), dropped + 1)
+        # The configured level still decides what is written
+        handler.handle.assert_not_called()
+        self.assertEqual(_redis_filter.level, logging.WARNING)
+
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    TRACKER_BUG_COALESCE_SECONDS=0,
+)
+class BugQueryCountTests(TestCase):
+    """Bug detail and update must not lazily load related rows"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        clear_local_user_summaries()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.reporter = User.objects.create_user('reporter', password='pass')
+        self.project = Project.objects.create(name='Tracker', description='', owner=self.owner)
+        self.bug = Bug.objects.create(
+            title='Crash', description='', project=self.project,
+            created_by=self.reporter, assigned_to=self.reporter,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_bug_detail_queries(self):
+        # bug row with its project and comment count, the owned-project set, one batch of user summaries
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/bugs/{self.bug.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created_by']['username'], 'reporter')
+
+        # the owned-project set and user summaries are cached across requests
+        with self.assertNumQueries(1):
+            self.client.get(f'/api/bugs/{self.bug.id}/')
+
+    def test_bug_update_queries(self):
+        # bug row, owned-project set, SAVEPOINT, UPDATE, RELEASE (save and rollups
+        # are one atomic block), user summaries, activity log INSERT
+        with self.assertNumQueries(7):
+            response = self.client.patch(f'/api/bugs/{self.bug.id}/', {'status': 'In Progress'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'In Progress')
+
+    def test_non_member_cannot_update(self):
+        outsider = User.objects.create_user('outsider', password='pass')
+        self.client.force_authenticate(outsider)
+        response = self.client.patch(f'/api/bugs/{self.bug.id}/', {'status': 'Closed'}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class ProjectListQueryCountTests(TestCase):
+    """The project list costs the same number of queries however many projects are visible"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        clear_local_user_summaries()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.member = User.objects.create_user('member', password='pass')
+        for i in range(30):
+            project = Project.objects.create(name=f'Project {i}', description='', owner=self.owner)
+            Bug.objects.create(
+                title='Crash', description='', project=project,
+                created_by=self.owner, assigned_to=self.member,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def test_project_list_queries(self):
+        # owned ids, assigned project ids, page count, page rows, owner summaries
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/projects/')
+        self.assertEqual(response.json()['count'], 30)
+        self.assertEqual(response.json()['results'][0]['bugs_count'], 1)
+
+        # the visible-project set and owner summaries are cached
+        with self.assertNumQueries(2):
+            self.client.get('/api/projects/')
+
+    def test_new_assignment_is_listed(self):
+        self.client.get('/api/projects/')
+        project = Project.objects.create(name='New', description='', owner=self.owner)
+        Bug.objects.create(title='Leak', description='', project=project, created_by=self.owner, assigned_to=self.member)
+        self.assertEqual(self.client.get('/api/projects/').json()['count'], 31)
+
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class UserSummaryCacheTests(TestCase):
+    """Nested users come from the summary cache and follow renames"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        clear_local_user_summaries()
+        self.users = [User.objects.create_user(f'user{i}', password='pass') for i in range(3)]
+
+    def test_batch_lookup_uses_one_query(self):
+        ids = [user.id for user in self.users]
+        with self.assertNumQueries(1):
+            summaries = user_summaries(ids)
+        self.assertEqual(summaries[ids[0]]['username'], 'user0')
+        with self.assertNumQueries(0):
+            user_summaries(ids)
+
+    def test_shared_cache_backs_the_local_lru(self):
+        user_summaries([self.users[0].id])
+        clear_local_user_summaries()
+        with self.assertNumQueries(0):
+            self.assertEqual(user_summary(self.users[0].id)['username'], 'user0')
+
+    def test_save_invalidates_summary(self):
+        user = self.users[0]
+        user_summary(user.id)
+        user.username = 'renamed'
+        user.save()
+        self.assertEqual(user_summary(user.id)['username'], 'renamed')
+
+    def test_login_does_not_invalidate(self):
+        user = self.users[0]
+        user_summary(user.id)
+        user.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            user_summary(user.id)
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+        TRACKER_USER_SUMMARY_CACHE_SIZE=0,
+    )
+    def test_async_views_render_users_from_what_they_loaded(self):
+        # Neither cache keeps anything, so a fallback lookup would query from the event loop
+        project = Project.objects.create(name='Tracker', description='', owner=self.users[0])
+        bug = Bug.objects.create(title='Crash', description='x', project=project, created_by=self.users[0],
+                                 assigned_to=self.users[1])
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.users[0])}'}
+        listed = self.client.get('/api/async/bugs/', **headers)
+        self.assertEqual(listed.status_code, 200)
+        self.assertEqual(listed.json()['results'][0]['assigned_to']['username'], 'user1')
+        detail = self.client.get(f'/api/async/bugs/{bug.id}/', **headers)
+        self.assertEqual(detail.json()['created_by']['username'], 'user0')
+
+    def test_schema_documents_nested_users_as_objects(self):
+        schema.clear_schema_cache()
+        self.addCleanup(schema.clear_schema_cache)
+        created_by = schema.api_schema()['definitions']['Bug']['properties']['created_by']
+        self.assertEqual(created_by['type'], 'object')
+        self.assertEqual(created_by['properties']['username'], {'type': 'string'})
+        self.assertTrue(created_by['x-nullable'])
+
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    TRACKER_BUG_COALESCE_SECONDS=60,
+)
+class BugUpdateCoalescingTests(TestCase):
+    """Rapid edits of one bug produce one notification and one activity entry"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        clear_local_user_summaries()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.triager = User.objects.create_user('triager', password='pass')
+        self.project = Project.objects.create(name='Tracker', description='', owner=self.owner)
+        self.bug = Bug.objects.create(title='Crash', description='', project=self.project, created_by=self.triager)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        patcher = mock.patch('tracker.coalescing.group_send')
+        self.group_send = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(bug_updates.discard, self.bug.id)
+
+    def patch(self, **data):
+        response = self.client.patch(f'/api/bugs/{self.bug.id}/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_updates_in_window_are_merged(self):
+        self.patch(status='In Progress')
+        self.patch(priority='High')
+        self.patch(status='Resolved')
+        self.group_send.assert_not_called()
+
+        bug_updates.flush(self.bug.id)
+        self.group_send.assert_called_once()
+        group, event = self.group_send.call_args.args
+        self.assertEqual(group, f'project_{self.project.id}')
+        self.assertEqual(event['event_type'], 'bug_status_changed')
+        self.assertEqual((event['old_status'], event['new_status']), ('Open', 'Resolved'))
+        self.assertEqual(event['changed_fields'], ['status', 'priority'])
+        self.assertEqual(event['updates'], 3)
+        self.assertEqual(event['bug']['status'], 'Resolved')
+
+        log = ActivityLog.objects.get(action='updated', entity_id=self.bug.id)
+        self.assertEqual(log.details['updates'], 3)
+        self.assertEqual(log.details['status'], 'Resolved')
+
+    def test_another_user_flushes_the_window(self):
+        self.patch(priority='High')
+        self.client.force_authenticate(self.triager)
+        self.patch(priority='Low')
+        self.group_send.assert_called_once()
+        self.assertEqual(self.group_send.call_args.args[1]['user'], 'owner')
+        self.assertEqual(ActivityLog.objects.filter(action='updated', entity_id=self.bug.id).count(), 2)
+
+    def test_scheduler_closes_windows(self):
+        sent = threading.Event()
+        self.group_send.side_effect = lambda *args: sent.set()
+        with override_settings(TRACKER_BUG_COALESCE_SECONDS=0.5):
+            self.patch(priority='High')
+            self.patch(priority='Low')
+        self.assertTrue(sent.wait(2))
+        self.assertEqual(self.group_send.call_args.args[1]['updates'], 2)
+        schedulers = [thread for thread in threading.enumerate() if thread.name == 'tracker-bug-coalescing']
+        self.assertEqual(len(schedulers), 1)
+
+    def test_activity_is_written_outside_the_lock(self):
+        window = bug_updates.record(self.bug, self.owner, bug_edit_state(self.bug), bug_edit_state(self.bug), {})
+        writes = []
+
+        def write(activity_id, state, changed_fields, updates):
+            # Other bugs' edits and the scheduler are not held up by this write
+            self.assertTrue(bug_updates._lock.acquire(blocking=False))
+            bug_updates._lock.release()
+            writes.append((activity_id, updates))
+            if len(writes) == 1:
+                # A request that lands mid-write leaves the entry to this one
+                window.updates += 1
+                bug_updates.fold_activity(window, self.fail)
+            return 41
+
+        bug_updates.fold_activity(window, write)
+        self.assertEqual(writes, [(None, 1), (41, 2)])
+        self.assertEqual(window.activity_id, 41)
+        self.assertFalse(window.activity_writing)
+
+    def test_pending_windows_are_sent_at_exit(self):
+        self.patch(priority='High')
+        with mock.patch('tracker.coalescing.agroup_send', new_callable=mock.AsyncMock) as agroup_send:
+            flush_at_exit()
+        group, event = agroup_send.await_args.args
+        self.assertEqual(group, f'project_{self.project.id}')
+        self.assertEqual(event['changed_fields'], ['priority'])
+        self.assertEqual(bug_updates.take_all(), [])
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    TRACKER_BUG_COALESCE_SECONDS=0,
+)
+class AnalyticsTests(TestCase):
+    """Bug writes keep the rollups current; the dashboard reads only the rollups"""
+
+    def setUp(self):
+        cache.clear()
+        clear_local_user_summaries()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.member = User.objects.create_user('member', password='pass')
+        self.project = Project.objects.create(name='Tracker', description='', owner=self.owner)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def create_bug(self, **data):
+        response = self.client.post('/api/bugs/', {
+            'title': 'Crash', 'description': 'Stack trace attached', 'project': self.project.id, **data,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def analytics(self):
+        response = self.client.get(f'/api/projects/{self.project.id}/analytics/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_writes_update_the_rollups(self):
+        first = self.create_bug(priority='High', assigned_to_id=self.member.id)
+        self.create_bug(priority='Low')
+        data = self.analytics()
+        self.assertEqual(data['open_by_priority']['High'], 1)
+        self.assertEqual(data['open_total'], 2)
+        self.assertEqual(data['top_assignees'], [
+            {'user_id': self.member.id, 'username': 'member', 'open': 1, 'resolved': 0},
+        ])
+
+        self.client.patch(f'/api/bugs/{first}/', {'status': 'Resolved'}, format='json')
+        data = self.analytics()
+        self.assertEqual(data['open_total'], 1)
+        self.assertEqual(data['resolved_total'], 1)
+        self.assertEqual(data['resolved_per_day'], [{'day': timezone.localdate().isoformat(), 'resolved': 1}])
+        self.assertEqual(data['top_assignees'][0]['resolved'], 1)
+
+        self.assertEqual(self.client.delete(f'/api/bugs/{first}/').status_code, 202)
+        data = self.analytics()
+        self.assertEqual((data['open_total'], data['resolved_total'], data['top_assignees']), (1, 0, []))
+
+    def test_failed_rollup_rolls_back_the_bug(self):
+        bug_id = self.create_bug(priority='High')
+        with mock.patch('tracker.views.apply_bug_change', side_effect=RuntimeError('rollup failed')):
+            with self.assertRaises(RuntimeError):
+                self.client.patch(f'/api/bugs/{bug_id}/', {'priority': 'Low'}, format='json')
+        self.assertEqual(Bug.objects.get(id=bug_id).priority, 'High')
+        self.assertEqual(self.analytics()['open_by_priority']['High'], 1)
+
+    def test_migration_backfills_existing_bugs(self):
+        self.create_bug(priority='High', assigned_to_id=self.member.id)
+        self.create_bug(priority='High', status='Resolved')
+        expected = self.analytics()
+        for model in (PriorityRollup, DailyResolutionRollup, AssigneeRollup):
+            model.objects.all().delete()
+
+        migration = importlib.import_module('tracker.migrations.0010_backfill_analytics_rollups')
+        migration.backfill_rollups(django_apps, None)
+        self.assertEqual(self.analytics(), expected)
+
+    def test_unresolved_assignee_is_listed_without_a_name(self):
+        self.create_bug(assigned_to_id=self.member.id)
+        with mock.patch('tracker.analytics.user_summaries', return_value={}):
+            data = self.analytics()
+        self.assertEqual(data['top_assignees'], [
+            {'user_id': self.member.id, 'username': None, 'open': 1, 'resolved': 0},
+        ])
+
+    def test_days_must_be_an_integer(self):
+        response = self.client.get(f'/api/projects/{self.project.id}/analytics/?days=week')
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_analytics_repairs_drift(self):
+        self.create_bug(priority='High', assigned_to_id=self.member.id)
+        self.create_bug(priority='High', status='Resolved')
+        expected = self.analytics()
+        # Rows written around the views, e.g. by a bulk import
+        Bug.objects.create(title='Imported', description='', project=self.project, created_by=self.owner, priority='Low')
+        PriorityRollup.objects.filter(project=self.project).delete()
+
+        call_command('rebuild_analytics', project=[self.project.id], stdout=StringIO())
+        data = self.analytics()
+        self.assertEqual(data['open_by_priority'], {**expected['open_by_priority'], 'Low': 1})
+        self.assertEqual(data['resolved_total'], expected['resolved_total'])
+        self.assertEqual(data['top_assignees'], expected['top_assignees'])
+
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ImportTrackerDataTests(TestCase):
+    """import_tracker_data rejects bad rows one at a time and keeps ids usable"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.project = Project.objects.create(name='Tracker', description='', owner=self.owner)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'export.jsonl')
+
+    def bug(self, **fields):
+        return {'type': 'bug', 'project': self.project.id, 'title': 'Crash', 'created_by': self.owner.id, **fields}
+
+    def run_import(self, rows, **options):
+        with open(self.path, 'w') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+        stderr = StringIO()
+        call_command('import_tracker_data', self.path, stdout=StringIO(), stderr=stderr, **options)
+        return stderr.getvalue()
+
+    def test_bad_rows_are_rejected_and_the_rest_imported(self):
+        existing = Bug.objects.create(title='Old', description='', project=self.project, created_by=self.owner)
+        errors = self.run_import([
+            self.bug(id=500),
+            self.bug(id=500),                       # repeated in the file
+            self.bug(id=existing.id),               # already in the table
+            self.bug(title=123),                    # not a string
+            self.bug(project=[self.project.id]),    # not an id
+            self.bug(id='7'),
+            {'type': 'comment', 'bug': 500, 'commenter': self.owner.id, 'message': 'Seen it'},
+            {'type': 'comment', 'bug': 999, 'commenter': self.owner.id, 'message': 'Lost'},
+        ])
+        self.assertEqual(sorted(Bug.objects.values_list('id', flat=True)), [existing.id, 500])
+        self.assertEqual(Comment.objects.get().bug_id, 500)
+        for line in (2, 3, 4, 5, 6, 8):
+            self.assertIn(f'Line {line}:', errors)
+        self.assertNotIn('Line 1:', errors)
+
+    def test_database_errors_reject_single_rows(self):
+        Bug.objects.create(id=600, title='Old', description='', project=self.project, created_by=self.owner)
+        # As if the row appeared between validation and insert
+        with mock.patch('tracker.management.commands.import_tracker_data.Command._taken_ids', return_value=set()):
+            errors = self.run_import([self.bug(id=600), self.bug(id=601), self.bug()])
+        self.assertIn('Line 1: rejected by the database', errors)
+        self.assertEqual(Bug.objects.count(), 3)
+        self.assertEqual(Bug.objects.get(id=601).title, 'Crash')
+
+    def test_sequences_are_reset_after_explicit_ids(self):
+        with mock.patch.object(connection.ops, 'sequence_reset_sql', return_value=[]) as reset:
+            self.run_import([self.bug()])
+            reset.assert_not_called()
+            self.run_import([self.bug(id=700)])
+        self.assertEqual(reset.call_args.args[1], [Bug])
+        created = Bug.objects.create(title='New', description='', project=self.project, created_by=self.owner)
+        self.assertGreater(created.id, 700)
+
+    def test_too_many_errors_aborts(self):
+        with self.assertRaises(CommandError):
+            self.run_import([self.bug(title=None)] * 3, max_errors=2)
+
+    def test_resume_needs_the_checkpointed_file(self):
+        checkpoint = f'{self.path}.checkpoint'
+        self.run_import([self.bug()], checkpoint=checkpoint)
+        other = os.path.join(os.path.dirname(self.path), 'other.jsonl')
+        with open(other, 'w') as f:
+            f.write(json.dumps(self.bug()) + '\n')
+        with self.assertRaisesMessage(CommandError, 'belongs to'):
+            call_command('import_tracker_data', other, checkpoint=checkpoint, resume=True, stdout=StringIO())
+        self.run_import([self.bug(), self.bug(title='Second')], checkpoint=checkpoint, resume=True)
+        self.assertEqual(list(Bug.objects.values_list('title', flat=True).order_by('id')), ['Crash', 'Second'])
+
+    def test_deleted_projects_and_bugs_take_no_rows(self):
+        deleted = Project.objects.create(name='Gone', description='', owner=self.owner, deleted_at=timezone.now())
+        hidden = Bug.objects.create(title='Hidden', description='', project=self.project, created_by=self.owner,
+                                    deleted_at=timezone.now())
+        errors = self.run_import([
+            self.bug(project=deleted.id),
+            {'type': 'comment', 'bug': hidden.id, 'commenter': self.owner.id, 'message': 'Late'},
+            self.bug(),
+        ])
+        self.assertIn('Line 1: unknown project', errors)
+        self.assertIn('Line 2: unknown bug', errors)
+        self.assertFalse(Bug.objects.filter(project=deleted).exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(Bug.objects.filter(title='Crash').count(), 1)
+
+    def test_resolved_bugs_count_as_resolved(self):
+        errors = self.run_import([
+            self.bug(id=801, status='Resolved', resolved_at='2024-03-02T10:00:00Z'),
+            self.bug(id=802, status='Resolved'),
+            self.bug(id=803, status='Open', resolved_at='2024-03-02T10:00:00Z'),
+            self.bug(id=804, status='Resolved', resolved_at='yesterday'),
+        ])
+        self.assertIn('Line 4: invalid resolved_at', errors)
+        resolved = dict(Bug.objects.values_list('id', 'resolved_at'))
+        self.assertEqual(resolved[801].isoformat(), '2024-03-02T10:00:00+00:00')
+        self.assertIsNotNone(resolved[802])
+        self.assertIsNone(resolved[803])
+        self.assertEqual(
+            sum(DailyResolutionRollup.objects.filter(project=self.project).values_list('resolved_count', flat=True)), 2,
+        )
+
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ActivityArchiveTests(TestCase):
+    """archive_activity_logs deletes a month only once its archive is durable"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.project = Project.objects.create(name='Tracker', description='', owner=self.owner)
+        self.old = [self.log(days_ago=400) for _ in range(3)]
+        self.recent = self.log(days_ago=1)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output_dir = directory.name
+
+    def log(self, days_ago):
+        log = ActivityLog.objects.create(
+            project=self.project, user=self.owner, action='updated', entity_type='bug', entity_id=1,
+            details={'status': 'Open'},
+        )
+        ActivityLog.objects.filter(id=log.id).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return log.id
+
+    def archive(self, **options):
+        call_command('archive_activity_logs', days=30, output_dir=self.output_dir, stdout=StringIO(), **options)
+
+    def archived_ids(self):
+        ids = []
+        for name in sorted(os.listdir(self.output_dir)):
+            with gzip.open(os.path.join(self.output_dir, name), 'rt', encoding='utf-8') as f:
+                ids += [json.loads(line)['id'] for line in f]
+        return ids
+
+    def test_gzip_month_is_written_then_deleted(self):
+        self.archive(batch_size=2)
+        self.assertEqual(self.archived_ids(), self.old)
+        self.assertEqual(list(ActivityLog.objects.values_list('id', flat=True)), [self.recent])
+        self.assertTrue(all(name.endswith('.jsonl.gz') for name in os.listdir(self.output_dir)))
+
+    def test_rerun_keeps_the_earlier_archive(self):
+        self.archive()
+        late = self.log(days_ago=400)
+        self.archive()
+        self.assertEqual(sorted(self.archived_ids()), sorted(self.old + [late]))
+
+    def test_failed_rename_deletes_nothing(self):
+        with mock.patch('tracker.management.commands.archive_activity_logs.os.replace', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                self.archive()
+        self.assertEqual(ActivityLog.objects.count(), 4)
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+    def test_sqlite_tables(self):
+        self.archive(format='sqlite')
+        self.archive(format='sqlite')  # nothing left, nothing duplicated
+        self.assertEqual(list(ActivityLog.objects.values_list('id', flat=True)), [self.recent])
+        month = (timezone.now() - timedelta(days=400)).strftime('%Y_%m')
+        connection = sqlite3.connect(os.path.join(self.output_dir, 'activity_archive.sqlite3'))
+        self.addCleanup(connection.close)
+        rows = connection.execute(f'SELECT id, details FROM activity_{month} ORDER BY id').fetchall()
+        self.assertEqual([row[0] for row in rows], self.old)
+        self.assertEqual(json.loads(rows[0][1]), {'status': 'Open'})
+
+    def test_activity_list_needs_no_distinct(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        self.assertEqual(client.get('/api/activity_logs/').json()['count'], 4)
+        self.assertNotIn('DISTINCT', str(ActivityLogViewSet(
+            request=mock.Mock(user=self.owner), format_kwarg=None,
+        ).get_queryset().query))
+
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class NotificationReadTests(TestCase):
+    """Marking notifications read moves updated_at, which sync clients poll on"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reader', password='pass')
+        project = Project.objects.create(name='Tracker', description='', owner=self.user)
+        self.notifications = [
+            Notification.objects.create(recipient=self.user, notification_type='new_comment', project=project)
+            for _ in range(2)
+        ]
+        Notification.objects.filter(recipient=self.user).update(updated_at=timezone.now() - timedelta(days=1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertTouched(self, notification, read):
+        notification.refresh_from_db()
+        self.assertEqual(notification.is_read, read)
+        self.assertEqual(notification.updated_at > timezone.now() - timedelta(minutes=1), read)
+
+    def test_mark_read(self):
+        first, second = self.notifications
+        response = self.client.post(f'/api/notifications/{first.id}/mark_read/')
+        self.assertEqual(response.json(), {'marked_read': 1})
+        self.assertTouched(first, True)
+        self.assertTouched(second, False)
+
+    def test_mark_all_read(self):
+        response = self.client.post('/api/notifications/mark_all_read/')
+        self.assertEqual(response.json(), {'marked_read': 2})
+        for notification in self.notifications:
+            self.assertTouched(notification, True)
+
+
+# The prod profile's swap of the browser middleware for their API-skipping subclasses
+PROD_MIDDLEWARE = [
+    {
+        'django.contrib.sessions.middleware.SessionMiddleware': 'tracker.middleware.WebSessionMiddleware',
+        'django.middleware.csrf.CsrfViewMiddleware': 'tracker.middleware.WebCsrfViewMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware': 'tracker.middleware.WebAuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware': 'tracker.middleware.WebMessageMiddleware',
+        'django.middleware.clickjacking.XFrameOptionsMiddleware': 'tracker.middleware.WebXFrameOptionsMiddleware',
+    }.get(path, path)
+    for path in settings.MIDDLEWARE
+]
+
+
+@override_settings(
+    MIDDLEWARE=PROD_MIDDLEWARE,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class APIBypassMiddlewareTests(TestCase):
+    """API paths skip session, CSRF, auth, messages and X-Frame-Options; web pages keep them"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('client', password='pass')
+        self.client = self.client_class(enforce_csrf_checks=True)
+        self.auth = f'Bearer {AccessToken.for_user(self.user)}'
+
+    def test_api_requests_skip_the_browser_middleware(self):
+        response = self.client.post('/api/projects/', {'name': 'Tracker', 'description': 'x'},
+                                    content_type='application/json', HTTP_AUTHORIZATION=self.auth)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('X-Frame-Options', response)
+        self.assertNotIn('sessionid', response.cookies)
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+
+    def test_web_pages_keep_the_browser_middleware(self):
+        response = self.client.get('/admin/login/')
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+        self.assertIn('csrftoken', response.cookies)
+        response = self.client.post('/admin/login/', {'username': 'client', 'password': 'pass'})
+        self.assertEqual(response.status_code, 403)
+
+    async def test_async_chain(self):
+        response = await self.async_client.get('/api/async/bugs/', headers={'Authorization': self.auth})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Frame-Options', response)
+        response = await self.async_client.get('/admin/login/')
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+
+
+
+class MetricsEndpointTests(TestCase):
+    """/metrics needs the scrape token unless DEBUG is on"""
+
+    @override_settings(TRACKER_METRICS_TOKEN='', DEBUG=False)
+    def test_closed_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(TRACKER_METRICS_TOKEN='', DEBUG=True)
+    def test_open_in_debug(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'tracker_ws_connections', response.content)
+
+    @override_settings(TRACKER_METRICS_TOKEN='scrape')
+    def test_token_is_required(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape').status_code, 200)
+
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SchemaCacheTests(TestCase):
+    def setUp(self):
+        schema.clear_schema_cache()
+        self.addCleanup(schema.clear_schema_cache)
+
+    def test_schema_is_generated_once_and_revalidated_by_etag(self):
+        with mock.patch.object(schema, 'encode_schema', wraps=schema.encode_schema) as encode:
+            first = self.client.get('/swagger.json/')
+            second = self.client.get('/swagger/?format=openapi')
+        self.assertEqual(encode.call_count, 1)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertIn('/bugs/', json.loads(first.content)['paths'])
+
+        revalidated = self.client.get('/swagger.json/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_built_document_is_served_from_disk(self):
+        with tempfile.TemporaryDirectory() as schema_dir, override_settings(TRACKER_SCHEMA_DIR=schema_dir):
+            with open(os.path.join(schema_dir, 'swagger.yaml'), 'wb') as f:
+                f.write(b'swagger: "2.0"\n')
+            response = self.client.get('/swagger.yaml/')
+        self.assertEqual(response.content, b'swagger: "2.0"\n')
+        self.assertEqual(response['Content-Type'], 'application/yaml')
+
+    def test_ui_pages_do_not_generate_the_schema(self):
+        with mock.patch.object(schema, 'api_schema', side_effect=AssertionError('schema generated')):
+            for url in ('/swagger/', '/redoc/'):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Bug Tracker API')
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {'user': '100/min', 'bug_list': '2/min', 'activity_list': None},
+    },
+)
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('poller', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bug_list_is_limited_per_user_across_sync_and_async(self):
+        self.assertEqual(self.client.get('/api/bugs/').status_code, 200)
+        token = AccessToken.for_user(self.user)
+        response = self.client.get('/api/async/bugs/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+
+        throttled = self.client.get('/api/bugs/')
+        self.assertEqual(throttled.status_code, 429)
+        self.assertIn('Retry-After', throttled)
+        response = self.client.get('/api/async/bugs/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], throttled['Retry-After'])
+
+        # Other endpoints and other users keep their own budgets
+        self.assertEqual(self.client.get('/api/projects/').status_code, 200)
+        self.client.force_authenticate(User.objects.create_user('other', password='pass'))
+        self.assertEqual(self.client.get('/api/bugs/').status_code, 200)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AsyncFilterTests(TestCase):
+    """The async bug lists reject the filter values the DRF list rejects, with the same body"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reporter', password='pass')
+        project = Project.objects.create(name='Tracker', description='', owner=self.user)
+        Bug.objects.create(title='Crash', description='x', project=project, created_by=self.user,
+                           assigned_to=self.user, status='Open', priority='High')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def test_unknown_choices_are_rejected_like_drf(self):
+        for query in ('status=open', 'priority=zz&project=abc', 'status=Done&priority=High'):
+            expected = self.client.get(f'/api/bugs/?{query}')
+            self.assertEqual(expected.status_code, 400)
+            for url in ('/api/async/bugs/', '/api/async/bugs/assigned_to_me/'):
+                response = self.client.get(f'{url}?{query}', **self.headers)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), expected.json())
+
+    def test_valid_choices_filter(self):
+        response = self.client.get('/api/async/bugs/?status=Open&priority=High', **self.headers)
+        self.assertEqual(response.json()['count'], 1)
+        response = self.client.get('/api/async/bugs/?priority=Low', **self.headers)
+        self.assertEqual(response.json()['count'], 0)
+
+    def test_activity_date_range_and_ordering_match_drf(self):
+        project = Project.objects.get()
+        old = ActivityLog.objects.create(project=project, user=self.user, action='created', entity_type='bug', entity_id=1)
+        ActivityLog.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=5))
+        ActivityLog.objects.create(project=project, user=self.user, action='updated', entity_type='bug', entity_id=1)
+        since = (timezone.now() - timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S')
+        for query in (f'created_at__gte={since}', f'created_at__lt={since}', 'ordering=created_at',
+                      'ordering=-created_at,bogus', 'created_at__gte=yesterday'):
+            expected = self.client.get(f'/api/activity_logs/?{query}')
+            response = self.client.get(f'/api/async/activity_logs/?{query}', **self.headers)
+            self.assertEqual(response.status_code, expected.status_code, query)
+            self.assertEqual(response.json(), expected.json(), query)
+
+    def test_invalid_pages_are_not_found_like_drf(self):
+        for query in ('page=abc', 'page=0', 'page=2', 'page=1.0'):
+            expected = self.client.get(f'/api/bugs/?{query}')
+            self.assertEqual(expected.status_code, 404)
+            response = self.client.get(f'/api/async/bugs/?{query}', **self.headers)
+            self.assertEqual(response.status_code, 404, query)
+            self.assertEqual(response.json(), expected.json())
+        self.assertEqual(self.client.get('/api/async/bugs/?page=last', **self.headers).json()['count'], 1)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def start_leader(self, flights, load):
+        leader = threading.Thread(target=lambda: self.outcomes.append(self.capture(flights, load)))
+        leader.start()
+        self.addCleanup(leader.join, 5)
+        return leader
+
+    def capture(self, flights, load):
+        try:
+            return flights.do(('bug_list', 1), load)
+        except Exception as e:
+            return e
+
+    def test_overlapping_calls_share_one_result(self):
+        flights = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def load():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'count': 1}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flights.do(('bug_list', 1), load)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(flights.do(('bug_list', 1), load)))
+        follower.start()
+        # The follower is parked on the leader's call; another user's key runs on its own
+        self.assertEqual(flights.do(('bug_list', 2), lambda: 'other'), 'other')
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 2)
+        self.assertIs(results[0], results[1])
+        # Finished calls are forgotten
+        self.assertEqual(flights.do(('bug_list', 1), lambda: 'fresh'), 'fresh')
+
+    def test_async_callers_share_one_task(self):
+        flights = SingleFlight()
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'page'
+
+        async def run():
+            return await asyncio.gather(*(flights.ado(('activity_list', 1), load) for _ in range(3)))
+
+        self.assertEqual(asyncio.run(run()), ['page'] * 3)
+        self.assertEqual(len(calls), 1)
+
+    def test_waiters_get_their_own_exception(self):
+        flights = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        self.outcomes = []
+
+        def fail():
+            started.set()
+            release.wait(5)
+            raise ValueError('database went away')
+
+        leader = self.start_leader(flights, fail)
+        started.wait(5)
+        follower = threading.Thread(target=lambda: self.outcomes.append(self.capture(flights, fail)))
+        follower.start()
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        first, second = self.outcomes
+        self.assertIsInstance(first, ValueError)
+        self.assertIsInstance(second, ValueError)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.args, ('database went away',))
+
+    def test_own_write_is_not_hidden_by_an_older_call(self):
+        flights = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        self.outcomes = []
+
+        def stale():
+            started.set()
+            release.wait(5)
+            return 'before the write'
+
+        self.start_leader(flights, stale)
+        started.wait(5)
+        note_write(1)
+        self.assertEqual(flights.do(('bug_list', 1), lambda: 'after the write'), 'after the write')
+        release.set()
+
+    def test_writes_are_stamped_by_the_middleware(self):
+        owner = User.objects.create_user('owner', password='pass')
+        project = Project.objects.create(name='Tracker', description='', owner=owner)
+        client = APIClient()
+        client.force_authenticate(owner)
+        client.get('/api/projects/')
+        self.assertIsNone(cache.get(recent_write_key(owner.id)))
+        client.patch(f'/api/projects/{project.id}/', {'name': 'Renamed'}, format='json')
+        self.assertIsNotNone(cache.get(recent_write_key(owner.id)))
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    TRACKER_DELETION_IN_PROCESS=False,
+)
+class SoftDeleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.member = User.objects.create_user('member', password='pass')
+        self.project = Project.objects.create(name='Tracker', description='', owner=self.owner)
+        self.bugs = [
+            Bug.objects.create(
+                title=f'Bug {i}', description='', project=self.project,
+                created_by=self.owner, assigned_to=self.member,
+            )
+            for i in range(3)
+        ]
+        for bug in self.bugs:
+            Comment.objects.create(bug=bug, commenter=self.member, message='Seen it')
+            ActivityLog.objects.create(
+                project=self.project, user=self.owner, action='created', entity_type='bug', entity_id=bug.id,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_project_is_hidden_at_once_and_removed_in_batches(self):
+        member = APIClient()
+        member.force_authenticate(self.member)
+        self.assertEqual(member.get('/api/projects/').json()['count'], 1)
+
+        response = self.client.delete(f'/api/projects/{self.project.id}/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'pending')
+
+        self.assertTrue(Project.objects.filter(id=self.project.id).exists())
+        self.assertEqual(member.get('/api/projects/').json()['count'], 0)
+        self.assertEqual(member.get('/api/bugs/').json()['count'], 0)
+        self.assertEqual(self.client.get('/api/activity_logs/').json()['count'], 0)
+        self.assertEqual(self.client.get('/api/comments/').json()['count'], 0)
+        response = self.client.post('/api/bugs/', {'title': 'Late', 'description': '', 'project': self.project.id})
+        self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(run_pending(batch_size=2, pause=0), 1)
+        job = DeletionJob.objects.get()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(
+            job.deleted_counts,
+            {'comment': 3, 'activity_log': 3, 'bug': 3, 'project': 1},
+        )
+        self.assertFalse(Project.objects.filter(id=self.project.id).exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(self.client.get(f'/api/deletion_jobs/{job.id}/').json()['step'], '')
+
+    def test_bug_delete_keeps_the_project(self):
+        bug = self.bugs[0]
+        self.assertEqual(self.client.delete(f'/api/bugs/{bug.id}/').status_code, 202)
+        self.assertEqual(self.client.get(f'/api/bugs/{bug.id}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/projects/{self.project.id}/').json()['bugs_count'], 2)
+
+        run_pending(pause=0)
+        self.assertEqual(DeletionJob.objects.get().deleted_counts, {'comment': 1, 'bug': 1})
+        self.assertEqual(Bug.objects.filter(project=self.project).count(), 2)
+
+    def test_job_for_a_live_row_fails_and_deletes_nothing(self):
+        job = DeletionJob.objects.create(entity_type='project', entity_id=self.project.id)
+        with self.settings(TRACKER_DELETION_MAX_ATTEMPTS=1):
+            self.assertEqual(run_pending(pause=0), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+        self.assertIn('not soft-deleted', job.error)
+        self.assertEqual(Bug.objects.filter(project=self.project).count(), 3)
+
+    def test_second_delete_reuses_the_job_and_rollups_move_once(self):
+        rebuild()
+        bug = self.bugs[0]
+        first = soft_delete_bug(bug, self.owner)
+        # A request that loaded the bug before the first delete committed
+        self.assertEqual(soft_delete_bug(bug, self.owner), first)
+        self.assertEqual(DeletionJob.objects.count(), 1)
+        self.assertEqual(PriorityRollup.objects.get(project=self.project).open_count, 2)
+
+        job = soft_delete_project(self.project, self.owner)
+        self.assertEqual(soft_delete_project(self.project, self.owner), job)
+
+    def test_deleted_assignments_grant_no_activity(self):
+        member = APIClient()
+        member.force_authenticate(self.member)
+        self.assertEqual(member.get('/api/activity_logs/').json()['count'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            for bug in self.bugs:
+                soft_delete_bug(bug, self.owner)
+        self.assertEqual(member.get('/api/activity_logs/').json()['count'], 0)
+
+
 if __name__ == "__main__":
     success = asyncio.run(test_middleware())
     if success:
@@ -0,0 +1,66 @@
+"""
+Rate limits for the REST API and the async read endpoints.
+
+History is kept in the default cache (Redis), so limits hold across
+workers. Rates are read from ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`` on
+every check rather than at import, so they follow ``override_settings``. A
+rate of None turns a scope off.
+"""
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from rest_framework import throttling
+from rest_framework.exceptions import Throttled
+from rest_framework.settings import api_settings
+
+from . import metrics
+
+
+class SettingsRatesMixin:
+    @property
+    def THROTTLE_RATES(self):
+        return api_settings.DEFAULT_THROTTLE_RATES
+
+    def throttle_failure(self):
+        metrics.requests_throttled.inc(scope=self.scope)
+        return super().throttle_failure()
+
+
+class UserRateThrottle(SettingsRatesMixin, throttling.UserRateThrottle):
+    """All requests of one user (one client IP when anonymous), scope ``user``"""
+
+
+class EndpointRateThrottle(SettingsRatesMixin, throttling.ScopedRateThrottle):
+    """
+    Requests of one user to one endpoint. Views name their scope with
+    ``throttle_scope``; viewsets can limit single actions with
+    ``throttle_scopes = {'list': 'bug_list'}``. Views without a scope are not limited.
+    """
+
+    def allow_request(self, request, view):
+        scopes = getattr(view, 'throttle_scopes', {})
+        scope = scopes.get(getattr(view, 'action', None)) or getattr(view, self.scope_attr, None)
+        if not scope:
+            return True
+        self.scope = scope
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super(throttling.ScopedRateThrottle, self).allow_request(request, view)
+
+
+async def athrottle(request, scope=None):
+    """
+    Run the default throttle classes for an async view, as DRF would for
+    a view with ``throttle_scope = scope``. Returns the Throttled exception
+    to answer with, or None when the request may proceed.
+    """
+    view = SimpleNamespace(throttle_scope=scope)
+    waits = []
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        # Cache reads and writes are blocking; keep them off the event loop
+        if not await sync_to_async(throttle.allow_request, thread_sensitive=False)(request, view):
+            waits.append(throttle.wait())
+    if not waits:
+        return None
+    return Throttled(max((wait for wait in waits if wait is not None), default=None))
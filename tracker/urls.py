@@ -1,18 +1,29 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'projects', views.ProjectViewSet, basename='project')
 router.register(r'bugs', views.BugViewSet, basename='bug')
 router.register(r'comments', views.CommentViewSet, basename='comment')
 router.register(r'activity_logs', views.ActivityLogViewSet, basename='activity_log')
+router.register(r'notifications', views.NotificationViewSet, basename='notification')
+router.register(r'deletion_jobs', views.DeletionJobViewSet, basename='deletion_job')
 
 urlpatterns = [
     # API endpoints
     path('api/', include(router.urls)),
     
+    # Async-native read endpoints (see tracker/async_views.py)
+    path('api/async/bugs/', async_views.bug_list, name='async_bug_list'),
+    path('api/async/bugs/assigned_to_me/', async_views.assigned_to_me, name='async_bugs_assigned_to_me'),
+    path('api/async/bugs/<int:pk>/', async_views.bug_detail, name='async_bug_detail'),
+    path('api/async/bugs/<int:pk>/comments/', async_views.bug_comments, name='async_bug_comments'),
+    path('api/async/activity_logs/', async_views.activity_log_list, name='async_activity_log_list'),
+    path('api/metrics/requests/', views.RequestMetricsView.as_view(), name='request_metrics'),
+    path('metrics', views.prometheus_metrics, name='prometheus_metrics'),
+    
     # Authentication endpoints
     path('api/auth/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
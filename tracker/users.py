@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+
+# What UserSerializer renders for a nested user
+USER_SUMMARY_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name')
+USER_SUMMARY_TIMEOUT = 60 * 60
+
+# user_id -> (expires_at, summary), most recently used last
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def user_summary_key(user_id):
+    return f'user_summary_{user_id}'
+
+
+def _local_get(user_ids):
+    now = time.monotonic()
+    found = {}
+    with _local_lock:
+        for user_id in user_ids:
+            entry = _local.get(user_id)
+            if entry is None:
+                continue
+            if entry[0] < now:
+                del _local[user_id]
+                continue
+            _local.move_to_end(user_id)
+            found[user_id] = entry[1]
+    return found
+
+
+def _local_put(summaries):
+    # Entries expire so that saves made by other processes are picked up
+    expires_at = time.monotonic() + settings.TRACKER_USER_SUMMARY_LOCAL_SECONDS
+    with _local_lock:
+        for user_id, summary in summaries.items():
+            _local[user_id] = (expires_at, summary)
+            _local.move_to_end(user_id)
+        while len(_local) > settings.TRACKER_USER_SUMMARY_CACHE_SIZE:
+            _local.popitem(last=False)
+
+
+def user_summaries(user_ids):
+    """
+    Summary dicts for the given ids, keyed by id. Reads the process-local LRU
+    first, then the shared cache with one get_many, then the database with
+    one query. Unknown ids are left out.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id}
+    found = _local_get(user_ids)
+    missing = user_ids - found.keys()
+    if not missing:
+        return found
+
+    keys = {user_summary_key(user_id): user_id for user_id in missing}
+    fetched = {keys[key]: summary for key, summary in cache.get_many(keys).items()}
+    missing -= fetched.keys()
+    if missing:
+        loaded = {row['id']: row for row in User.objects.filter(id__in=missing).values(*USER_SUMMARY_FIELDS)}
+        cache.set_many({user_summary_key(user_id): summary for user_id, summary in loaded.items()}, USER_SUMMARY_TIMEOUT)
+        fetched.update(loaded)
+
+    _local_put(fetched)
+    found.update(fetched)
+    return found
+
+
+async def auser_summaries(user_ids):
+    """user_summaries for async views, using the async cache and ORM APIs"""
+    user_ids = {user_id for user_id in user_ids if user_id}
+    found = _local_get(user_ids)
+    missing = user_ids - found.keys()
+    if not missing:
+        return found
+
+    keys = {user_summary_key(user_id): user_id for user_id in missing}
+    fetched = {keys[key]: summary for key, summary in (await cache.aget_many(keys)).items()}
+    missing -= fetched.keys()
+    if missing:
+        rows = User.objects.filter(id__in=missing).values(*USER_SUMMARY_FIELDS)
+        loaded = {row['id']: row async for row in rows}
+        await cache.aset_many({user_summary_key(user_id): summary for user_id, summary in loaded.items()}, USER_SUMMARY_TIMEOUT)
+        fetched.update(loaded)
+
+    _local_put(fetched)
+    found.update(fetched)
+    return found
+
+
+def user_summary(user_id):
+    """One user's summary dict, or None"""
+    if not user_id:
+        return None
+    return user_summaries([user_id]).get(user_id)
+
+
+def invalidate_user_summaries(user_ids):
+    """Drop users from this process's LRU and from the shared cache"""
+    user_ids = [user_id for user_id in user_ids if user_id]
+    with _local_lock:
+        for user_id in user_ids:
+            _local.pop(user_id, None)
+    cache.delete_many([user_summary_key(user_id) for user_id in user_ids])
+
+
+def clear_local_user_summaries():
+    with _local_lock:
+        _local.clear()
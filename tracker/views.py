@@ -1,15 +1,38 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from .models import Project, Bug, Comment, ActivityLog
-from .serializers import ProjectSerializer, BugSerializer, CommentSerializer, ActivityLogSerializer
+from django.db import transaction
+from django.db.models import Count, Q
+from .models import Project, Bug, Comment, ActivityLog, Notification, DeletionJob
+from .serializers import ProjectSerializer, BugSerializer, CommentSerializer, ActivityLogSerializer, NotificationSerializer, DeletionJobSerializer
 from .permissions import IsOwnerOrReadOnly, IsProjectMemberOrReadOnly
+from .access import visible_project_ids
+from .analytics import apply_bug_change, bug_state, project_analytics
+from .querysets import (
+    assigned_bugs,
+    comment_thread,
+    comments_after,
+    group_counts,
+    live_bugs,
+    live_projects,
+    parse_group_by,
+    visible_bugs,
+    with_bug_details,
+)
+from .deletion import soft_delete_bug, soft_delete_project
+from .users import user_summaries, user_summary
+from .coalescing import bug_edit_state, bug_updates
+from .singleflight import SingleFlightListMixin
+from . import metrics
+from .notifications import group_send, send_personal_notifications, get_unread_count, adjust_unread_count, reset_unread_count
 
 
 
@@ -23,97 +46,181 @@ class ProjectViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'name']
     
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):  # schema generation has no user
+            return Project.objects.none()
         return Project.objects.filter(
-            Q(owner=self.request.user) | Q(bugs__assigned_to=self.request.user)
-        ).distinct()
+            live_projects(),
+            id__in=visible_project_ids(self.request.user.id),
+        ).annotate(
+            bugs_count=Count('bugs', filter=Q(bugs__deleted_at__isnull=True))
+        ).order_by('-created_at')  # Meta.ordering is not applied to aggregate queries
         
         
+    def destroy(self, request, *args, **kwargs):
+        """Hide the project now; its rows are removed by a DeletionJob (202 with the job)"""
+        job = soft_delete_project(self.get_object(), request.user)
+        if job is None:
+            raise Http404("Project is already deleted")
+        return Response(DeletionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def analytics(self, request, pk=None):
+        """Dashboard numbers from the rollup tables: open by priority, resolutions per day, MTTR, top assignees"""
+        project = self.get_object()
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 365)
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(project_analytics(project.id, days=days))
         
         
 
-class BugViewSet(viewsets.ModelViewSet):
+        
+        
+
+class BugViewSet(SingleFlightListMixin, viewsets.ModelViewSet):
     serializer_class = BugSerializer
     permission_classes = [IsAuthenticated, IsProjectMemberOrReadOnly]
+    # Polled by integrations: rate limited per user, identical concurrent lists share one query
+    throttle_scopes = {'list': 'bug_list'}
+    single_flight_endpoint = 'bug_list'
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'priority', 'project', 'assigned_to']
     search_fields = ['title', 'description']
     ordering_fields = ['created_at', 'updated_at', 'priority']
     
     def get_queryset(self):
-        return Bug.objects.filter(
-            Q(project__owner=self.request.user) | 
-            Q(assigned_to=self.request.user) | 
-            Q(created_by=self.request.user)
-        ).distinct()
+        if getattr(self, 'swagger_fake_view', False):  # schema generation has no user
+            return Bug.objects.none()
+        return visible_bugs(self.request.user)
+        
+    
+    
+    @action(detail=True, methods=['get'])
+    def comments(self, request, pk=None):
+        """Comments on this bug, oldest first; ?after=<comment_id> returns only newer ones"""
+        bug = self.get_object()
+        comments = comment_thread(bug.id)
         
+        after = request.query_params.get('after')
+        if after:
+            if not after.isdigit():
+                return Response({'after': ['A valid integer is required.']}, status=status.HTTP_400_BAD_REQUEST)
+            anchor = Comment.objects.filter(bug_id=bug.id, id=after).values_list('created_at', flat=True).first()
+            comments = comments_after(comments, int(after), anchor)
+        
+        page = self.paginate_queryset(comments)
+        serializer = CommentSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
     
     
     @action(detail=False, methods=['get'])
     def assigned_to_me(self, request):
-        """Get bugs assigned to current user"""
-        bugs = self.get_queryset().filter(assigned_to=request.user)
-        serializer = self.get_serializer(bugs, many=True)
-        return Response(serializer.data)
+        """Paginated bugs assigned to current user; ?group_by=project,status adds counts per group"""
+        try:
+            groups = parse_group_by(request.query_params.get('group_by'))
+        except ValueError as e:
+            return Response({'group_by': [f'Unknown group "{e}".']}, status=status.HTTP_400_BAD_REQUEST)
+
+        bugs = self.filter_queryset(assigned_bugs(request.user))
+        page = self.paginate_queryset(with_bug_details(bugs))
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        if groups:
+            response.data['groups'] = {group: list(group_counts(bugs, group)) for group in groups}
+        return response
     
     
     def perform_create(self, serializer):
-        bug = serializer.save()
+        resolved_at = timezone.now() if serializer.validated_data.get('status') == 'Resolved' else None
+        # The bug and its rollup contribution commit together or not at all
+        with transaction.atomic():
+            bug = serializer.save(resolved_at=resolved_at)
+            apply_bug_change(None, bug_state(bug))
         self._send_websocket_notification('bug_created', bug)
         self._log_activity(bug, 'created', 'bug')
         
         
     
     def perform_update(self, serializer):
-        old_status = self.get_object().status
-        bug = serializer.save()
+        # serializer.instance is the object already fetched and permission-checked
+        old_state = bug_state(serializer.instance)
+        before = bug_edit_state(serializer.instance)
+        old_status = serializer.instance.status
+        new_status = serializer.validated_data.get('status', old_status)
         
-        # Send notification if status changed
-        if old_status != bug.status:
-            self._send_websocket_notification('bug_status_changed', bug, {
-                'old_status': old_status,
-                'new_status': bug.status
-            })
-        else:
-            self._send_websocket_notification('bug_updated', bug)
+        extra = {}
+        if (old_status == 'Resolved') != (new_status == 'Resolved'):
+            extra['resolved_at'] = timezone.now() if new_status == 'Resolved' else None
+        with transaction.atomic():
+            bug = serializer.save(**extra)
+            apply_bug_change(old_state, bug_state(bug))
         
-        self._log_activity(bug, 'updated', 'bug')
+        # Edits inside TRACKER_BUG_COALESCE_SECONDS go out as one bug_updated or
+        # bug_status_changed event, and share one activity entry
+        window = bug_updates.record(bug, self.request.user, before, bug_edit_state(bug), BugSerializer(bug).data)
+        self._log_update(bug, window)
+        
+        
+    
+    def destroy(self, request, *args, **kwargs):
+        """Hide the bug now; its rows are removed by a DeletionJob (202 with the job)"""
+        job = soft_delete_bug(self.get_object(), request.user)
+        if job is None:
+            raise Http404("Bug is already deleted")
+        bug_updates.discard(job.entity_id)
+        return Response(DeletionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
         
         
     
     def _send_websocket_notification(self, event_type, bug, extra_data=None):
         """Send WebSocket notification to project room"""
-        channel_layer = get_channel_layer()
         data = {
             'type': 'bug_notification',
             'event_type': event_type,
             'bug': BugSerializer(bug).data,
-            'user': bug.created_by.username if event_type == 'bug_created' else self.request.user.username,
+            'user': user_summary(bug.created_by_id)['username'] if event_type == 'bug_created' else self.request.user.username,
         }
         if extra_data:
             data.update(extra_data)
         
-        async_to_sync(channel_layer.group_send)(
-            f"project_{bug.project.id}",
-            data
-
-        )
+        group_send(f"project_{bug.project_id}", data)
         
         
     
-    def _log_activity(self, bug, action, entity_type):
+    def _log_activity(self, bug, action, entity_type, details=None):
         """Log activity for the bug"""
-        ActivityLog.objects.create(
+        return ActivityLog.objects.create(
             project=bug.project,
             user=self.request.user,
             action=action,
             entity_type=entity_type,
             entity_id=bug.id,
-            details={
+            details=details or {
                 'title': bug.title,
                 'status': bug.status,
                 'priority': bug.priority,
             }
         )
+        
+        
+    
+    def _log_update(self, bug, window):
+        """Log an update, folding it into the entry already written for its coalescing window"""
+        def write(activity_id, state, changed_fields, updates):
+            # state is the window's latest, which may come from a later request than this one
+            details = {
+                'title': state['title'],
+                'status': state['status'],
+                'priority': state['priority'],
+                'changed_fields': changed_fields,
+                'updates': updates,
+            }
+            if activity_id:
+                ActivityLog.objects.filter(id=activity_id).update(details=details, updated_at=timezone.now())
+                return activity_id
+            return self._log_activity(bug, 'updated', 'bug', details).id
+
+        bug_updates.fold_activity(window, write)
 
 
 
@@ -125,11 +232,14 @@ class CommentViewSet(viewsets.ModelViewSet):
     
     
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):  # schema generation has no user
+            return Comment.objects.none()
         return Comment.objects.filter(
             Q(bug__project__owner=self.request.user) | 
             Q(bug__assigned_to=self.request.user) | 
             Q(bug__created_by=self.request.user) |
-            Q(commenter=self.request.user)
+            Q(commenter=self.request.user),
+            live_bugs('bug__'),
         ).distinct()
         
         
@@ -143,34 +253,38 @@ class CommentViewSet(viewsets.ModelViewSet):
     
     def _send_comment_notification(self, comment):
         """Send WebSocket notification for new comment"""
-        channel_layer = get_channel_layer()
+        bug = comment.bug
+        # One batch lookup warms the user summary cache for both serializers below
+        commenter = user_summaries([comment.commenter_id, bug.created_by_id, bug.assigned_to_id])[comment.commenter_id]
+        comment_data = CommentSerializer(comment).data
+        bug_data = BugSerializer(bug).data
         
         # Notify project room
-        async_to_sync(channel_layer.group_send)(
-            f"project_{comment.bug.project.id}",
+        group_send(
+            f"project_{bug.project_id}",
             {
                 'type': 'comment_notification',
-                'comment': CommentSerializer(comment).data,
-                'bug': BugSerializer(comment.bug).data,
-                'user': comment.commenter.username,
+                'comment': comment_data,
+                'bug': bug_data,
+                'user': commenter['username'],
             }
         )
         
         
         
         # Send personal notifications to bug creator and assigned user
-        recipients = [comment.bug.created_by, comment.bug.assigned_to]
-        recipients = [user for user in recipients if user and user != comment.commenter]
-        
-        for user in recipients:
-            async_to_sync(channel_layer.group_send)(
-                f"user_{user.id}",
+        recipient_ids = {bug.created_by_id, bug.assigned_to_id} - {None, comment.commenter_id}
+
+        if recipient_ids:
+            send_personal_notifications(
+                recipient_ids,
+                'new_comment',
+                bug.project,
+                bug,
                 {
-                    'type': 'personal_notification',
-                    'notification_type': 'new_comment',
-                    'comment': CommentSerializer(comment).data,
-                    'bug': BugSerializer(comment.bug).data,
-                    'commenter': comment.commenter.username,
+                    'comment': comment_data,
+                    'bug': bug_data,
+                    'commenter': commenter['username'],
                 }
             )
             
@@ -194,19 +308,121 @@ class CommentViewSet(viewsets.ModelViewSet):
         
         
         
-class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
+class ActivityLogViewSet(SingleFlightListMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = ActivityLogSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scopes = {'list': 'activity_list'}
+    single_flight_endpoint = 'activity_list'
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['project', 'action', 'entity_type']
+    # ?created_at__gte=...&created_at__lt=... limits the scan to a date range
+    filterset_fields = {
+        'project': ['exact'],
+        'action': ['exact'],
+        'entity_type': ['exact'],
+        'created_at': ['gte', 'lt'],
+    }
     ordering_fields = ['created_at']
     ordering = ['-created_at']
     
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):  # schema generation has no user
+            return ActivityLog.objects.none()
+        # Cached owned + assigned project ids: an indexed IN lookup instead of
+        # joining every bug of the project and de-duplicating with DISTINCT
         return ActivityLog.objects.filter(
-            Q(project__owner=self.request.user) | 
-            Q(project__bugs__assigned_to=self.request.user)
-        ).distinct()        
-        
-        
-        
\ No newline at end of file
+            live_projects('project__'),
+            project_id__in=visible_project_ids(self.request.user.id),
+        )
+
+
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """Personal inbox filled in when personal notifications are sent"""
+    serializer_class = NotificationSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['is_read', 'notification_type', 'project']
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):  # schema generation has no user
+            return Notification.objects.none()
+        return Notification.objects.filter(recipient=self.request.user)
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Get the cached unread counter"""
+        return Response({'unread_count': get_unread_count(request.user.id)})
+
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        """Mark every unread notification as read in a single UPDATE"""
+        # update() skips auto_now, so updated_at is set here
+        updated = self.get_queryset().filter(is_read=False).update(is_read=True, updated_at=timezone.now())
+        reset_unread_count(request.user.id)
+        return Response({'marked_read': updated})
+
+    @action(detail=True, methods=['post'])
+    def mark_read(self, request, pk=None):
+        """Mark one notification as read"""
+        updated = self.get_queryset().filter(pk=pk, is_read=False).update(is_read=True, updated_at=timezone.now())
+        if updated:
+            adjust_unread_count(request.user.id, -1)
+        return Response({'marked_read': updated})
+
+
+
+class DeletionJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Progress of the background deletes a user started"""
+    serializer_class = DeletionJobSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['status', 'entity_type']
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):  # schema generation has no user
+            return DeletionJob.objects.none()
+        return DeletionJob.objects.filter(requested_by=self.request.user).order_by('-created_at')
+
+
+class RequestMetricsView(APIView):
+    """Aggregated per-view request histograms recorded by RequestInstrumentationMiddleware"""
+    permission_classes = [IsAdminUser]
+
+    HISTOGRAMS = {
+        'duration_seconds': metrics.request_duration,
+        'db_seconds': metrics.request_db_time,
+        'serialize_seconds': metrics.request_serialize_time,
+        'queries': metrics.request_queries,
+        'response_bytes': metrics.response_size,
+    }
+
+    def get(self, request):
+        views = {}
+        for field, histogram in self.HISTOGRAMS.items():
+            for labels, cumulative, total, count in histogram.samples():
+                views.setdefault(labels['view'], {'count': count})[field] = {
+                    'mean': total / count if count else 0,
+                    'p50': histogram.quantile(0.5, cumulative, count),
+                    'p95': histogram.quantile(0.95, cumulative, count),
+                    'buckets': [[str(upper), running] for upper, running in cumulative],
+                }
+        for labels, value in metrics.query_budget_exceeded.samples():
+            if labels['view'] in views:
+                views[labels['view']]['query_budget_exceeded'] = value
+        return Response({'instrumentation_enabled': settings.TRACKER_INSTRUMENTATION, 'views': views})
+
+
+
+def prometheus_metrics(request):
+    """
+    Process-local metrics in the Prometheus text exposition format. Scrapers
+    authenticate with TRACKER_METRICS_TOKEN; without a token the endpoint is
+    only open while DEBUG is on.
+    """
+    token = settings.TRACKER_METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse('TRACKER_METRICS_TOKEN is not set', status=403, content_type='text/plain')
+    elif not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -108,8 +108,7 @@ class WebSocketTest:
                 print(" WebSocket connected with query auth!")
                 
                 try:
-                    welcome_msg = await asyncio.wait_for(ws.recv(), timeout=10)
-                    welcome_data = json.loads(welcome_msg)
+                    welcome_data = await self.receive_json(ws, timeout=10)
                     print(f" Welcome: {json.dumps(welcome_data, indent=2)}")
                     
                     if welcome_data.get('type') == 'connection_established':
@@ -174,11 +173,23 @@ class WebSocketTest:
         
         
     
+    async def receive_json(self, ws, timeout):
+        """Next message from the server; answers heartbeats and acks every message that carries a seq"""
+        while True:
+            data = json.loads(await asyncio.wait_for(ws.recv(), timeout=timeout))
+            if data.get('type') != 'heartbeat':
+                break
+            # Without a reply the server reaps the connection as idle
+            await ws.send(json.dumps({'type': 'pong'}))
+        if 'seq' in data:
+            await ws.send(json.dumps({'type': 'ack', 'seq': data['seq']}))
+        return data
+    
+    
     async def handle_websocket_connection(self, ws):
         """Handle the WebSocket connection after it's established"""
         try:
-            welcome_msg = await asyncio.wait_for(ws.recv(), timeout=10)
-            welcome_data = json.loads(welcome_msg)
+            welcome_data = await self.receive_json(ws, timeout=10)
             print(f" Welcome: {json.dumps(welcome_data, indent=2)}")
             
             if welcome_data.get('type') == 'connection_established':
@@ -212,8 +223,7 @@ class WebSocketTest:
         print(f"Sent: {ping_msg}")
         
         try:
-            pong_msg = await asyncio.wait_for(ws.recv(), timeout=5)
-            pong_data = json.loads(pong_msg)
+            pong_data = await self.receive_json(ws, timeout=5)
             print(f"Received: {json.dumps(pong_data, indent=2)}")
             
             if pong_data.get('type') == 'pong':